@@ -0,0 +1,47 @@
+from logging.config import fileConfig
+from alembic import context
+from sqlalchemy import create_engine, pool
+from sqlalchemy.engine import URL
+from app.config.database import DB_CONFIG
+
+config = context.config
+
+if config.config_file_name is not None:
+    fileConfig(config.config_file_name, disable_existing_loggers=False)
+
+# Migrations are written as raw SQL, there is no SQLAlchemy metadata
+target_metadata = None
+
+def get_url() -> URL:
+    return URL.create(
+        "postgresql+psycopg2",
+        username=DB_CONFIG['user'],
+        password=DB_CONFIG['password'],
+        host=DB_CONFIG['host'],
+        port=int(DB_CONFIG['port']) if DB_CONFIG['port'] else None,
+        database=DB_CONFIG['dbname'],
+    )
+
+def run_migrations_offline():
+    """
+    Emit the migration SQL to stdout instead of running it (`alembic upgrade --sql`).
+    """
+    context.configure(
+        url=get_url().render_as_string(hide_password=False),
+        target_metadata=target_metadata,
+        literal_binds=True,
+    )
+    with context.begin_transaction():
+        context.run_migrations()
+
+def run_migrations_online():
+    engine = create_engine(get_url(), poolclass=pool.NullPool)
+    with engine.connect() as connection:
+        context.configure(connection=connection, target_metadata=target_metadata)
+        with context.begin_transaction():
+            context.run_migrations()
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
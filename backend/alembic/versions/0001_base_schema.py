@@ -0,0 +1,92 @@
+"""base schema
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-18 09:00:00
+
+The tables the application was originally deployed with. Every statement is
+IF NOT EXISTS so an existing database can be brought under migration control
+by simply running `alembic upgrade head`.
+"""
+from alembic import op
+
+revision = '0001'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.execute("""
+    CREATE TABLE IF NOT EXISTS Users (
+        id SERIAL PRIMARY KEY,
+        Name VARCHAR(100) NOT NULL,
+        ContactInfo VARCHAR(500),
+        Role VARCHAR(20) NOT NULL
+    );
+
+    CREATE TABLE IF NOT EXISTS Products (
+        ProductID SERIAL PRIMARY KEY,
+        Name VARCHAR(100) NOT NULL,
+        Description VARCHAR(500),
+        Price NUMERIC(10, 2) NOT NULL CHECK (Price > 0)
+    );
+
+    CREATE TABLE IF NOT EXISTS Inventory (
+        InventoryID SERIAL PRIMARY KEY,
+        ProductID INTEGER NOT NULL UNIQUE REFERENCES Products(ProductID) ON DELETE CASCADE,
+        Quantity INTEGER NOT NULL DEFAULT 0 CHECK (Quantity >= 0)
+    );
+
+    CREATE TABLE IF NOT EXISTS Orders (
+        OrderID SERIAL PRIMARY KEY,
+        OrderDate DATE NOT NULL,
+        SupplierID INTEGER NOT NULL REFERENCES Users(id)
+    );
+
+    CREATE TABLE IF NOT EXISTS CustomerOrders (
+        OrderID INTEGER NOT NULL REFERENCES Orders(OrderID) ON DELETE CASCADE,
+        CustomerID INTEGER NOT NULL REFERENCES Users(id),
+        PRIMARY KEY (OrderID, CustomerID)
+    );
+
+    CREATE TABLE IF NOT EXISTS OrderDetails (
+        OrderDetailID SERIAL PRIMARY KEY,
+        OrderID INTEGER NOT NULL REFERENCES Orders(OrderID) ON DELETE CASCADE,
+        ProductID INTEGER NOT NULL REFERENCES Products(ProductID) ON DELETE CASCADE,
+        Quantity INTEGER NOT NULL CHECK (Quantity > 0)
+    );
+
+    CREATE TABLE IF NOT EXISTS PaymentDetails (
+        PaymentID SERIAL PRIMARY KEY,
+        OrderID INTEGER NOT NULL REFERENCES Orders(OrderID) ON DELETE CASCADE,
+        PaymentDate DATE NOT NULL,
+        Amount NUMERIC(12, 2) NOT NULL CHECK (Amount > 0)
+    );
+
+    CREATE TABLE IF NOT EXISTS Shipments (
+        ShipmentID SERIAL PRIMARY KEY,
+        OrderID INTEGER NOT NULL REFERENCES Orders(OrderID) ON DELETE CASCADE,
+        ShipmentDate DATE
+    );
+
+    CREATE TABLE IF NOT EXISTS ShipmentDetails (
+        ShipmentID INTEGER NOT NULL REFERENCES Shipments(ShipmentID) ON DELETE CASCADE,
+        ProductID INTEGER NOT NULL REFERENCES Products(ProductID) ON DELETE CASCADE,
+        Quantity INTEGER NOT NULL CHECK (Quantity > 0)
+    );
+    """)
+
+
+def downgrade():
+    op.execute("""
+    DROP TABLE IF EXISTS ShipmentDetails;
+    DROP TABLE IF EXISTS Shipments;
+    DROP TABLE IF EXISTS PaymentDetails;
+    DROP TABLE IF EXISTS OrderDetails;
+    DROP TABLE IF EXISTS CustomerOrders;
+    DROP TABLE IF EXISTS Orders;
+    DROP TABLE IF EXISTS Inventory;
+    DROP TABLE IF EXISTS Products;
+    DROP TABLE IF EXISTS Users;
+    """)
@@ -0,0 +1,56 @@
+"""hot query indexes
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18 09:10:00
+
+Indexes for the join and filter columns of the list, detail and analytics
+queries. They are built CONCURRENTLY so the upgrade does not block writes on
+a live database; CONCURRENTLY cannot run inside a transaction, hence the
+autocommit block. If a build is interrupted the index is left INVALID - drop
+it and rerun the upgrade.
+"""
+from alembic import op
+
+revision = '0002'
+down_revision = '0001'
+branch_labels = None
+depends_on = None
+
+# name -> definition, created in this order and dropped in reverse
+INDEXES = {
+    # Order list keyset pagination and date range filters
+    'idx_orders_date': "Orders (OrderDate DESC, OrderID DESC)",
+    'idx_orders_supplier': "Orders (SupplierID)",
+    # Covering, so order totals and the product lines of an order are index-only
+    'idx_orderdetails_order': "OrderDetails (OrderID) INCLUDE (ProductID, Quantity)",
+    'idx_orderdetails_product': "OrderDetails (ProductID)",
+    # The primary key leads with OrderID, customer lookups need their own index
+    'idx_customerorders_customer': "CustomerOrders (CustomerID)",
+    'idx_shipments_order': "Shipments (OrderID)",
+    'idx_shipmentdetails_shipment': "ShipmentDetails (ShipmentID)",
+    'idx_paymentdetails_order_date': "PaymentDetails (OrderID, PaymentDate)",
+    'idx_paymentdetails_date': "PaymentDetails (PaymentDate)",
+    'idx_users_role': "Users (Role)",
+    # Customer and supplier lists sort by name with the id as tie-breaker
+    # and return the contact info, so one partial index per role serves
+    # both the filter and the keyset page without touching the heap
+    'idx_users_customer_name': "Users (Name, id) INCLUDE (ContactInfo) WHERE Role = 'customer'",
+    'idx_users_supplier_name': "Users (Name, id) INCLUDE (ContactInfo) WHERE Role = 'supplier'",
+    # Login looks users up by name and contact info
+    'idx_users_login': "Users (Name, ContactInfo)",
+    # Low stock reports filter and sort on the quantity
+    'idx_inventory_quantity': "Inventory (Quantity)",
+}
+
+
+def upgrade():
+    with op.get_context().autocommit_block():
+        for name, definition in INDEXES.items():
+            op.execute(f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} ON {definition}")
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        for name in reversed(list(INDEXES)):
+            op.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {name}")
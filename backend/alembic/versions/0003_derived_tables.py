@@ -0,0 +1,99 @@
+"""derived order tables and table versions
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18 09:20:00
+
+Stored order totals, the daily sales rollup, the monthly metrics cube and
+the per-table change counters used for ETags. The derived data is filled by
+`python -m app.utils.database_utils setup` after the upgrade.
+"""
+from alembic import op
+
+revision = '0003'
+down_revision = '0002'
+branch_labels = None
+depends_on = None
+
+# Frozen copy of app.repositories.version_repo.VERSIONED_TABLES at this
+# revision; tables added to that list later need their own migration
+VERSIONED_TABLES = (
+    'users',
+    'products',
+    'inventory',
+    'orders',
+    'customerorders',
+    'orderdetails',
+    'paymentdetails',
+    'shipments',
+    'shipmentdetails',
+)
+
+
+def upgrade():
+    op.execute("""
+    ALTER TABLE Orders
+        ADD COLUMN IF NOT EXISTS TotalItems INTEGER NOT NULL DEFAULT 0,
+        ADD COLUMN IF NOT EXISTS TotalQuantity INTEGER NOT NULL DEFAULT 0,
+        ADD COLUMN IF NOT EXISTS TotalAmount NUMERIC NOT NULL DEFAULT 0,
+        ADD COLUMN IF NOT EXISTS AmountPaid NUMERIC NOT NULL DEFAULT 0,
+        ADD COLUMN IF NOT EXISTS Status VARCHAR(20) NOT NULL DEFAULT 'Pending';
+
+    CREATE TABLE IF NOT EXISTS DailySalesRollup (
+        SaleDate DATE PRIMARY KEY,
+        Orders INTEGER NOT NULL,
+        Customers INTEGER NOT NULL,
+        UnitsSold BIGINT NOT NULL,
+        Revenue NUMERIC NOT NULL,
+        UpdatedAt TIMESTAMP NOT NULL DEFAULT NOW()
+    );
+
+    CREATE TABLE IF NOT EXISTS MonthlyMetricsCube (
+        Month DATE PRIMARY KEY,
+        Orders INTEGER NOT NULL,
+        Customers INTEGER NOT NULL,
+        Units BIGINT NOT NULL,
+        Revenue NUMERIC NOT NULL,
+        UniqueProducts INTEGER NOT NULL,
+        UpdatedAt TIMESTAMP NOT NULL DEFAULT NOW()
+    );
+
+    CREATE TABLE IF NOT EXISTS TableVersions (
+        TableName TEXT PRIMARY KEY,
+        Version BIGINT NOT NULL DEFAULT 0
+    );
+
+    CREATE OR REPLACE FUNCTION bump_table_version() RETURNS trigger AS $$
+    BEGIN
+        INSERT INTO TableVersions (TableName, Version)
+        VALUES (TG_TABLE_NAME, 1)
+        ON CONFLICT (TableName) DO UPDATE SET Version = TableVersions.Version + 1;
+        RETURN NULL;
+    END;
+    $$ LANGUAGE plpgsql;
+    """)
+    # One statement-level trigger per table, so a multi-row write bumps once
+    for table in VERSIONED_TABLES:
+        op.execute(f"""
+        DROP TRIGGER IF EXISTS {table}_bump_version ON {table};
+        CREATE TRIGGER {table}_bump_version
+        AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON {table}
+        FOR EACH STATEMENT EXECUTE FUNCTION bump_table_version();
+        """)
+
+
+def downgrade():
+    for table in VERSIONED_TABLES:
+        op.execute(f"DROP TRIGGER IF EXISTS {table}_bump_version ON {table};")
+    op.execute("""
+    DROP FUNCTION IF EXISTS bump_table_version();
+    DROP TABLE IF EXISTS TableVersions;
+    DROP TABLE IF EXISTS MonthlyMetricsCube;
+    DROP TABLE IF EXISTS DailySalesRollup;
+    ALTER TABLE Orders
+        DROP COLUMN IF EXISTS Status,
+        DROP COLUMN IF EXISTS AmountPaid,
+        DROP COLUMN IF EXISTS TotalAmount,
+        DROP COLUMN IF EXISTS TotalQuantity,
+        DROP COLUMN IF EXISTS TotalItems;
+    """)
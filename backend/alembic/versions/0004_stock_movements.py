@@ -0,0 +1,33 @@
+"""stock movements ledger
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18 09:30:00
+"""
+from alembic import op
+
+revision = '0004'
+down_revision = '0003'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.execute("""
+    CREATE TABLE IF NOT EXISTS StockMovements (
+        MovementID BIGSERIAL PRIMARY KEY,
+        ProductID INTEGER NOT NULL REFERENCES Products(ProductID) ON DELETE CASCADE,
+        MovementType VARCHAR(10) NOT NULL
+            CHECK (MovementType IN ('receive', 'dispense', 'adjust')),
+        Delta INTEGER NOT NULL CHECK (Delta <> 0),
+        Reason TEXT,
+        QuantityAfter INTEGER NOT NULL CHECK (QuantityAfter >= 0),
+        CreatedAt TIMESTAMP NOT NULL DEFAULT NOW()
+    );
+    CREATE INDEX IF NOT EXISTS idx_stockmovements_product
+        ON StockMovements (ProductID, MovementID DESC);
+    """)
+
+
+def downgrade():
+    op.execute("DROP TABLE IF EXISTS StockMovements;")
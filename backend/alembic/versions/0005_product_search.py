@@ -0,0 +1,36 @@
+"""product search vector and trigram index
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-18 09:40:00
+"""
+from alembic import op
+
+revision = '0005'
+down_revision = '0004'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.execute("""
+    CREATE EXTENSION IF NOT EXISTS pg_trgm;
+    ALTER TABLE Products
+        ADD COLUMN IF NOT EXISTS SearchVector tsvector GENERATED ALWAYS AS (
+            setweight(to_tsvector('simple', COALESCE(Name, '')), 'A') ||
+            setweight(to_tsvector('simple', COALESCE(Description, '')), 'B')
+        ) STORED;
+    CREATE INDEX IF NOT EXISTS idx_products_search_vector
+        ON Products USING GIN (SearchVector);
+    CREATE INDEX IF NOT EXISTS idx_products_name_trgm
+        ON Products USING GIN (LOWER(Name) gin_trgm_ops);
+    """)
+
+
+def downgrade():
+    # pg_trgm is left installed, other database objects may depend on it
+    op.execute("""
+    DROP INDEX IF EXISTS idx_products_name_trgm;
+    DROP INDEX IF EXISTS idx_products_search_vector;
+    ALTER TABLE Products DROP COLUMN IF EXISTS SearchVector;
+    """)
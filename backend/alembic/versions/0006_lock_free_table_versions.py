@@ -0,0 +1,54 @@
+"""lock-free table versions
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-18 10:00:00
+
+bump_table_version() used to upsert one TableVersions row per table, which
+stayed locked until the writing transaction committed, so all writers to a
+table ran one at a time. Writes now append a row to TableChanges instead,
+which takes no lock other writers wait for. A table's version is its
+TableVersions base plus its count of TableChanges rows; the rows are folded
+into the base from time to time by version_repo.compact_table_versions().
+"""
+from alembic import op
+
+revision = '0006'
+down_revision = '0005'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.execute("""
+    CREATE TABLE IF NOT EXISTS TableChanges (
+        ChangeID BIGSERIAL PRIMARY KEY,
+        TableName TEXT NOT NULL
+    );
+    CREATE INDEX IF NOT EXISTS idx_tablechanges_table ON TableChanges (TableName);
+
+    CREATE OR REPLACE FUNCTION bump_table_version() RETURNS trigger AS $$
+    BEGIN
+        INSERT INTO TableChanges (TableName) VALUES (TG_TABLE_NAME);
+        RETURN NULL;
+    END;
+    $$ LANGUAGE plpgsql;
+    """)
+
+
+def downgrade():
+    op.execute("""
+    CREATE OR REPLACE FUNCTION bump_table_version() RETURNS trigger AS $$
+    BEGIN
+        INSERT INTO TableVersions (TableName, Version)
+        VALUES (TG_TABLE_NAME, 1)
+        ON CONFLICT (TableName) DO UPDATE SET Version = TableVersions.Version + 1;
+        RETURN NULL;
+    END;
+    $$ LANGUAGE plpgsql;
+
+    INSERT INTO TableVersions (TableName, Version)
+    SELECT TableName, COUNT(*) FROM TableChanges GROUP BY TableName
+    ON CONFLICT (TableName) DO UPDATE SET Version = TableVersions.Version + EXCLUDED.Version;
+    DROP TABLE IF EXISTS TableChanges;
+    """)
@@ -1,21 +1,69 @@
-from fastapi import APIRouter, HTTPException, Query, Path
-from app.schemas.customer import CustomerCreate, CustomerUpdate, CustomerResponse, CustomerOrderHistory, CustomerValueAnalysis
+from fastapi import APIRouter, HTTPException, Query, Path, Response
+from app.schemas.customer import CustomerCreate, CustomerUpdate, CustomerResponse, CustomerOrderHistory, CustomerValueAnalysis, CustomerAutocomplete
 from app.repositories import customer_repo
-from typing import List, Optional
+from app.utils.pagination import (
+    NEXT_CURSOR_HEADER,
+    TOTAL_COUNT_HEADER,
+    decode_cursor,
+    split_page
+)
+from app.utils.batch_loader import MAX_BATCH_SIZE
+from typing import List, Optional, Literal
 
 router = APIRouter()
 
 @router.get("/", response_model=List[CustomerResponse])
 async def get_customers(
+    response: Response,
     search: Optional[str] = Query(None, description="Search term for customer name"),
-    vip_only: bool = Query(False, description="Filter for VIP customers only")
+    vip_only: bool = Query(False, description="Filter for VIP customers only"),
+    sort: Literal["customer_id", "name"] = Query("customer_id", description="Sort key"),
+    order: Literal["asc", "desc"] = Query("asc", description="Sort direction"),
+    limit: Optional[int] = Query(None, ge=1, le=500, description="Page size; omit to return all customers"),
+    cursor: Optional[str] = Query(None, description="Cursor from the X-Next-Cursor header of the previous page"),
+    include_total: bool = Query(False, description="Return the total match count in the X-Total-Count header"),
+    ids: Optional[List[int]] = Query(
+        None,
+        max_length=MAX_BATCH_SIZE,
+        description="Get only these customer IDs, in the given order (repeat the parameter: ids=1&ids=2)"
+    ),
 ):
-    """Get all customers or search customers if search term is provided"""
+    """
+    Get all customers or search customers if search term is provided.
+    With `limit`, results are paged and the next page cursor is returned
+    in the X-Next-Cursor response header. With `ids`, only those customers
+    are returned and the other filters are ignored; unknown IDs are left out.
+    """
+    if ids:
+        return await customer_repo.get_customers_by_ids(ids)
+
     if vip_only:
         return await customer_repo.get_vip_customers()
+
+    after = None
+    if cursor:
+        after = decode_cursor(cursor, {sort: customer_repo.SORT_KEYS[sort][1], 'customer_id': int})
+    descending = order == "desc"
+
     if search:
-        return await customer_repo.search_customers(search)
-    return await customer_repo.get_all_customers()
+        customers = await customer_repo.search_customers(search, sort, descending, limit, after)
+    else:
+        customers = await customer_repo.get_all_customers(sort, descending, limit, after)
+
+    customers, next_cursor = split_page(customers, limit, (sort, 'customer_id'))
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    if include_total:
+        response.headers[TOTAL_COUNT_HEADER] = str(await customer_repo.count_customers(search))
+    return customers
+
+@router.get("/autocomplete", response_model=List[CustomerAutocomplete])
+async def autocomplete_customers(
+    q: str = Query(..., min_length=1, description="Start of a word in the customer name"),
+    limit: int = Query(10, ge=1, le=50, description="Maximum number of matches")
+):
+    """Suggest customers by name prefix from the in-memory index"""
+    return await customer_repo.autocomplete_customers(q, limit)
 
 @router.get("/vip", response_model=List[CustomerValueAnalysis])
 async def get_vip_customers():
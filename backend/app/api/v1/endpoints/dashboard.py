@@ -28,4 +28,9 @@ async def get_top_products():
 @router.get("/top-customers", response_model=List[TopCustomers])
 async def get_top_customers():
     """Get highest value customers"""
-    return await dashboard_repo.get_top_customers()
\ No newline at end of file
+    return await dashboard_repo.get_top_customers()
+
+@router.get("/cache-stats")
+async def get_cache_stats():
+    """Get hit/miss counters of the dashboard cache"""
+    return dashboard_repo.get_cache_stats()
\ No newline at end of file
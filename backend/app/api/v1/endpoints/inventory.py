@@ -1,15 +1,34 @@
-from fastapi import APIRouter, HTTPException, Query, Path
-from app.schemas.inventory import InventoryUpdate, InventoryResponse, StockAlert
+from fastapi import APIRouter, HTTPException, Query, Path, Request, Response, Body
+from app.schemas.inventory import (
+    InventoryUpdate,
+    InventoryResponse,
+    InventoryBatchItem,
+    InventoryBatchError,
+    InventoryBatchResponse,
+    StockMovementCreate,
+    StockMovementResponse,
+    StockMovementBatchResponse,
+    StockAlert
+)
 from app.repositories import inventory_repo
+from app.utils.etag import conditional_get
+from app.utils.pagination import NEXT_CURSOR_HEADER, decode_cursor, split_page
 from typing import List, Optional
 
 router = APIRouter()
 
+BATCH_MAX_ITEMS = 10000
+
 @router.get("/", response_model=List[InventoryResponse])
 async def get_inventory(
+    request: Request,
+    response: Response,
     low_stock: bool = Query(False, description="Filter for low stock items")
 ):
     """Get all inventory items or low stock items"""
+    not_modified = await conditional_get(request, response, ('inventory', 'products'))
+    if not_modified:
+        return not_modified
     if low_stock:
         return await inventory_repo.get_low_stock_items()
     return await inventory_repo.get_all_inventory()
@@ -19,6 +38,61 @@ async def get_stock_alerts():
     """Get items with critically low stock"""
     return await inventory_repo.get_stock_alerts()
 
+@router.put("/batch", response_model=InventoryBatchResponse)
+async def update_inventory_batch(
+    items: List[InventoryBatchItem] = Body(..., max_length=BATCH_MAX_ITEMS)
+):
+    """
+    Set the quantity of many products at once, e.g. after a cycle count.
+    Known products are updated together; unknown ones are reported in
+    `errors`. If a product appears more than once, its last quantity wins.
+    """
+    if not items:
+        raise HTTPException(status_code=400, detail="At least one item is required")
+    quantities = {item.product_id: item.quantity for item in items}
+    updated = await inventory_repo.update_inventory_batch(quantities)
+    updated_ids = {row['product_id'] for row in updated}
+    errors = [
+        InventoryBatchError(product_id=product_id, detail="Product not found in inventory")
+        for product_id in quantities
+        if product_id not in updated_ids
+    ]
+    return InventoryBatchResponse(updated=updated, errors=errors)
+
+@router.post("/movements", response_model=StockMovementBatchResponse)
+async def record_movements(
+    movements: List[StockMovementCreate] = Body(..., max_length=BATCH_MAX_ITEMS)
+):
+    """
+    Receive, dispense or adjust stock by signed deltas.
+    Each product's quantity is changed atomically relative to its current
+    value and every movement is appended to the ledger. Movements that would
+    make stock negative, or target unknown products, are reported in `errors`.
+    """
+    if not movements:
+        raise HTTPException(status_code=400, detail="At least one movement is required")
+    recorded, refused = await inventory_repo.apply_movements(movements)
+    errors = [
+        InventoryBatchError(product_id=product_id, detail=detail)
+        for product_id, detail in refused.items()
+    ]
+    return StockMovementBatchResponse(movements=recorded, errors=errors)
+
+@router.get("/{product_id}/movements", response_model=List[StockMovementResponse])
+async def get_movements(
+    response: Response,
+    product_id: int = Path(..., gt=0),
+    limit: int = Query(100, ge=1, le=500, description="Page size"),
+    cursor: Optional[str] = Query(None, description="Cursor from the X-Next-Cursor header of the previous page")
+):
+    """Get the stock movement history of a product, newest first"""
+    after = decode_cursor(cursor, {'movement_id': int}) if cursor else None
+    movements = await inventory_repo.get_movements(product_id, limit, after)
+    movements, next_cursor = split_page(movements, limit, ('movement_id',))
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    return movements
+
 @router.get("/{product_id}", response_model=InventoryResponse)
 async def get_product_inventory(
     product_id: int = Path(..., gt=0)
@@ -1,5 +1,9 @@
 # File: app/api/v1/endpoints/orders.py
-from fastapi import APIRouter, HTTPException, Query, Path
+import csv
+import io
+import json
+from fastapi import APIRouter, HTTPException, Query, Path, Request, Response, Body
+from fastapi.responses import StreamingResponse
 from app.schemas.order import (
     OrderCreate, 
     OrderUpdate, 
@@ -9,20 +13,93 @@ from app.schemas.order import (
     OrderDetail
 )
 from app.repositories import order_repo
-from typing import List, Optional
+from app.utils.pagination import NEXT_CURSOR_HEADER, decode_cursor, split_page
+from app.utils.batch_loader import MAX_BATCH_SIZE
+from app.utils.etag import conditional_get
+from typing import List, Optional, Literal
 from datetime import date
 
 router = APIRouter()
 
+BATCH_MAX_ORDERS = 5000
+
+EXPORT_COLUMNS = [
+    "order_id",
+    "order_date",
+    "supplier_id",
+    "supplier_name",
+    "customer_id",
+    "customer_name",
+    "order_detail_id",
+    "product_id",
+    "product_name",
+    "quantity",
+    "unit_price",
+    "total_price",
+]
+
+async def _export_csv(chunks):
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=EXPORT_COLUMNS, extrasaction="ignore")
+    writer.writeheader()
+    yield buffer.getvalue()
+    async for rows in chunks:
+        buffer.seek(0)
+        buffer.truncate(0)
+        writer.writerows(rows)
+        yield buffer.getvalue()
+
+async def _export_ndjson(chunks):
+    async for rows in chunks:
+        yield "".join(
+            json.dumps({column: row[column] for column in EXPORT_COLUMNS}, default=str) + "\n"
+            for row in rows
+        )
+
 @router.get("/", response_model=List[OrderResponse])
 async def get_orders(
+    request: Request,
+    response: Response,
     start_date: Optional[date] = Query(None, description="Filter orders from this date"),
     end_date: Optional[date] = Query(None, description="Filter orders until this date"),
     customer_id: Optional[int] = Query(None, description="Filter orders by customer ID"),
-    supplier_id: Optional[int] = Query(None, description="Filter orders by supplier ID")
+    supplier_id: Optional[int] = Query(None, description="Filter orders by supplier ID"),
+    limit: Optional[int] = Query(None, ge=1, le=500, description="Page size; omit to return all orders"),
+    cursor: Optional[str] = Query(None, description="Cursor from the X-Next-Cursor header of the previous page"),
+    ids: Optional[List[int]] = Query(
+        None,
+        max_length=MAX_BATCH_SIZE,
+        description="Get only these order IDs, in the given order (repeat the parameter: ids=1&ids=2)"
+    ),
 ):
-    """Get all orders with optional date range and customer/supplier filters"""
-    return await order_repo.get_orders(start_date, end_date, customer_id, supplier_id)
+    """
+    Get orders with optional date range and customer/supplier filters.
+    With `limit`, results are paged newest first and the cursor for the next
+    page is returned in the X-Next-Cursor response header. With `ids`, only
+    those orders are returned and the other filters are ignored; unknown IDs
+    are left out.
+    """
+    # Order totals and status are stored on Orders, so payment and
+    # shipment writes also bump its version
+    not_modified = await conditional_get(
+        request, response, ('orders', 'customerorders', 'users')
+    )
+    if not_modified:
+        return not_modified
+
+    if ids:
+        return await order_repo.get_orders_by_ids(ids)
+
+    after = None
+    if cursor:
+        after = decode_cursor(cursor, {'order_date': date.fromisoformat, 'order_id': int})
+    orders = await order_repo.get_orders(
+        start_date, end_date, customer_id, supplier_id, limit=limit, cursor=after
+    )
+    orders, next_cursor = split_page(orders, limit, ('order_date', 'order_id'))
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    return orders
 
 @router.get("/summary", response_model=List[OrderSummary])
 async def get_order_summary():
@@ -34,6 +111,29 @@ async def get_order_status():
     """Get status summary of all orders including payment and shipment status"""
     return await order_repo.get_order_status()
 
+@router.get("/export")
+async def export_orders(
+    format: Literal["csv", "ndjson"] = Query("csv", description="Export format"),
+    start_date: Optional[date] = Query(None, description="Filter orders from this date"),
+    end_date: Optional[date] = Query(None, description="Filter orders until this date"),
+    customer_id: Optional[int] = Query(None, description="Filter orders by customer ID"),
+    supplier_id: Optional[int] = Query(None, description="Filter orders by supplier ID")
+):
+    """
+    Export order lines as CSV or NDJSON. Rows are streamed from a
+    server-side cursor, so memory use does not grow with the export size.
+    """
+    chunks = order_repo.stream_orders(start_date, end_date, customer_id, supplier_id)
+    if format == "ndjson":
+        body, media_type = _export_ndjson(chunks), "application/x-ndjson"
+    else:
+        body, media_type = _export_csv(chunks), "text/csv"
+    return StreamingResponse(
+        body,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="orders.{format}"'}
+    )
+
 @router.get("/{order_id}", response_model=OrderResponse)
 async def get_order(
     order_id: int = Path(..., gt=0)
@@ -59,6 +159,18 @@ async def create_order(order: OrderCreate):
     """Create a new order"""
     return await order_repo.create_order(order)
 
+@router.post("/batch", response_model=List[OrderResponse])
+async def create_orders(
+    orders: List[OrderCreate] = Body(..., max_length=BATCH_MAX_ORDERS)
+):
+    """
+    Create many orders in a single transaction.
+    Either every order is created or none is.
+    """
+    if not orders:
+        raise HTTPException(status_code=400, detail="At least one order is required")
+    return await order_repo.create_orders(orders)
+
 @router.put("/{order_id}", response_model=OrderResponse)
 async def update_order(
     order_id: int = Path(..., gt=0),
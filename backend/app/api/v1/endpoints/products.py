@@ -1,20 +1,78 @@
-from fastapi import APIRouter, HTTPException, Query, Path
+from fastapi import APIRouter, HTTPException, Query, Path, Request, Response
 from app.schemas.product import ProductCreate, ProductUpdate, ProductResponse
 from app.repositories import product_repo
-from typing import List, Optional
+from app.utils.pagination import (
+    NEXT_CURSOR_HEADER,
+    TOTAL_COUNT_HEADER,
+    decode_cursor,
+    split_page
+)
+from app.utils.batch_loader import MAX_BATCH_SIZE
+from app.utils.etag import conditional_get
+from typing import List, Optional, Literal
 
 router = APIRouter()
 
 @router.get("/", response_model=List[ProductResponse])
 async def get_products(
-    search: Optional[str] = Query(None, description="Search term for product name or description")
+    request: Request,
+    response: Response,
+    search: Optional[str] = Query(None, description="Search term for product name or description"),
+    search_mode: Literal["like", "ranked"] = Query(
+        "like",
+        description="`ranked` uses the full-text/trigram indexes and returns the best matches by relevance"
+    ),
+    sort: Literal["product_id", "name", "price"] = Query("product_id", description="Sort key"),
+    order: Literal["asc", "desc"] = Query("asc", description="Sort direction"),
+    limit: Optional[int] = Query(None, ge=1, le=500, description="Page size; omit to return all products"),
+    cursor: Optional[str] = Query(None, description="Cursor from the X-Next-Cursor header of the previous page"),
+    include_total: bool = Query(False, description="Return the total match count in the X-Total-Count header"),
+    ids: Optional[List[int]] = Query(
+        None,
+        max_length=MAX_BATCH_SIZE,
+        description="Get only these product IDs, in the given order (repeat the parameter: ids=1&ids=2)"
+    ),
 ):
     """
-    Get all products or search products if search term is provided
+    Get all products or search products if search term is provided.
+    With `limit`, results are paged and the next page cursor is returned
+    in the X-Next-Cursor response header. Ranked searches are not paged:
+    they return the top `limit` matches (20 by default), ignoring `sort`.
+    With `ids`, only those products are returned and the other filters
+    are ignored; unknown IDs are left out.
     """
+    not_modified = await conditional_get(request, response, ('products', 'inventory'))
+    if not_modified:
+        return not_modified
+
+    if ids:
+        return await product_repo.get_products_by_ids(ids)
+
+    if search and search_mode == "ranked":
+        if include_total:
+            response.headers[TOTAL_COUNT_HEADER] = str(
+                await product_repo.count_products(search, search_mode)
+            )
+        return await product_repo.search_products_ranked(
+            search, limit or product_repo.SEARCH_DEFAULT_LIMIT
+        )
+
+    after = None
+    if cursor:
+        after = decode_cursor(cursor, {sort: product_repo.SORT_KEYS[sort][1], 'product_id': int})
+    descending = order == "desc"
+
     if search:
-        return await product_repo.search_products(search)
-    return await product_repo.get_all_products()
+        products = await product_repo.search_products(search, sort, descending, limit, after)
+    else:
+        products = await product_repo.get_all_products(sort, descending, limit, after)
+
+    products, next_cursor = split_page(products, limit, (sort, 'product_id'))
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    if include_total:
+        response.headers[TOTAL_COUNT_HEADER] = str(await product_repo.count_products(search))
+    return products
 
 @router.get("/{product_id}")
 async def get_product(
@@ -1,6 +1,7 @@
-from fastapi import APIRouter, HTTPException, Query, Path
+from fastapi import APIRouter, HTTPException, Query, Path, Request, Response
 from app.schemas.shipment import ShipmentCreate, ShipmentUpdate, ShipmentResponse, ShipmentDetail, LateShipment
 from app.repositories import shipment_repo
+from app.utils.etag import conditional_get
 from typing import List, Optional
 from datetime import date
 
@@ -8,9 +9,16 @@ router = APIRouter()
 
 @router.get("/", response_model=List[ShipmentResponse])
 async def get_shipments(
+    request: Request,
+    response: Response,
     late_only: bool = Query(False, description="Filter for late shipments only")
 ):
     """Get all shipments or late shipments if late_only is True"""
+    not_modified = await conditional_get(
+        request, response, ('shipments', 'shipmentdetails', 'orders', 'products')
+    )
+    if not_modified:
+        return not_modified
     if late_only:
         return await shipment_repo.get_late_shipments()
     return await shipment_repo.get_all_shipments()
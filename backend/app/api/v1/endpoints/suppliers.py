@@ -1,18 +1,65 @@
-from fastapi import APIRouter, HTTPException, Query, Path
-from app.schemas.supplier import SupplierCreate, SupplierUpdate, SupplierResponse, SupplierPerformance
+from fastapi import APIRouter, HTTPException, Query, Path, Response
+from app.schemas.supplier import SupplierCreate, SupplierUpdate, SupplierResponse, SupplierPerformance, SupplierAutocomplete
 from app.repositories import supplier_repo
-from typing import List, Optional
+from app.utils.pagination import (
+    NEXT_CURSOR_HEADER,
+    TOTAL_COUNT_HEADER,
+    decode_cursor,
+    split_page
+)
+from app.utils.batch_loader import MAX_BATCH_SIZE
+from typing import List, Optional, Literal
 
 router = APIRouter()
 
 @router.get("/", response_model=List[SupplierResponse])
 async def get_suppliers(
-    search: Optional[str] = Query(None, description="Search term for supplier name")
+    response: Response,
+    search: Optional[str] = Query(None, description="Search term for supplier name"),
+    sort: Literal["supplier_id", "name"] = Query("supplier_id", description="Sort key"),
+    order: Literal["asc", "desc"] = Query("asc", description="Sort direction"),
+    limit: Optional[int] = Query(None, ge=1, le=500, description="Page size; omit to return all suppliers"),
+    cursor: Optional[str] = Query(None, description="Cursor from the X-Next-Cursor header of the previous page"),
+    include_total: bool = Query(False, description="Return the total match count in the X-Total-Count header"),
+    ids: Optional[List[int]] = Query(
+        None,
+        max_length=MAX_BATCH_SIZE,
+        description="Get only these supplier IDs, in the given order (repeat the parameter: ids=1&ids=2)"
+    ),
 ):
-    """Get all suppliers or search suppliers if search term is provided"""
+    """
+    Get all suppliers or search suppliers if search term is provided.
+    With `limit`, results are paged and the next page cursor is returned
+    in the X-Next-Cursor response header. With `ids`, only those suppliers
+    are returned and the other filters are ignored; unknown IDs are left out.
+    """
+    if ids:
+        return await supplier_repo.get_suppliers_by_ids(ids)
+
+    after = None
+    if cursor:
+        after = decode_cursor(cursor, {sort: supplier_repo.SORT_KEYS[sort][1], 'supplier_id': int})
+    descending = order == "desc"
+
     if search:
-        return await supplier_repo.search_suppliers(search)
-    return await supplier_repo.get_all_suppliers()
+        suppliers = await supplier_repo.search_suppliers(search, sort, descending, limit, after)
+    else:
+        suppliers = await supplier_repo.get_all_suppliers(sort, descending, limit, after)
+
+    suppliers, next_cursor = split_page(suppliers, limit, (sort, 'supplier_id'))
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    if include_total:
+        response.headers[TOTAL_COUNT_HEADER] = str(await supplier_repo.count_suppliers(search))
+    return suppliers
+
+@router.get("/autocomplete", response_model=List[SupplierAutocomplete])
+async def autocomplete_suppliers(
+    q: str = Query(..., min_length=1, description="Start of a word in the supplier name"),
+    limit: int = Query(10, ge=1, le=50, description="Maximum number of matches")
+):
+    """Suggest suppliers by name prefix from the in-memory index"""
+    return await supplier_repo.autocomplete_suppliers(q, limit)
 
 @router.get("/performance", response_model=List[SupplierPerformance])
 async def get_supplier_performance():
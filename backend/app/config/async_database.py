@@ -0,0 +1,796 @@
+import os
+import re
+import time
+import uuid
+import weakref
+import asyncio
+import threading
+import logging
+import psycopg
+import psycopg2
+import psycopg2.errors
+import psycopg2.extras
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from concurrent.futures import ThreadPoolExecutor
+from psycopg.conninfo import make_conninfo
+from psycopg.rows import dict_row
+from psycopg_pool import AsyncConnectionPool
+from app.config import database as sync_database
+from app.config.database import DB_CONFIG, POOL_CONFIG
+from app.utils import metrics, profiler, slow_queries
+
+logger = logging.getLogger(__name__)
+
+# How repository coroutines reach the database:
+#   native     - psycopg 3 async driver with its own pool (default)
+#   threadpool - psycopg2 helpers offloaded to a bounded thread pool
+#   blocking   - psycopg2 helpers called directly on the event loop
+DB_ASYNC_MODES = ('native', 'threadpool', 'blocking')
+DB_ASYNC_MODE = os.getenv('DB_ASYNC_MODE', 'native').lower()
+if DB_ASYNC_MODE not in DB_ASYNC_MODES:
+    raise ValueError(f"DB_ASYNC_MODE must be one of {DB_ASYNC_MODES}, got {DB_ASYNC_MODE!r}")
+
+# Rows per INSERT statement in execute_values; keeps the parameter count
+# well below PostgreSQL's limit of 65535 per statement
+VALUES_PAGE_SIZE = 1000
+
+# Hot point lookups go through execute_prepared, which prepares them once per
+# connection. Turn off behind a transaction-pooling pgbouncer, where the next
+# statement may run on a server connection that never saw the PREPARE.
+DB_PREPARED_STATEMENTS = os.getenv('DB_PREPARED_STATEMENTS', 'true').lower() in ('1', 'true', 'yes')
+
+_async_pool = None
+_async_pool_lock = None
+_query_executor = None
+_transaction_executor = None
+_query_executor_lock = threading.Lock()
+
+# Transaction opened by the innermost `transaction()` block of the current
+# task; execute_query, execute_batch and execute_values join it when set
+_current_transaction = ContextVar('current_transaction', default=None)
+
+# name -> PreparedStatement, filled by the first execute_prepared call
+_prepared_statements = {}
+_prepared_statements_lock = threading.Lock()
+# connection -> names of the statements prepared on it; entries go away
+# with the connection when the pool discards it
+_prepared_on = weakref.WeakKeyDictionary()
+_PLACEHOLDER = re.compile(r"%s|%%")
+_STATEMENT_NAME = re.compile(r"^[a-z_][a-z0-9_]*$")
+
+
+class QueryExecutor:
+    """
+    Bounded thread pool that runs blocking psycopg2 calls off the event loop.
+
+    The number of worker threads matches the sync connection pool size, so a
+    worker never waits for a connection; excess calls queue up here instead,
+    where queue depth and wait time are measured.
+
+    A transaction keeps its connection across awaits, so its statements run
+    on a second executor of the same size (see get_transaction_executor).
+    Otherwise a full pool and workers blocked checking out a connection
+    would leave no worker for the commit that frees one.
+    """
+
+    def __init__(self, max_workers: int, thread_name_prefix: str = 'db-query'):
+        self.max_workers = max_workers
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers,
+            thread_name_prefix=thread_name_prefix
+        )
+        self._lock = threading.Lock()
+        self._queued = 0
+        self._active = 0
+        self._submitted = 0
+        self._max_queue_depth = 0
+        self._wait_time_total = 0.0
+        self._wait_time_max = 0.0
+
+    async def run(self, func, *args):
+        """
+        Run `func(*args)` in a worker thread and await its result.
+        """
+        submitted_at = time.monotonic()
+        with self._lock:
+            self._queued += 1
+            self._submitted += 1
+            self._max_queue_depth = max(self._max_queue_depth, self._queued)
+
+        def task():
+            waited = time.monotonic() - submitted_at
+            with self._lock:
+                self._queued -= 1
+                self._active += 1
+                self._wait_time_total += waited
+                self._wait_time_max = max(self._wait_time_max, waited)
+            try:
+                return func(*args)
+            finally:
+                with self._lock:
+                    self._active -= 1
+
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, task)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                'max_workers': self.max_workers,
+                'active': self._active,
+                'queue_depth': self._queued,
+                'max_queue_depth': self._max_queue_depth,
+                'submitted': self._submitted,
+                'wait_time_total_ms': round(self._wait_time_total * 1000, 3),
+                'wait_time_avg_ms': round(
+                    self._wait_time_total * 1000 / self._submitted, 3
+                ) if self._submitted else 0.0,
+                'wait_time_max_ms': round(self._wait_time_max * 1000, 3),
+            }
+
+    def shutdown(self):
+        self._executor.shutdown(wait=True)
+
+class PreparedStatement:
+    """
+    A query prepared once per connection and then executed by name, so the
+    server neither parses nor plans it again. Obtained through
+    `execute_prepared()`; do not create directly.
+
+    In native mode psycopg 3 prepares it at the protocol level; the psycopg2
+    modes send PREPARE / EXECUTE with $n parameters.
+    """
+
+    def __init__(self, name: str, query: str):
+        if not _STATEMENT_NAME.match(name):
+            raise ValueError(f"Invalid prepared statement name {name!r}")
+        self.name = name
+        self.query = query
+        body = query.strip().rstrip(';')
+        count = 0
+
+        def placeholder(match):
+            nonlocal count
+            if match.group() == '%%':
+                return '%'
+            count += 1
+            return f"${count}"
+
+        self.prepare_sql = f"PREPARE {name} AS {_PLACEHOLDER.sub(placeholder, body)}"
+        self.execute_sql = f"EXECUTE {name}" + (f" ({', '.join(['%s'] * count)})" if count else "")
+        self._lock = threading.Lock()
+        self._executions = 0
+        self._prepares = 0
+
+    def needs_prepare(self, conn) -> bool:
+        """
+        Count an execution on `conn` and tell whether it must prepare first.
+        """
+        with self._lock:
+            self._executions += 1
+            names = _prepared_on.get(conn)
+            if names is not None and self.name in names:
+                return False
+            self._prepares += 1
+            return True
+
+    def prepared(self, conn):
+        with self._lock:
+            _prepared_on.setdefault(conn, set()).add(self.name)
+
+    def forget(self, conn):
+        with self._lock:
+            _prepared_on.get(conn, set()).discard(self.name)
+
+    def stats(self) -> dict:
+        with self._lock:
+            hits = self._executions - self._prepares
+            return {
+                'executions': self._executions,
+                'prepares': self._prepares,
+                'hits': hits,
+                'hit_rate': round(hits / self._executions, 4) if self._executions else 0.0,
+                'connections': sum(1 for names in _prepared_on.values() if self.name in names),
+            }
+
+def _get_prepared_statement(name: str, query: str) -> PreparedStatement:
+    statement = _prepared_statements.get(name)
+    if statement is None:
+        with _prepared_statements_lock:
+            statement = _prepared_statements.get(name)
+            if statement is None:
+                statement = _prepared_statements[name] = PreparedStatement(name, query)
+    if statement.query != query:
+        raise ValueError(f"Prepared statement {name!r} is already registered with another query")
+    return statement
+
+def get_prepared_statement_stats() -> dict:
+    """
+    Executions, prepares and plan reuse per prepared statement. A hit is an
+    execution on a connection that had already prepared the statement.
+    """
+    with _prepared_statements_lock:
+        statements = dict(_prepared_statements)
+    per_statement = {name: statement.stats() for name, statement in sorted(statements.items())}
+    executions = sum(item['executions'] for item in per_statement.values())
+    hits = sum(item['hits'] for item in per_statement.values())
+    return {
+        'enabled': DB_PREPARED_STATEMENTS,
+        'executions': executions,
+        'hits': hits,
+        'hit_rate': round(hits / executions, 4) if executions else 0.0,
+        'statements': per_statement,
+    }
+
+def get_query_executor() -> QueryExecutor:
+    """
+    Return the process-wide query executor, creating it on first use.
+    """
+    global _query_executor
+    if _query_executor is None:
+        with _query_executor_lock:
+            if _query_executor is None:
+                _query_executor = QueryExecutor(POOL_CONFIG['max_size'])
+    return _query_executor
+
+def get_transaction_executor() -> QueryExecutor:
+    """
+    Return the process-wide executor for statements on a connection that is
+    already checked out, creating it on first use. At most max_size
+    connections are checked out at a time, so its workers never queue
+    behind callers waiting for the pool.
+    """
+    global _transaction_executor
+    if _transaction_executor is None:
+        with _query_executor_lock:
+            if _transaction_executor is None:
+                _transaction_executor = QueryExecutor(POOL_CONFIG['max_size'], 'db-transaction')
+    return _transaction_executor
+
+def shutdown_query_executor():
+    """
+    Stop the query and transaction executors, if they were created.
+    """
+    global _query_executor, _transaction_executor
+    with _query_executor_lock:
+        if _query_executor is not None:
+            _query_executor.shutdown()
+            _query_executor = None
+        if _transaction_executor is not None:
+            _transaction_executor.shutdown()
+            _transaction_executor = None
+
+def get_query_executor_stats() -> dict:
+    """
+    Return query executor statistics, or None if the executor is not created.
+    """
+    return _query_executor.stats() if _query_executor is not None else None
+
+def get_transaction_executor_stats() -> dict:
+    """
+    Return transaction executor statistics, or None if it is not created.
+    """
+    return _transaction_executor.stats() if _transaction_executor is not None else None
+
+def _get_conninfo() -> str:
+    return make_conninfo(**{k: v for k, v in DB_CONFIG.items() if v is not None})
+
+async def get_async_pool() -> AsyncConnectionPool:
+    """
+    Return the process-wide async connection pool, opening it on first use.
+    Rows are returned as plain dictionaries, matching RealDictCursor.
+    """
+    global _async_pool, _async_pool_lock
+    if _async_pool is not None:
+        return _async_pool
+    if _async_pool_lock is None:
+        _async_pool_lock = asyncio.Lock()
+    async with _async_pool_lock:
+        if _async_pool is None:
+            pool = AsyncConnectionPool(
+                _get_conninfo(),
+                min_size=POOL_CONFIG['min_size'],
+                max_size=POOL_CONFIG['max_size'],
+                timeout=POOL_CONFIG['timeout'],
+                max_lifetime=POOL_CONFIG['max_lifetime'],
+                check=AsyncConnectionPool.check_connection if POOL_CONFIG['health_check'] else None,
+                kwargs={'row_factory': dict_row},
+                open=False,
+            )
+            await pool.open()
+            _async_pool = pool
+            logger.info(
+                f"Async database pool opened (min={POOL_CONFIG['min_size']}, "
+                f"max={POOL_CONFIG['max_size']})"
+            )
+    return _async_pool
+
+async def close_async_pool():
+    """
+    Close the process-wide async connection pool, if it was opened.
+    """
+    global _async_pool
+    if _async_pool is not None:
+        await _async_pool.close()
+        _async_pool = None
+        logger.info("Async database pool closed")
+
+def get_async_pool_stats() -> dict:
+    """
+    Return async connection pool statistics, or None if the pool is not open.
+    """
+    if _async_pool is None:
+        return None
+    stats = _async_pool.get_stats()
+    stats['in_use'] = stats.get('pool_size', 0) - stats.get('pool_available', 0)
+    return stats
+
+async def execute_query(query: str, params: tuple = None):
+    """
+    Execute a query without blocking the event loop and return all results.
+    The driver path is selected by DB_ASYNC_MODE. Latency, row and error
+    counts are recorded under the calling repository function.
+
+    Args:
+        query (str): SQL query to execute
+        params (tuple, optional): Parameters for the query
+
+    Returns:
+        list: Query results as a list of dictionaries
+    """
+    caller = metrics.caller_label()
+    started = time.perf_counter()
+    try:
+        result = await _execute_query(query, params)
+    except Exception:
+        metrics.observe_query(caller, 'query', time.perf_counter() - started, failed=True)
+        raise
+    elapsed = time.perf_counter() - started
+    metrics.observe_query(caller, 'query', elapsed, result)
+    slow_queries.observe(caller, 'query', query, params, elapsed)
+    profiler.observe_db(elapsed)
+    return result
+
+async def _execute_query(query: str, params: tuple = None):
+    tx = _current_transaction.get()
+    if tx is not None:
+        return await tx.execute(query, params)
+    if DB_ASYNC_MODE == 'threadpool':
+        return await get_query_executor().run(sync_database.execute_query, query, params)
+    if DB_ASYNC_MODE == 'blocking':
+        return sync_database.execute_query(query, params)
+
+    pool = await get_async_pool()
+    try:
+        async with pool.connection() as conn:
+            async with conn.cursor() as cur:
+                await cur.execute(query, params)
+                if cur.description:  # If the query returns data
+                    return await cur.fetchall()
+                return None
+    except psycopg.Error as e:
+        logger.error(f"Query execution error: {e}")
+        logger.error(f"Query: {query}")
+        logger.error(f"Parameters: {params}")
+        raise
+
+async def execute_batch(query: str, params_list: list):
+    """
+    Execute a batch operation with multiple sets of parameters.
+
+    Args:
+        query (str): SQL query to execute
+        params_list (list): List of parameter tuples
+    """
+    caller = metrics.caller_label()
+    started = time.perf_counter()
+    try:
+        result = await _execute_batch(query, params_list)
+    except Exception:
+        metrics.observe_query(caller, 'batch', time.perf_counter() - started, failed=True)
+        raise
+    elapsed = time.perf_counter() - started
+    metrics.observe_query(caller, 'batch', elapsed)
+    slow_queries.observe(caller, 'batch', query, params_list, elapsed)
+    profiler.observe_db(elapsed)
+    return result
+
+async def _execute_batch(query: str, params_list: list):
+    tx = _current_transaction.get()
+    if tx is not None:
+        return await tx.execute_batch(query, params_list)
+    if DB_ASYNC_MODE == 'threadpool':
+        return await get_query_executor().run(sync_database.execute_batch, query, params_list)
+    if DB_ASYNC_MODE == 'blocking':
+        return sync_database.execute_batch(query, params_list)
+
+    pool = await get_async_pool()
+    try:
+        async with pool.connection() as conn:
+            async with conn.cursor() as cur:
+                await cur.executemany(query, params_list)
+    except psycopg.Error as e:
+        logger.error(f"Batch execution error: {e}")
+        logger.error(f"Query: {query}")
+        logger.error(f"Parameters: {params_list}")
+        raise
+
+async def stream_query(query: str, params: tuple = None, chunk_size: int = 1000):
+    """
+    Execute a query through a named (server-side) cursor and yield the
+    results in chunks, so large result sets are never held in memory.
+
+    Args:
+        query (str): SQL query to execute
+        params (tuple, optional): Parameters for the query
+        chunk_size (int): Number of rows fetched per round trip
+
+    Yields:
+        list: Up to chunk_size rows as dictionaries
+    """
+    if DB_ASYNC_MODE != 'native':
+        chunks = sync_database.stream_query(query, params, chunk_size)
+        # The first fetch checks a connection out, later ones run on it
+        run = _run_sync
+        pending = None
+        try:
+            while True:
+                pending = asyncio.ensure_future(run(next, chunks, None))
+                # Shielded: a cancelled stream must let the fetch running in
+                # a worker finish, closing a running generator fails
+                rows = await asyncio.shield(pending)
+                pending = None
+                run = _run_on_connection
+                if rows is None:
+                    break
+                yield rows
+        finally:
+            if pending is not None:
+                await asyncio.gather(pending, return_exceptions=True)
+            # Closes the cursor and returns the connection, off the loop
+            await _run_on_connection(chunks.close)
+        return
+
+    pool = await get_async_pool()
+    try:
+        async with pool.connection() as conn:
+            async with conn.cursor(name=f"stream_{uuid.uuid4().hex}") as cur:
+                cur.itersize = chunk_size
+                await cur.execute(query, params)
+                while True:
+                    rows = await cur.fetchmany(chunk_size)
+                    if not rows:
+                        break
+                    yield rows
+    except psycopg.Error as e:
+        logger.error(f"Streaming query error: {e}")
+        logger.error(f"Query: {query}")
+        logger.error(f"Parameters: {params}")
+        raise
+
+def _expand_values(query: str, rows: list, template: str = None):
+    """
+    Replace the single %s placeholder of `query` with one `template` per
+    row and flatten the row values into the parameter list.
+    """
+    head, placeholder, tail = query.partition('%s')
+    if not placeholder or '%s' in tail:
+        raise ValueError("execute_values query must contain exactly one %s placeholder")
+    if template is None:
+        template = "(" + ", ".join(["%s"] * len(rows[0])) + ")"
+    values = ", ".join([template] * len(rows))
+    params = [value for row in rows for value in row]
+    return head + values + tail, params
+
+async def _run_sync(func, *args):
+    if DB_ASYNC_MODE == 'threadpool':
+        return await get_query_executor().run(func, *args)
+    return func(*args)
+
+async def _run_on_connection(func, *args):
+    """
+    Like _run_sync, for calls on a connection the caller already holds.
+    """
+    if DB_ASYNC_MODE == 'threadpool':
+        return await get_transaction_executor().run(func, *args)
+    return func(*args)
+
+def _sync_execute(conn, query: str, params):
+    with conn.cursor() as cur:
+        cur.execute(query, params)
+        if cur.description:
+            return cur.fetchall()
+        return None
+
+def _sync_execute_batch(conn, query: str, params_list: list):
+    with conn.cursor() as cur:
+        psycopg2.extras.execute_batch(cur, query, params_list)
+
+def _sync_execute_prepared(conn, statement: PreparedStatement, params):
+    with conn.cursor() as cur:
+        if statement.needs_prepare(conn):
+            cur.execute(statement.prepare_sql)
+            # PREPARE is not transactional, the statement stays on the
+            # connection even if the surrounding transaction rolls back
+            statement.prepared(conn)
+        try:
+            cur.execute(statement.execute_sql, params)
+        except psycopg2.errors.InvalidSqlStatementName:
+            # Deallocated behind our back (DISCARD ALL); prepare it next time
+            statement.forget(conn)
+            raise
+        if cur.description:
+            return cur.fetchall()
+        return None
+
+def _sync_execute_prepared_pooled(statement: PreparedStatement, params):
+    with sync_database.get_db_connection() as conn:
+        try:
+            result = _sync_execute_prepared(conn, statement, params)
+            conn.commit()
+            return result
+        except psycopg2.Error:
+            conn.rollback()
+            raise
+
+async def _native_execute_prepared(conn, statement: PreparedStatement, params):
+    prepare = statement.needs_prepare(conn)
+    async with conn.cursor() as cur:
+        try:
+            await cur.execute(statement.query, params, prepare=True)
+        except psycopg.Error:
+            if prepare:
+                statement.forget(conn)
+            raise
+        statement.prepared(conn)
+        if cur.description:
+            return await cur.fetchall()
+        return None
+
+
+class Transaction:
+    """
+    Several statements run on one connection and committed together.
+    Obtained from `transaction()`; do not create directly.
+    """
+
+    def __init__(self, conn):
+        # psycopg AsyncConnection in native mode, pooled psycopg2 connection otherwise
+        self._conn = conn
+
+    async def execute(self, query: str, params: tuple = None):
+        """
+        Execute a query inside the transaction and return all results.
+        """
+        try:
+            if DB_ASYNC_MODE != 'native':
+                return await _run_on_connection(_sync_execute, self._conn, query, params)
+            async with self._conn.cursor() as cur:
+                await cur.execute(query, params)
+                if cur.description:
+                    return await cur.fetchall()
+                return None
+        except (psycopg.Error, psycopg2.Error) as e:
+            logger.error(f"Transaction query error: {e}")
+            logger.error(f"Query: {query}")
+            logger.error(f"Parameters: {params}")
+            raise
+
+    async def execute_batch(self, query: str, params_list: list):
+        """
+        Execute a statement once per parameter tuple inside the transaction.
+        """
+        try:
+            if DB_ASYNC_MODE != 'native':
+                return await _run_on_connection(_sync_execute_batch, self._conn, query, params_list)
+            async with self._conn.cursor() as cur:
+                await cur.executemany(query, params_list)
+        except (psycopg.Error, psycopg2.Error) as e:
+            logger.error(f"Transaction batch error: {e}")
+            logger.error(f"Query: {query}")
+            logger.error(f"Parameters: {params_list}")
+            raise
+
+    async def execute_prepared(self, statement: PreparedStatement, params: tuple = None):
+        """
+        Execute a prepared statement inside the transaction.
+        """
+        try:
+            if DB_ASYNC_MODE != 'native':
+                return await _run_on_connection(_sync_execute_prepared, self._conn, statement, params)
+            return await _native_execute_prepared(self._conn, statement, params)
+        except (psycopg.Error, psycopg2.Error) as e:
+            logger.error(f"Transaction prepared statement error: {e}")
+            logger.error(f"Statement: {statement.name}")
+            logger.error(f"Parameters: {params}")
+            raise
+
+    async def execute_values(self, query: str, rows: list, template: str = None,
+                             page_size: int = VALUES_PAGE_SIZE):
+        """
+        Execute a multi-row statement such as `INSERT ... VALUES %s`, in the
+        style of psycopg2.extras.execute_values. The single %s is replaced by
+        one `template` (default `(%s, ..., %s)`) per row, `page_size` rows
+        per statement.
+
+        Args:
+            query (str): SQL with exactly one %s placeholder
+            rows (list): Sequence of row tuples
+            template (str, optional): Positional template for one row
+
+        Returns:
+            list: Rows returned by a RETURNING clause, in input order, or None
+        """
+        rows = list(rows)
+        results = None
+        for start in range(0, len(rows), page_size):
+            page_query, params = _expand_values(query, rows[start:start + page_size], template)
+            page_result = await self.execute(page_query, params)
+            if page_result is not None:
+                results = (results or []) + list(page_result)
+        return results
+
+def in_transaction() -> bool:
+    """
+    Whether the current task runs inside a `transaction()` block.
+    """
+    return _current_transaction.get() is not None
+
+@asynccontextmanager
+async def transaction():
+    """
+    Run several statements as one transaction with a single commit.
+    Everything is rolled back if the block raises.
+
+    The transaction is ambient: execute_query, execute_batch and
+    execute_values called anywhere inside the block (including from other
+    repositories) run on it. A nested `transaction()` joins the outer one.
+
+    Usage:
+        async with transaction():
+            rows = await execute_query("INSERT ... RETURNING ...", params)
+            await execute_values("INSERT ... VALUES %s", detail_rows)
+    """
+    current = _current_transaction.get()
+    if current is not None:
+        yield current
+        return
+
+    if DB_ASYNC_MODE == 'native':
+        pool = await get_async_pool()
+        async with pool.connection() as conn:
+            async with conn.transaction():
+                tx = Transaction(conn)
+                token = _current_transaction.set(tx)
+                try:
+                    yield tx
+                finally:
+                    _current_transaction.reset(token)
+        return
+
+    pool = sync_database.get_pool()
+    conn = await _run_sync(pool.getconn)
+    tx = Transaction(conn)
+    token = _current_transaction.set(tx)
+    try:
+        yield tx
+        await _run_on_connection(conn.commit)
+    except BaseException:
+        await _run_on_connection(conn.rollback)
+        raise
+    finally:
+        _current_transaction.reset(token)
+        await _run_on_connection(pool.putconn, conn)
+
+async def execute_values(query: str, rows: list, template: str = None,
+                         page_size: int = VALUES_PAGE_SIZE):
+    """
+    Execute a multi-row statement (see Transaction.execute_values) in the
+    current transaction, or in its own one.
+    """
+    caller = metrics.caller_label()
+    started = time.perf_counter()
+    try:
+        async with transaction() as tx:
+            result = await tx.execute_values(query, rows, template, page_size)
+    except Exception:
+        metrics.observe_query(caller, 'values', time.perf_counter() - started, failed=True)
+        raise
+    elapsed = time.perf_counter() - started
+    metrics.observe_query(caller, 'values', elapsed, result)
+    slow_queries.observe(caller, 'values', query, rows, elapsed)
+    profiler.observe_db(elapsed)
+    return result
+
+async def execute_prepared(name: str, query: str, params: tuple = None):
+    """
+    Execute a hot query as a prepared statement: it is parsed and planned
+    once per pooled connection and afterwards executed by name. Behaves
+    like execute_query otherwise, including joining the current transaction.
+
+    Args:
+        name (str): Statement name, unique per query text
+        query (str): SQL query with %s placeholders
+        params (tuple, optional): Parameters for the query
+
+    Returns:
+        list: Query results as a list of dictionaries
+    """
+    caller = metrics.caller_label()
+    started = time.perf_counter()
+    try:
+        if DB_PREPARED_STATEMENTS:
+            result = await _execute_prepared(_get_prepared_statement(name, query), params)
+        else:
+            result = await _execute_query(query, params)
+    except Exception:
+        metrics.observe_query(caller, 'prepared', time.perf_counter() - started, failed=True)
+        raise
+    elapsed = time.perf_counter() - started
+    metrics.observe_query(caller, 'prepared', elapsed, result)
+    slow_queries.observe(caller, 'prepared', query, params, elapsed)
+    profiler.observe_db(elapsed)
+    return result
+
+async def _execute_prepared(statement: PreparedStatement, params: tuple = None):
+    tx = _current_transaction.get()
+    if tx is not None:
+        return await tx.execute_prepared(statement, params)
+    if DB_ASYNC_MODE == 'threadpool':
+        return await get_query_executor().run(_sync_execute_prepared_pooled, statement, params)
+    if DB_ASYNC_MODE == 'blocking':
+        return _sync_execute_prepared_pooled(statement, params)
+
+    pool = await get_async_pool()
+    try:
+        async with pool.connection() as conn:
+            return await _native_execute_prepared(conn, statement, params)
+    except psycopg.Error as e:
+        logger.error(f"Prepared statement error: {e}")
+        logger.error(f"Statement: {statement.name}")
+        logger.error(f"Parameters: {params}")
+        raise
+
+def _sync_explain(statement: str, params, timeout_ms: int):
+    pool = sync_database.get_pool()
+    conn = pool.getconn()
+    try:
+        with conn.cursor() as cur:
+            cur.execute("SET TRANSACTION READ ONLY;")
+            cur.execute(f"SET LOCAL statement_timeout = {int(timeout_ms)};")
+            cur.execute(statement, params)
+            return cur.fetchall()
+    finally:
+        conn.rollback()
+        pool.putconn(conn)
+
+async def explain_analyze(query: str, params: tuple = None, timeout_ms: int = 30000) -> str:
+    """
+    Run a query again under EXPLAIN (ANALYZE, BUFFERS) and return the plan.
+
+    The query runs on its own connection, outside any ambient transaction,
+    in a READ ONLY transaction that is always rolled back, so a statement
+    that would write fails instead of being applied twice.
+
+    Args:
+        query (str): SQL query to explain
+        params (tuple, optional): Parameters for the query
+        timeout_ms (int): statement_timeout for the explained run
+
+    Returns:
+        str: The plan as text
+    """
+    statement = f"EXPLAIN (ANALYZE, BUFFERS) {query}"
+    if DB_ASYNC_MODE != 'native':
+        rows = await _run_sync(_sync_explain, statement, params, timeout_ms)
+    else:
+        pool = await get_async_pool()
+        async with pool.connection() as conn:
+            async with conn.transaction(force_rollback=True):
+                async with conn.cursor() as cur:
+                    await cur.execute("SET TRANSACTION READ ONLY;")
+                    await cur.execute(f"SET LOCAL statement_timeout = {int(timeout_ms)};")
+                    await cur.execute(statement, params)
+                    rows = await cur.fetchall()
+    return "\n".join(row['QUERY PLAN'] for row in rows)
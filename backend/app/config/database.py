@@ -1,8 +1,14 @@
 import os
+import time
+import uuid
+import threading
 import psycopg2
+import psycopg2.extras
 from psycopg2.extras import RealDictCursor
+from psycopg2.extensions import TRANSACTION_STATUS_IDLE
 from dotenv import load_dotenv
 from contextlib import contextmanager
+from collections import deque
 import logging
 
 # Load environment variables from .env file
@@ -17,31 +23,271 @@ DB_CONFIG = {
     'port': os.getenv('DB_PORT', '5432')
 }
 
+# Connection pool configuration (per process, i.e. per uvicorn worker)
+POOL_CONFIG = {
+    'min_size': int(os.getenv('DB_POOL_MIN_SIZE', '1')),
+    'max_size': int(os.getenv('DB_POOL_MAX_SIZE', '10')),
+    'timeout': float(os.getenv('DB_POOL_TIMEOUT', '30')),
+    'max_lifetime': float(os.getenv('DB_POOL_MAX_LIFETIME', '3600')),
+    'health_check': os.getenv('DB_POOL_HEALTH_CHECK', 'true').lower() in ('1', 'true', 'yes'),
+}
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+class PoolTimeoutError(psycopg2.OperationalError):
+    """Raised when no pooled connection becomes available within the timeout."""
+
+
+class ConnectionPool:
+    """
+    Thread-safe pool of psycopg2 connections.
+
+    Connections are opened lazily up to max_size, recycled after max_lifetime
+    seconds and optionally validated with a cheap query when checked out.
+    Callers block for at most `timeout` seconds waiting for a free connection.
+    """
+
+    def __init__(self, dsn_kwargs: dict, min_size: int = 1, max_size: int = 10,
+                 timeout: float = 30.0, max_lifetime: float = 3600.0,
+                 health_check: bool = True):
+        if min_size < 0 or max_size < 1 or min_size > max_size:
+            raise ValueError("Invalid pool size configuration")
+        self.dsn_kwargs = dsn_kwargs
+        self.min_size = min_size
+        self.max_size = max_size
+        self.timeout = timeout
+        self.max_lifetime = max_lifetime
+        self.health_check = health_check
+
+        self._lock = threading.Condition()
+        self._idle = deque()          # (connection, created_at)
+        self._created_at = {}         # id(connection) -> created_at
+        self._in_use = 0
+        self._pending = 0             # slots reserved for connections being opened
+        self._closed = False
+
+        # Statistics
+        self._requests = 0
+        self._waits = 0
+        self._timeouts = 0
+        self._wait_time_total = 0.0
+        self._wait_time_max = 0.0
+        self._connections_opened = 0
+        self._connections_discarded = 0
+
+        for _ in range(min_size):
+            conn = self._open()
+            self._idle.append((conn, self._created_at[id(conn)]))
+
+    @property
+    def size(self) -> int:
+        return len(self._created_at) + self._pending
+
+    def _open(self):
+        conn = psycopg2.connect(**self.dsn_kwargs, cursor_factory=RealDictCursor)
+        with self._lock:
+            self._created_at[id(conn)] = time.monotonic()
+            self._connections_opened += 1
+        logger.debug("Opened new pooled database connection")
+        return conn
+
+    def _discard(self, conn):
+        self._created_at.pop(id(conn), None)
+        self._connections_discarded += 1
+        try:
+            conn.close()
+        except psycopg2.Error:
+            pass
+
+    def _is_expired(self, created_at: float) -> bool:
+        return self.max_lifetime > 0 and time.monotonic() - created_at > self.max_lifetime
+
+    def _is_healthy(self, conn) -> bool:
+        if conn.closed:
+            return False
+        if not self.health_check:
+            return True
+        try:
+            with conn.cursor() as cur:
+                cur.execute('SELECT 1')
+            conn.rollback()
+            return True
+        except psycopg2.Error:
+            return False
+
+    def getconn(self, timeout: float = None):
+        """
+        Check a connection out of the pool, waiting up to `timeout` seconds.
+        """
+        timeout = self.timeout if timeout is None else timeout
+        deadline = time.monotonic() + timeout
+        started = time.monotonic()
+        waited = False
+
+        with self._lock:
+            if self._closed:
+                raise psycopg2.InterfaceError("Connection pool is closed")
+            self._requests += 1
+            while True:
+                if self._idle:
+                    conn, created_at = self._idle.pop()
+                    self._in_use += 1
+                    break
+                if self.size < self.max_size:
+                    # Reserve the slot before connecting outside the lock
+                    self._in_use += 1
+                    self._pending += 1
+                    conn, created_at = None, None
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._timeouts += 1
+                    self._record_wait(time.monotonic() - started, waited)
+                    raise PoolTimeoutError(
+                        f"Timed out after {timeout}s waiting for a database connection"
+                    )
+                waited = True
+                self._lock.wait(remaining)
+            self._record_wait(time.monotonic() - started, waited)
+
+        if conn is not None and (self._is_expired(created_at) or not self._is_healthy(conn)):
+            with self._lock:
+                self._discard(conn)
+                self._pending += 1
+            conn = None
+        if conn is not None:
+            return conn
+
+        try:
+            conn = self._open()
+        except Exception:
+            with self._lock:
+                self._pending -= 1
+                self._in_use -= 1
+                self._lock.notify()
+            raise
+        with self._lock:
+            self._pending -= 1
+        return conn
+
+    def putconn(self, conn):
+        """
+        Return a connection to the pool, rolling back any open transaction.
+        Broken or expired connections are closed instead of being reused.
+        """
+        keep = not conn.closed
+        if keep and conn.info.transaction_status != TRANSACTION_STATUS_IDLE:
+            try:
+                conn.rollback()
+            except psycopg2.Error:
+                keep = False
+
+        with self._lock:
+            self._in_use -= 1
+            created_at = self._created_at.get(id(conn))
+            if self._closed or not keep or created_at is None or self._is_expired(created_at):
+                self._discard(conn)
+            else:
+                self._idle.append((conn, created_at))
+            self._lock.notify()
+
+    def _record_wait(self, elapsed: float, waited: bool):
+        if waited:
+            self._waits += 1
+        self._wait_time_total += elapsed
+        self._wait_time_max = max(self._wait_time_max, elapsed)
+
+    def stats(self) -> dict:
+        """
+        Snapshot of pool usage, useful for sizing the pool per worker.
+        """
+        with self._lock:
+            return {
+                'min_size': self.min_size,
+                'max_size': self.max_size,
+                'size': self.size,
+                'in_use': self._in_use,
+                'idle': len(self._idle),
+                'requests': self._requests,
+                'waits': self._waits,
+                'timeouts': self._timeouts,
+                'wait_time_total_ms': round(self._wait_time_total * 1000, 3),
+                'wait_time_avg_ms': round(
+                    self._wait_time_total * 1000 / self._requests, 3
+                ) if self._requests else 0.0,
+                'wait_time_max_ms': round(self._wait_time_max * 1000, 3),
+                'connections_opened': self._connections_opened,
+                'connections_discarded': self._connections_discarded,
+            }
+
+    def close(self):
+        """
+        Close all idle connections; connections in use are closed on return.
+        """
+        with self._lock:
+            self._closed = True
+            while self._idle:
+                conn, _ = self._idle.pop()
+                self._discard(conn)
+            self._lock.notify_all()
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+def get_pool() -> ConnectionPool:
+    """
+    Return the process-wide connection pool, creating it on first use.
+    """
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ConnectionPool(DB_CONFIG, **POOL_CONFIG)
+                logger.info(
+                    f"Database pool created (min={POOL_CONFIG['min_size']}, "
+                    f"max={POOL_CONFIG['max_size']})"
+                )
+    return _pool
+
+def close_pool():
+    """
+    Close the process-wide connection pool, if it was created.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.close()
+            _pool = None
+            logger.info("Database pool closed")
+
+def get_pool_stats() -> dict:
+    """
+    Return connection pool statistics, or None if the pool is not created yet.
+    """
+    return _pool.stats() if _pool is not None else None
+
 @contextmanager
 def get_db_connection():
     """
     Context manager for database connections.
-    Ensures that connections are properly closed after use.
+    Borrows a connection from the pool and returns it after use.
     Returns a connection with RealDictCursor for dictionary-like results.
     """
+    pool = get_pool()
     conn = None
     try:
-        conn = psycopg2.connect(
-            **DB_CONFIG,
-            cursor_factory=RealDictCursor
-        )
+        conn = pool.getconn()
         yield conn
     except psycopg2.Error as e:
         logger.error(f"Database connection error: {e}")
         raise
     finally:
         if conn is not None:
-            conn.close()
-            logger.debug("Database connection closed")
+            pool.putconn(conn)
+            logger.debug("Database connection returned to pool")
 
 @contextmanager
 def get_db_cursor():
@@ -101,6 +347,39 @@ def execute_batch(query: str, params_list: list):
         logger.error(f"Parameters: {params_list}")
         raise
 
+def stream_query(query: str, params: tuple = None, chunk_size: int = 1000):
+    """
+    Execute a query through a named (server-side) cursor and yield the
+    results in chunks, so large result sets are never held in memory.
+    
+    Args:
+        query (str): SQL query to execute
+        params (tuple, optional): Parameters for the query
+        chunk_size (int): Number of rows fetched per round trip
+    
+    Yields:
+        list: Up to chunk_size rows as dictionaries
+    """
+    try:
+        with get_db_connection() as conn:
+            cur = conn.cursor(name=f"stream_{uuid.uuid4().hex}")
+            cur.itersize = chunk_size
+            try:
+                cur.execute(query, params)
+                while True:
+                    rows = cur.fetchmany(chunk_size)
+                    if not rows:
+                        break
+                    yield rows
+                conn.commit()
+            finally:
+                cur.close()
+    except psycopg2.Error as e:
+        logger.error(f"Streaming query error: {e}")
+        logger.error(f"Query: {query}")
+        logger.error(f"Parameters: {params}")
+        raise
+
 def test_connection():
     """
     Test the database connection and return version info.
@@ -122,6 +401,22 @@ DB_USER=your_username
 DB_PASSWORD=your_password
 DB_HOST=localhost
 DB_PORT=5432
+DB_POOL_MIN_SIZE=1
+DB_POOL_MAX_SIZE=10
+DB_POOL_TIMEOUT=30
+DB_POOL_MAX_LIFETIME=3600
+DB_POOL_HEALTH_CHECK=true
+DB_ASYNC_MODE=native  # native | threadpool | blocking
+DB_PREPARED_STATEMENTS=true  # false behind a transaction-pooling pgbouncer
+DASHBOARD_CACHE_TTL=60  # seconds, 0 disables the dashboard cache
+AUTOCOMPLETE_MAX_AGE=300  # seconds before name indexes reload, 0 = never
+METRICS_ENABLED=true  # query and HTTP latency metrics at /metrics
+SLOW_QUERY_THRESHOLD_MS=500  # 0 disables the slow-query log
+SLOW_QUERY_LOG_FILE=logs/slow_queries.log
+SLOW_QUERY_REDACT=true  # log string parameters by length only
+SLOW_QUERY_EXPLAIN=false  # re-run slow reads under EXPLAIN (ANALYZE, BUFFERS)
+PROFILER_TOKEN=  # secret for X-Profile / ?profile= and Bearer auth of /metrics and /debug/*, unset disables them
+PROFILER_INTERVAL_MS=1  # sampling interval of the request profiler
 """
 
 if __name__ == "__main__":
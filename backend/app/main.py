@@ -1,10 +1,27 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import Depends, FastAPI, Header, HTTPException, Query
 from fastapi.middleware.cors import CORSMiddleware
 from app.api.v1.router import router as api_router
-from app.config.database import test_connection
+from app.utils.pagination import NEXT_CURSOR_HEADER, TOTAL_COUNT_HEADER
+from app.utils.etag import ETAG_HEADER
+from app.utils import metrics, profiler, slow_queries
+from app.utils.profiler import PROFILE_STATUS_HEADER, PROFILE_SUMMARY_HEADER, ProfilerMiddleware
+from app.utils.request_context import RequestContextMiddleware
+from app.repositories import customer_repo, supplier_repo
+from app.config.database import test_connection, close_pool, get_pool_stats
+from app.config.async_database import (
+    DB_ASYNC_MODE,
+    get_async_pool,
+    close_async_pool,
+    get_async_pool_stats,
+    shutdown_query_executor,
+    get_query_executor_stats,
+    get_transaction_executor_stats,
+    get_prepared_statement_stats,
+)
+from typing import Optional
 import uvicorn
 import logging
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, PlainTextResponse
 
 
 # Configure logging
@@ -28,13 +45,21 @@ origins = [
     # Add other origins as needed
 ]
 
+# Innermost, so the replaced response still gets the CORS headers
+app.add_middleware(ProfilerMiddleware)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=origins,
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[
+        NEXT_CURSOR_HEADER, TOTAL_COUNT_HEADER, ETAG_HEADER,
+        PROFILE_SUMMARY_HEADER, PROFILE_STATUS_HEADER,
+    ],
 )
+app.add_middleware(metrics.MetricsMiddleware)
+app.add_middleware(RequestContextMiddleware)
 
 # Include routers
 app.include_router(api_router, prefix="/api/v1")
@@ -51,6 +76,21 @@ async def startup_event():
             status_code=500,
             detail="Could not establish database connection"
         )
+    if DB_ASYNC_MODE == "native":
+        await get_async_pool()
+    await customer_repo.load_name_index()
+    await supplier_repo.load_name_index()
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """
+    Runs when the application stops.
+    Closes pooled database connections.
+    """
+    logger.info("Shutting down the application...")
+    await close_async_pool()
+    shutdown_query_executor()
+    close_pool()
 
 @app.get("/", tags=["Root"])
 async def root():
@@ -70,7 +110,49 @@ async def health_check():
     """
     return {
         "status": "healthy",
-        "database": test_connection()
+        "database": test_connection(),
+        "pool": get_pool_stats(),
+        "db_async_mode": DB_ASYNC_MODE,
+        "async_pool": get_async_pool_stats(),
+        "query_executor": get_query_executor_stats(),
+        "transaction_executor": get_transaction_executor_stats(),
+        "prepared_statements": get_prepared_statement_stats()
+    }
+
+def require_admin_token(authorization: Optional[str] = Header(None)):
+    """
+    Allow only requests with `Authorization: Bearer <PROFILER_TOKEN>`;
+    while PROFILER_TOKEN is unset every request is refused.
+    """
+    scheme, _, token = (authorization or "").partition(" ")
+    if scheme.lower() != "bearer" or not profiler.token_matches(token.strip()):
+        raise HTTPException(status_code=403, detail="Not authorized")
+
+@app.get(
+    "/metrics",
+    tags=["Health Check"],
+    include_in_schema=False,
+    dependencies=[Depends(require_admin_token)]
+)
+async def get_metrics():
+    """
+    Query and HTTP latency metrics in the Prometheus text format
+    """
+    return PlainTextResponse(metrics.render(), media_type=metrics.PROMETHEUS_CONTENT_TYPE)
+
+@app.get("/debug/slow-queries", tags=["Debug"], dependencies=[Depends(require_admin_token)])
+async def get_slow_queries(
+    limit: int = Query(50, ge=1, le=1000, description="Maximum number of entries"),
+    min_duration_ms: float = Query(0, ge=0, description="Only entries at least this slow")
+):
+    """
+    Recent statements slower than SLOW_QUERY_THRESHOLD_MS in this worker,
+    newest first, with their plans when SLOW_QUERY_EXPLAIN is on.
+    Requires `Authorization: Bearer <PROFILER_TOKEN>`
+    """
+    return {
+        "settings": slow_queries.get_settings(),
+        "entries": slow_queries.get_entries(limit, min_duration_ms),
     }
 
 # # Error handlers
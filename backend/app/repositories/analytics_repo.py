@@ -1,33 +1,31 @@
 # File: app/repositories/analytics_repo.py
-from app.config.database import execute_query
+from app.config.async_database import execute_query
 from typing import Optional
 from datetime import date
 
 async def get_sales_analytics(start_date: Optional[date], end_date: Optional[date]):
+    # Reads the incrementally maintained DailySalesRollup (see rollup_repo)
+    # instead of aggregating the raw order tables on every call
     query = """
     WITH DailySales AS (
         SELECT 
-            DATE_TRUNC('day', o.OrderDate) as sale_date,
-            COUNT(DISTINCT o.OrderID) as orders,
-            COUNT(DISTINCT co.CustomerID) as customers,
-            SUM(od.Quantity) as units_sold,
-            SUM(od.Quantity * p.Price) as revenue
-        FROM Orders o
-        JOIN OrderDetails od USING(OrderID)
-        JOIN Products p USING(ProductID)
-        JOIN CustomerOrders co USING(OrderID)
+            r.SaleDate as sale_date,
+            r.Orders as orders,
+            r.Customers as customers,
+            r.UnitsSold as units_sold,
+            r.Revenue as revenue
+        FROM DailySalesRollup r
         WHERE 1=1
     """
     params = []
     if start_date:
-        query += " AND o.OrderDate >= %s"
+        query += " AND r.SaleDate >= %s"
         params.append(start_date)
     if end_date:
-        query += " AND o.OrderDate <= %s"
+        query += " AND r.SaleDate <= %s"
         params.append(end_date)
     
     query += """
-        GROUP BY DATE_TRUNC('day', o.OrderDate)
     )
     SELECT 
         sale_date,
@@ -41,7 +39,7 @@ async def get_sales_analytics(start_date: Optional[date], end_date: Optional[dat
     FROM DailySales
     ORDER BY sale_date DESC;
     """
-    return execute_query(query, tuple(params) if params else None)
+    return await execute_query(query, tuple(params) if params else None)
 
 async def get_product_analytics():
     query = """
@@ -64,7 +62,7 @@ async def get_product_analytics():
     GROUP BY p.ProductID, p.Name, i.Quantity
     ORDER BY total_revenue DESC NULLS LAST;
     """
-    return execute_query(query)
+    return await execute_query(query)
 
 async def get_customer_analytics():
     query = """
@@ -95,7 +93,7 @@ async def get_customer_analytics():
     FROM CustomerStats
     ORDER BY total_spent DESC;
     """
-    return execute_query(query)
+    return await execute_query(query)
 
 async def get_supplier_analytics():
     query = """
@@ -126,24 +124,21 @@ async def get_supplier_analytics():
     FROM SupplierStats
     ORDER BY total_value DESC;
     """
-    return execute_query(query)
+    return await execute_query(query)
 
 
 async def get_trend_analytics():
+    # Reads the precomputed MonthlyMetricsCube shared with the dashboard
     query = """
     WITH MonthlyMetrics AS (
         SELECT 
-            DATE_TRUNC('month', o.OrderDate) as month,
-            COUNT(DISTINCT o.OrderID) as orders,
-            COUNT(DISTINCT co.CustomerID) as customers,
-            SUM(od.Quantity) as units,
-            SUM(od.Quantity * p.Price) as revenue,
-            COUNT(DISTINCT p.ProductID) as unique_products
-        FROM Orders o
-        JOIN OrderDetails od USING(OrderID)
-        JOIN Products p USING(ProductID)
-        JOIN CustomerOrders co USING(OrderID)
-        GROUP BY DATE_TRUNC('month', o.OrderDate)
+            c.Month as month,
+            c.Orders as orders,
+            c.Customers as customers,
+            c.Units as units,
+            c.Revenue as revenue,
+            c.UniqueProducts as unique_products
+        FROM MonthlyMetricsCube c
     )
     SELECT 
         month,
@@ -160,4 +155,4 @@ async def get_trend_analytics():
     FROM MonthlyMetrics
     ORDER BY month DESC;
     """
-    return execute_query(query)
\ No newline at end of file
+    return await execute_query(query)
\ No newline at end of file
@@ -1,27 +1,125 @@
+import os
 from fastapi import HTTPException
-from app.config.database import execute_query
+from app.config.async_database import execute_prepared, execute_query
+from app.repositories import dashboard_repo
 from app.schemas.customer import CustomerCreate, CustomerUpdate
+from app.utils.batch_loader import load_by_id
+from app.utils.pagination import keyset_clause
+from app.utils.prefix_index import PrefixIndex
 from typing import List, Optional
 
-async def get_all_customers():
-    query = """
+# Allowed sort keys: API name -> (SQL column, cursor value converter)
+SORT_KEYS = {
+    'customer_id': ('c.id', int),
+    'name': ('c.Name', str),
+}
+
+SEARCH_CONDITION = "LOWER(c.Name) LIKE LOWER(%s)"
+
+# Customer id/name pairs for /customers/autocomplete. Loaded at startup and kept
+# current by create/update/delete below; reloaded after
+# AUTOCOMPLETE_MAX_AGE seconds (0 = never) to pick up other workers' writes.
+name_index = PrefixIndex(max_age=float(os.getenv('AUTOCOMPLETE_MAX_AGE', '300')))
+
+async def _fetch_names():
+    result = await execute_query("SELECT id, Name as name FROM Users WHERE Role = 'customer';")
+    return [(row['id'], row['name']) for row in result or []]
+
+async def load_name_index():
+    await name_index.reload(_fetch_names)
+
+async def autocomplete_customers(prefix: str, limit: int = 10):
+    """
+    Get up to `limit` customers with a name word starting with `prefix`,
+    served from the in-memory name index.
+    """
+    if name_index.needs_load():
+        await load_name_index()
+    return [
+        {'customer_id': customer_id, 'name': name}
+        for customer_id, name in name_index.search(prefix, limit)
+    ]
+
+async def _get_customers(
+    condition: Optional[str],
+    condition_params: list,
+    sort: str,
+    descending: bool,
+    limit: Optional[int],
+    cursor: Optional[dict]
+):
+    sort_column = SORT_KEYS[sort][0]
+    cursor_values = (cursor[sort], cursor['customer_id']) if cursor else None
+    keyset, keyset_params, order_by = keyset_clause(
+        sort_column, 'c.id', descending, cursor_values
+    )
+
+    # Select the page of customers first so order totals are only
+    # aggregated for the rows that are returned
+    page_query = """
+    SELECT c.id, c.Name, c.ContactInfo
+    FROM Users c
+    WHERE c.Role = 'customer'
+    """
+    params = list(condition_params)
+    if condition:
+        page_query += f" AND {condition}"
+    if keyset:
+        page_query += f" AND {keyset}"
+        params.extend(keyset_params)
+    page_query += f" ORDER BY {order_by}"
+    if limit:
+        page_query += " LIMIT %s"
+        params.append(limit + 1)
+
+    query = f"""
+    WITH page AS ({page_query})
     SELECT 
         c.id as customer_id,
         c.Name as name,
         c.ContactInfo as contact_info,
         COUNT(DISTINCT co.OrderID) as total_orders,
         COALESCE(SUM(od.Quantity * p.Price), 0) as total_spent
-    FROM Users c
+    FROM page c
     LEFT JOIN CustomerOrders co ON c.id = co.CustomerID
     LEFT JOIN OrderDetails od ON co.OrderID = od.OrderID
     LEFT JOIN Products p ON od.ProductID = p.ProductID
-    WHERE c.Role = 'customer'
     GROUP BY c.id, c.Name, c.ContactInfo
-    ORDER BY c.id;
+    ORDER BY {order_by};
+    """
+    return await execute_query(query, tuple(params) if params else None)
+
+async def get_all_customers(
+    sort: str = 'customer_id',
+    descending: bool = False,
+    limit: Optional[int] = None,
+    cursor: Optional[dict] = None
+):
+    """
+    Get customers ordered by an allowed sort key. With `limit`, one extra row
+    is fetched so the caller can detect a following page.
     """
-    return execute_query(query)
+    return await _get_customers(None, [], sort, descending, limit, cursor)
+
+async def count_customers(search_term: Optional[str] = None):
+    query = "SELECT COUNT(*) AS total FROM Users c WHERE c.Role = 'customer'"
+    params = None
+    if search_term:
+        query += f" AND {SEARCH_CONDITION}"
+        params = (f"%{search_term}%",)
+    result = await execute_query(query, params)
+    return result[0]['total'] if result else 0
 
 async def get_customer_by_id(customer_id: int):
+    """
+    Get one customer. Concurrent lookups within a request are fetched
+    together by get_customers_by_ids.
+    """
+    return await load_by_id(
+        'customers', customer_id, _get_customer_by_id, get_customers_by_ids, 'customer_id'
+    )
+
+async def _get_customer_by_id(customer_id: int):
     query = """
     SELECT 
         c.id as customer_id,
@@ -36,9 +134,33 @@ async def get_customer_by_id(customer_id: int):
     WHERE c.id = %s AND c.Role = 'customer'
     GROUP BY c.id, c.Name, c.ContactInfo;
     """
-    result = execute_query(query, (customer_id,))
+    result = await execute_prepared('customer_by_id', query, (customer_id,))
     return result[0] if result else None
 
+async def get_customers_by_ids(customer_ids: List[int]):
+    """
+    Get several customers in one query, in the order of `customer_ids`.
+    """
+    if not customer_ids:
+        return []
+    query = """
+    SELECT 
+        c.id as customer_id,
+        c.Name as name,
+        c.ContactInfo as contact_info,
+        COUNT(DISTINCT co.OrderID) as total_orders,
+        COALESCE(SUM(od.Quantity * p.Price), 0) as total_spent
+    FROM Users c
+    LEFT JOIN CustomerOrders co ON c.id = co.CustomerID
+    LEFT JOIN OrderDetails od ON co.OrderID = od.OrderID
+    LEFT JOIN Products p ON od.ProductID = p.ProductID
+    WHERE c.id = ANY(%s::int[]) AND c.Role = 'customer'
+    GROUP BY c.id, c.Name, c.ContactInfo
+    ORDER BY array_position(%s::int[], c.id);
+    """
+    customer_ids = list(customer_ids)
+    return await execute_query(query, (customer_ids, customer_ids)) or []
+
 async def get_customer_orders(customer_id: int):
     query = """
     SELECT 
@@ -56,7 +178,7 @@ async def get_customer_orders(customer_id: int):
     WHERE u.id = %s 
     ORDER BY o.OrderDate DESC;
     """
-    return execute_query(query, (customer_id,))
+    return await execute_query(query, (customer_id,))
 
 async def get_vip_customers():
     query = """
@@ -73,7 +195,7 @@ async def get_vip_customers():
     HAVING SUM(od.Quantity * p.Price) > 1000
     ORDER BY total_spent DESC;
     """
-    return execute_query(query)
+    return await execute_query(query)
 
 async def create_customer(customer: CustomerCreate):
     query = """
@@ -81,11 +203,12 @@ async def create_customer(customer: CustomerCreate):
     VALUES (%s, %s,'customer')
     RETURNING id;
     """
-    result = execute_query(
+    result = await execute_query(
         query, 
         (customer.name, customer.contact_info)
     )
     if result:
+        name_index.upsert(result[0]['id'], customer.name)
         return await get_customer_by_id(result[0]['id'])
     return None
 
@@ -110,8 +233,11 @@ async def update_customer(customer_id: int, customer: CustomerUpdate):
     """
     params.append(customer_id)
     
-    result = execute_query(query, tuple(params))
+    result = await execute_query(query, tuple(params))
     if result:
+        if customer.name is not None:
+            name_index.upsert(customer_id, customer.name)
+        dashboard_repo.invalidate_cache()
         return await get_customer_by_id(customer_id)
     return None
 
@@ -121,23 +247,20 @@ async def delete_customer(customer_id: int):
     WHERE id = %s
     RETURNING id;
     """
-    result = execute_query(query, (customer_id,))
+    result = await execute_query(query, (customer_id,))
+    if result:
+        name_index.remove(customer_id)
+        dashboard_repo.invalidate_cache()
     return bool(result)
 
-async def search_customers(search_term: str):
-    query = """
-    SELECT 
-        c.id as customer_id,
-        c.Name as name,
-        c.ContactInfo as contact_info,
-        COUNT(DISTINCT co.OrderID) as total_orders,
-        COALESCE(SUM(od.Quantity * p.Price), 0) as total_spent
-    FROM Users c
-    LEFT JOIN CustomerOrders co ON c.id = co.CustomerID
-    LEFT JOIN OrderDetails od ON co.OrderID = od.OrderID
-    LEFT JOIN Products p ON od.ProductID = p.ProductID
-    WHERE LOWER(c.Name) LIKE LOWER(%s) and c.Role = 'customer'
-    GROUP BY c.id, c.Name, c.ContactInfo;
-    """
+async def search_customers(
+    search_term: str,
+    sort: str = 'customer_id',
+    descending: bool = False,
+    limit: Optional[int] = None,
+    cursor: Optional[dict] = None
+):
     search_pattern = f"%{search_term}%"
-    return execute_query(query, (search_pattern,))
\ No newline at end of file
+    return await _get_customers(
+        SEARCH_CONDITION, [search_pattern], sort, descending, limit, cursor
+    )
\ No newline at end of file
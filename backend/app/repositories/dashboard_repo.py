@@ -1,7 +1,28 @@
-from app.config.database import execute_query
+import os
+from app.config.async_database import execute_query
+from app.utils.cache import TTLCache
 from datetime import date, timedelta
 
+# Overview, top products and top customers are served from this cache.
+# Writers that call invalidate_cache(): order create/update/delete and
+# batch create, payment create, inventory updates and stock movements,
+# product price or name updates and deletes, customer updates and deletes.
+DASHBOARD_CACHE_TTL = float(os.getenv('DASHBOARD_CACHE_TTL', 60))
+dashboard_cache = TTLCache(DASHBOARD_CACHE_TTL)
+
+def invalidate_cache():
+    """
+    Drop every cached dashboard result after a write to the data behind it.
+    """
+    dashboard_cache.invalidate()
+
+def get_cache_stats() -> dict:
+    return dashboard_cache.stats()
+
 async def get_overview():
+    return await dashboard_cache.get_or_load('overview', _load_overview)
+
+async def _load_overview():
     query = """
     SELECT 
         (SELECT COUNT(DISTINCT o.OrderID) 
@@ -22,28 +43,27 @@ async def get_overview():
          JOIN Inventory i USING(ProductID)
          WHERE i.Quantity < 10) AS low_stock_items;
     """
-    result = execute_query(query)
+    result = await execute_query(query)
     return result[0] if result else None
 
 async def get_monthly_metrics():
+    # Reads the precomputed MonthlyMetricsCube (see rollup_repo)
     query = """
     SELECT 
-        DATE_TRUNC('month', OrderDate) AS month,
-        COUNT(DISTINCT o.OrderID) AS total_orders,
-        SUM(p.Price * od.Quantity) AS total_revenue,
-        COUNT(DISTINCT u.id) AS unique_customers
-    FROM Orders o
-    JOIN OrderDetails od USING(OrderID)
-    JOIN Products p USING(ProductID)
-    JOIN CustomerOrders co USING(OrderID)
-    JOIN Users u ON co.CustomerID = u.id 
-    GROUP BY DATE_TRUNC('month', OrderDate)
-    ORDER BY month DESC
+        c.Month AS month,
+        c.Orders AS total_orders,
+        c.Revenue AS total_revenue,
+        c.Customers AS unique_customers
+    FROM MonthlyMetricsCube c
+    ORDER BY c.Month DESC
     LIMIT 12;
     """
-    return execute_query(query)
+    return await execute_query(query)
 
 async def get_top_products():
+    return await dashboard_cache.get_or_load('top_products', _load_top_products)
+
+async def _load_top_products():
     query = """
     SELECT 
         p.ProductID AS product_id,
@@ -58,9 +78,12 @@ async def get_top_products():
     ORDER BY total_revenue DESC
     LIMIT 5;
     """
-    return execute_query(query)
+    return await execute_query(query)
 
 async def get_top_customers():
+    return await dashboard_cache.get_or_load('top_customers', _load_top_customers)
+
+async def _load_top_customers():
     query = """
     SELECT 
         u.id AS customer_id,
@@ -77,4 +100,4 @@ async def get_top_customers():
     ORDER BY total_spent DESC
     LIMIT 5;
     """
-    return execute_query(query)
+    return await execute_query(query)
@@ -1,5 +1,7 @@
 from fastapi import HTTPException
-from app.config.database import execute_query
+from app.config.async_database import execute_prepared, execute_query, execute_values, transaction
+from app.repositories import dashboard_repo
+from app.schemas.inventory import StockMovementCreate
 from typing import List, Optional
 
 
@@ -20,7 +22,7 @@ async def get_all_inventory():
     JOIN Products p USING(ProductID)
     ORDER BY p.Name;
     """
-    return execute_query(query)
+    return await execute_query(query)
 
 async def get_low_stock_items():
     query = """
@@ -40,7 +42,7 @@ async def get_low_stock_items():
     WHERE i.Quantity < 10
     ORDER BY i.Quantity;
     """
-    return execute_query(query)
+    return await execute_query(query)
 
 async def get_stock_alerts():
     query = """
@@ -58,7 +60,7 @@ async def get_stock_alerts():
         HAVING AVG(Quantity) > 10
     );
     """
-    return execute_query(query)
+    return await execute_query(query)
 
 async def get_inventory_by_product(product_id: int):
     query = """
@@ -77,7 +79,7 @@ async def get_inventory_by_product(product_id: int):
     JOIN Products p USING(ProductID)
     WHERE p.ProductID = %s;
     """
-    result = execute_query(query, (product_id,))
+    result = await execute_prepared('inventory_by_product', query, (product_id,))
     return result[0] if result else None
 
 async def update_inventory(product_id: int, quantity: int):
@@ -87,7 +89,164 @@ async def update_inventory(product_id: int, quantity: int):
     WHERE ProductID = %s
     RETURNING InventoryID;
     """
-    result = execute_query(query, (quantity, product_id))
+    result = await execute_query(query, (quantity, product_id))
     if result:
+        dashboard_repo.invalidate_cache()
         return await get_inventory_by_product(product_id)
-    return None
\ No newline at end of file
+    return None
+
+async def update_inventory_batch(quantities: dict):
+    """
+    Set the stock quantity of many products with one UPDATE ... FROM (VALUES)
+    statement per page of rows, all in one transaction.
+
+    Args:
+        quantities (dict): Product ID mapped to its new quantity
+
+    Returns:
+        list: Updated inventory rows; products without an inventory row are absent
+    """
+    if not quantities:
+        return []
+    query = """
+    WITH changes (product_id, quantity) AS (VALUES %s),
+    updated AS (
+        UPDATE Inventory i
+        SET Quantity = c.quantity
+        FROM changes c
+        WHERE i.ProductID = c.product_id
+        RETURNING i.InventoryID, i.ProductID, i.Quantity
+    )
+    SELECT 
+        u.InventoryID as inventory_id,
+        p.ProductID as product_id,
+        p.Name as product_name,
+        p.Price as price,
+        u.Quantity as quantity,
+        CASE 
+            WHEN u.Quantity = 0 THEN 'Out of Stock'
+            WHEN u.Quantity < 10 THEN 'Low Stock'
+            ELSE 'In Stock'
+        END as status
+    FROM updated u
+    JOIN Products p USING(ProductID)
+    ORDER BY p.ProductID;
+    """
+    result = await execute_values(
+        query,
+        list(quantities.items()),
+        template="(%s::int, %s::int)"
+    )
+    if result:
+        dashboard_repo.invalidate_cache()
+    return result or []
+
+# Applies a page of signed movements: each product's Quantity is moved by
+# the sum of its deltas in one atomic `Quantity = Quantity + delta` update,
+# refused if stock would go negative after any of its movements in input
+# order, and every applied movement is appended to the StockMovements
+# ledger with the running quantity after it.
+MOVEMENTS_APPLY = """
+    WITH changes (ord, product_id, movement_type, delta, reason) AS (VALUES %s),
+    running AS (
+        SELECT c.*, SUM(c.delta) OVER (PARTITION BY c.product_id ORDER BY c.ord) as moved
+        FROM changes c
+    ),
+    totals AS (
+        SELECT product_id, SUM(delta) as delta, MIN(moved) as lowest
+        FROM running
+        GROUP BY product_id
+    ),
+    updated AS (
+        UPDATE Inventory i
+        SET Quantity = i.Quantity + t.delta
+        FROM totals t
+        WHERE i.ProductID = t.product_id
+        AND i.Quantity + t.lowest >= 0
+        RETURNING i.ProductID, i.Quantity, t.delta
+    )
+    INSERT INTO StockMovements (ProductID, MovementType, Delta, Reason, QuantityAfter)
+    SELECT
+        r.product_id,
+        r.movement_type,
+        r.delta,
+        r.reason,
+        u.Quantity - u.delta + r.moved
+    FROM running r
+    JOIN updated u ON u.ProductID = r.product_id
+    ORDER BY r.ord
+    RETURNING
+        MovementID as movement_id,
+        ProductID as product_id,
+        MovementType as movement_type,
+        Delta as delta,
+        Reason as reason,
+        QuantityAfter as quantity_after,
+        CreatedAt as created_at;
+"""
+
+async def apply_movements(movements: List[StockMovementCreate]):
+    """
+    Apply stock movements and record them in the ledger in one transaction,
+    with one multi-row statement per page of movements.
+
+    Returns:
+        tuple: (recorded movements in input order,
+                {product_id: reason} for products whose movements were refused)
+    """
+    if not movements:
+        return [], {}
+    rows = [
+        (position, m.product_id, m.movement_type, m.delta, m.reason)
+        for position, m in enumerate(movements)
+    ]
+    async with transaction():
+        # One page for the whole batch, so each product's running quantity
+        # is checked against its stock over all of its movements
+        recorded = await execute_values(
+            MOVEMENTS_APPLY,
+            rows,
+            template="(%s::int, %s::int, %s::varchar, %s::int, %s::text)",
+            page_size=len(rows)
+        ) or []
+        recorded.sort(key=lambda row: row['movement_id'])
+        refused = sorted({m.product_id for m in movements} - {r['product_id'] for r in recorded})
+        known = set()
+        if refused:
+            result = await execute_query(
+                "SELECT ProductID as product_id FROM Inventory WHERE ProductID = ANY(%s);",
+                (refused,)
+            )
+            known = {row['product_id'] for row in result or []}
+    if recorded:
+        dashboard_repo.invalidate_cache()
+    errors = {
+        product_id: "Insufficient stock" if product_id in known else "Product not found in inventory"
+        for product_id in refused
+    }
+    return recorded, errors
+
+async def get_movements(product_id: int, limit: int = 100, cursor: Optional[dict] = None):
+    """
+    Get a product's movement history, newest first. One extra row is
+    fetched so the caller can tell whether another page follows.
+    """
+    query = """
+    SELECT 
+        MovementID as movement_id,
+        ProductID as product_id,
+        MovementType as movement_type,
+        Delta as delta,
+        Reason as reason,
+        QuantityAfter as quantity_after,
+        CreatedAt as created_at
+    FROM StockMovements
+    WHERE ProductID = %s
+    """
+    params = [product_id]
+    if cursor:
+        query += " AND MovementID < %s"
+        params.append(cursor['movement_id'])
+    query += " ORDER BY MovementID DESC LIMIT %s;"
+    params.append(limit + 1)
+    return await execute_query(query, tuple(params))
@@ -1,16 +1,122 @@
 from fastapi import HTTPException
-from app.config.database import execute_query
+from app.config.async_database import (
+    execute_prepared, execute_query, execute_values, stream_query, transaction,
+)
+from app.repositories import rollup_repo, dashboard_repo
 from app.schemas.order import OrderCreate, OrderUpdate
+from app.utils.batch_loader import load_by_id
 from typing import List, Optional
 from datetime import date
 
+EXPORT_CHUNK_SIZE = 1000
+
+# Recomputes the stored header totals of the selected orders from the raw
+# detail, payment and shipment tables. Orders without lines get zero totals.
+ORDER_TOTALS_UPDATE = """
+    UPDATE Orders o
+    SET TotalItems = t.total_items,
+        TotalQuantity = t.total_quantity,
+        TotalAmount = t.total_amount,
+        AmountPaid = t.amount_paid,
+        Status = t.status
+    FROM (
+        SELECT
+            o2.OrderID,
+            d.total_items,
+            COALESCE(d.total_quantity, 0) as total_quantity,
+            COALESCE(d.total_amount, 0) as total_amount,
+            COALESCE(pay.amount_paid, 0) as amount_paid,
+            CASE
+                WHEN EXISTS (
+                    SELECT 1 FROM Shipments sh
+                    WHERE sh.OrderID = o2.OrderID AND sh.ShipmentDate IS NOT NULL
+                ) THEN 'Shipped'
+                WHEN pay.amount_paid IS NOT NULL THEN 'Paid'
+                ELSE 'Pending'
+            END as status
+        FROM Orders o2
+        CROSS JOIN LATERAL (
+            SELECT
+                COUNT(od.ProductID) as total_items,
+                SUM(od.Quantity) as total_quantity,
+                SUM(od.Quantity * p.Price) as total_amount
+            FROM OrderDetails od
+            JOIN Products p ON od.ProductID = p.ProductID
+            WHERE od.OrderID = o2.OrderID
+        ) d
+        CROSS JOIN LATERAL (
+            SELECT SUM(pd.Amount) as amount_paid
+            FROM PaymentDetails pd
+            WHERE pd.OrderID = o2.OrderID
+        ) pay
+        {where}
+    ) t
+    WHERE o.OrderID = t.OrderID
+    RETURNING o.OrderID;
+"""
+
+def _order_filters(
+    start_date: Optional[date],
+    end_date: Optional[date],
+    customer_id: Optional[int],
+    supplier_id: Optional[int]
+):
+    """
+    Build the WHERE conditions shared by the order list and export queries.
+    Conditions reference the Orders table as `o`.
+    """
+    conditions = ""
+    params = []
+    if start_date:
+        conditions += " AND o.OrderDate >= %s"
+        params.append(start_date)
+    if end_date:
+        conditions += " AND o.OrderDate <= %s"
+        params.append(end_date)
+    if customer_id:
+        conditions += """ AND EXISTS (
+        SELECT 1 FROM CustomerOrders co
+        WHERE co.OrderID = o.OrderID AND co.CustomerID = %s
+    )"""
+        params.append(customer_id)
+    if supplier_id:
+        conditions += " AND o.SupplierID = %s"
+        params.append(supplier_id)
+    return conditions, params
+
 async def get_orders(
     start_date: Optional[date] = None,
     end_date: Optional[date] = None,
     customer_id: Optional[int] = None,
-    supplier_id: Optional[int] = None
+    supplier_id: Optional[int] = None,
+    limit: Optional[int] = None,
+    cursor: Optional[dict] = None
 ):
-    query = """
+    """
+    Get orders newest first. When `limit` is given, one extra row is fetched
+    so the caller can tell whether another page follows; `cursor` holds the
+    (order_date, order_id) of the last row of the previous page.
+    """
+    page_query = """
+    SELECT o.OrderID, o.OrderDate, o.SupplierID, o.TotalItems, o.TotalQuantity,
+           o.TotalAmount, o.AmountPaid, o.Status
+    FROM Orders o
+    WHERE o.TotalItems > 0
+    AND EXISTS (SELECT 1 FROM CustomerOrders co WHERE co.OrderID = o.OrderID)
+    """
+    conditions, params = _order_filters(start_date, end_date, customer_id, supplier_id)
+    page_query += conditions
+    if cursor:
+        page_query += " AND (o.OrderDate, o.OrderID) < (%s, %s)"
+        params.extend([cursor['order_date'], cursor['order_id']])
+    
+    page_query += " ORDER BY o.OrderDate DESC, o.OrderID DESC"
+    if limit:
+        page_query += " LIMIT %s"
+        params.append(limit + 1)
+    
+    query = f"""
+    WITH page AS ({page_query})
     SELECT 
         o.OrderID as order_id,
         o.OrderDate as order_date,
@@ -18,91 +124,145 @@ async def get_orders(
         s.Name as supplier_name,
         c.ID as customer_id,
         c.Name as customer_name,
-        COUNT(od.ProductID) as total_items,
-        SUM(od.Quantity) as total_quantity,
-        SUM(od.Quantity * p.Price) as total_amount,
-        COALESCE(pd.Amount, 0) as amount_paid,
-        CASE 
-            WHEN sh.ShipmentDate IS NOT NULL THEN 'Shipped'
-            WHEN pd.Amount IS NOT NULL THEN 'Paid'
-            ELSE 'Pending'
-        END as status
-    FROM Orders o
+        o.TotalItems as total_items,
+        o.TotalQuantity as total_quantity,
+        o.TotalAmount as total_amount,
+        o.AmountPaid as amount_paid,
+        o.Status as status
+    FROM page o
     JOIN Users s ON o.SupplierID = s.ID 
     JOIN CustomerOrders co ON o.OrderID = co.OrderID
     JOIN Users c ON co.CustomerID = c.ID 
-    JOIN OrderDetails od ON o.OrderID = od.OrderID
-    JOIN Products p ON od.ProductID = p.ProductID
-    LEFT JOIN PaymentDetails pd ON o.OrderID = pd.OrderID
-    LEFT JOIN Shipments sh ON o.OrderID = sh.OrderID
     WHERE 1=1
     """
-    params = []
-    
-    if start_date:
-        query += " AND o.OrderDate >= %s"
-        params.append(start_date)
-    if end_date:
-        query += " AND o.OrderDate <= %s"
-        params.append(end_date)
     if customer_id:
         query += " AND c.ID = %s"
         params.append(customer_id)
-    if supplier_id:
-        query += " AND s.ID = %s"
-        params.append(supplier_id)
     
-    query += """
-    GROUP BY o.OrderID, o.OrderDate, s.ID, s.Name, 
-             c.ID, c.Name, pd.Amount, sh.ShipmentDate
-    ORDER BY o.OrderDate DESC;
-    """
+    query += " ORDER BY o.OrderDate DESC, o.OrderID DESC;"
     
-    return execute_query(query, tuple(params) if params else None)
+    return await execute_query(query, tuple(params) if params else None)
 
-async def get_order_summary():
-    query = """
+async def stream_orders(
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    customer_id: Optional[int] = None,
+    supplier_id: Optional[int] = None
+):
+    """
+    Stream every order line matching the filters, newest orders first,
+    in chunks read from a server-side cursor.
+    """
+    conditions, params = _order_filters(start_date, end_date, customer_id, supplier_id)
+    query = f"""
     SELECT 
         o.OrderID as order_id,
         o.OrderDate as order_date,
+        s.ID as supplier_id,
         s.Name as supplier_name,
+        c.ID as customer_id,
         c.Name as customer_name,
-        SUM(od.Quantity * p.Price) as total_amount
+        od.OrderDetailID as order_detail_id,
+        p.ProductID as product_id,
+        p.Name as product_name,
+        od.Quantity as quantity,
+        p.Price as unit_price,
+        (od.Quantity * p.Price) as total_price
     FROM Orders o
     JOIN Users s ON o.SupplierID = s.ID 
     JOIN CustomerOrders co ON o.OrderID = co.OrderID
     JOIN Users c ON co.CustomerID = c.ID 
     JOIN OrderDetails od ON o.OrderID = od.OrderID
     JOIN Products p ON od.ProductID = p.ProductID
-    GROUP BY o.OrderID, o.OrderDate, s.Name, c.Name
+    WHERE 1=1 {conditions}
+    ORDER BY o.OrderDate DESC, o.OrderID DESC, od.OrderDetailID;
+    """
+    async for rows in stream_query(query, tuple(params) if params else None, EXPORT_CHUNK_SIZE):
+        yield rows
+
+async def refresh_order_totals(order_ids: List[int]):
+    """
+    Recompute the stored totals and status of the given orders.
+    Called after any write to their details, payments or shipments.
+    """
+    order_ids = sorted({order_id for order_id in order_ids if order_id is not None})
+    if not order_ids:
+        return
+    query = ORDER_TOTALS_UPDATE.format(where="WHERE o2.OrderID = ANY(%s)")
+    await execute_query(query, (order_ids,))
+
+async def rebuild_order_totals():
+    """
+    Recompute the stored totals of every order.
+
+    Returns:
+        int: Number of orders updated
+    """
+    result = await execute_query(ORDER_TOTALS_UPDATE.format(where=""))
+    return len(result or [])
+
+async def get_product_order_ids(product_id: int) -> List[int]:
+    """
+    Get the orders containing a product, i.e. the orders whose totals
+    depend on that product's price.
+    """
+    query = """
+    SELECT DISTINCT OrderID as order_id
+    FROM OrderDetails
+    WHERE ProductID = %s;
+    """
+    result = await execute_query(query, (product_id,))
+    return [row['order_id'] for row in result or []]
+
+async def check_order_shipped(order_id: int) -> bool:
+    query = """
+    SELECT EXISTS (
+        SELECT 1 FROM Shipments WHERE OrderID = %s
+    ) as shipped;
+    """
+    result = await execute_query(query, (order_id,))
+    return bool(result and result[0]['shipped'])
+
+async def get_order_summary():
+    query = """
+    SELECT 
+        o.OrderID as order_id,
+        o.OrderDate as order_date,
+        s.Name as supplier_name,
+        c.Name as customer_name,
+        o.TotalAmount as total_amount
+    FROM Orders o
+    JOIN Users s ON o.SupplierID = s.ID 
+    JOIN CustomerOrders co ON o.OrderID = co.OrderID
+    JOIN Users c ON co.CustomerID = c.ID 
+    WHERE o.TotalItems > 0
     ORDER BY o.OrderDate DESC;
     """
-    return execute_query(query)
+    return await execute_query(query)
 
 async def get_order_status():
     query = """
     SELECT 
         o.OrderID as order_id,
-        COUNT(od.ProductID) as total_items,
-        SUM(od.Quantity) as total_quantity,
-        SUM(od.Quantity * p.Price) as total_amount,
-        COALESCE(pd.Amount, 0) as amount_paid,
-        CASE 
-            WHEN sh.ShipmentDate IS NOT NULL THEN 'Shipped'
-            WHEN pd.Amount IS NOT NULL THEN 'Paid'
-            ELSE 'Pending'
-        END as status
+        o.TotalItems as total_items,
+        o.TotalQuantity as total_quantity,
+        o.TotalAmount as total_amount,
+        o.AmountPaid as amount_paid,
+        o.Status as status
     FROM Orders o
-    JOIN OrderDetails od USING(OrderID)
-    JOIN Products p USING(ProductID)
-    LEFT JOIN PaymentDetails pd USING(OrderID)
-    LEFT JOIN Shipments sh USING(OrderID)
-    GROUP BY o.OrderID, pd.Amount, sh.ShipmentDate
+    WHERE o.TotalItems > 0
     ORDER BY o.OrderID;
     """
-    return execute_query(query)
+    return await execute_query(query)
 
 async def get_order_by_id(order_id: int):
+    """
+    Get one order. Concurrent lookups within a request are fetched
+    together by get_orders_by_ids.
+    """
+    return await load_by_id('orders', order_id, _get_order_by_id, get_orders_by_ids, 'order_id')
+
+async def _get_order_by_id(order_id: int):
     query = """
     SELECT 
         o.OrderID as order_id,
@@ -111,30 +271,49 @@ async def get_order_by_id(order_id: int):
         s.Name as supplier_name,
         c.ID as customer_id,
         c.Name as customer_name,
-        COUNT(od.ProductID) as total_items,
-        SUM(od.Quantity) as total_quantity,
-        SUM(od.Quantity * p.Price) as total_amount,
-        COALESCE(pd.Amount, 0) as amount_paid,
-        CASE 
-            WHEN sh.ShipmentDate IS NOT NULL THEN 'Shipped'
-            WHEN pd.Amount IS NOT NULL THEN 'Paid'
-            ELSE 'Pending'
-        END as status
+        o.TotalItems as total_items,
+        o.TotalQuantity as total_quantity,
+        o.TotalAmount as total_amount,
+        o.AmountPaid as amount_paid,
+        o.Status as status
     FROM Orders o
     JOIN Users s ON o.SupplierID = s.ID 
     JOIN CustomerOrders co ON o.OrderID = co.OrderID
     JOIN Users c ON co.CustomerID = c.ID 
-    JOIN OrderDetails od ON o.OrderID = od.OrderID
-    JOIN Products p ON od.ProductID = p.ProductID
-    LEFT JOIN PaymentDetails pd ON o.OrderID = pd.OrderID
-    LEFT JOIN Shipments sh ON o.OrderID = sh.OrderID
-    WHERE o.OrderID = %s
-    GROUP BY o.OrderID, o.OrderDate, s.ID, s.Name, 
-             c.ID, c.Name, pd.Amount, sh.ShipmentDate;
+    WHERE o.OrderID = %s AND o.TotalItems > 0;
     """
-    result = execute_query(query, (order_id,))
+    result = await execute_prepared('order_by_id', query, (order_id,))
     return result[0] if result else None
 
+async def get_orders_by_ids(order_ids: List[int]):
+    """
+    Get several orders in one query, in the order of `order_ids`.
+    """
+    if not order_ids:
+        return []
+    query = """
+    SELECT 
+        o.OrderID as order_id,
+        o.OrderDate as order_date,
+        s.ID as supplier_id,
+        s.Name as supplier_name,
+        c.ID as customer_id,
+        c.Name as customer_name,
+        o.TotalItems as total_items,
+        o.TotalQuantity as total_quantity,
+        o.TotalAmount as total_amount,
+        o.AmountPaid as amount_paid,
+        o.Status as status
+    FROM Orders o
+    JOIN Users s ON o.SupplierID = s.ID 
+    JOIN CustomerOrders co ON o.OrderID = co.OrderID
+    JOIN Users c ON co.CustomerID = c.ID 
+    WHERE o.OrderID = ANY(%s::int[]) AND o.TotalItems > 0
+    ORDER BY array_position(%s::int[], o.OrderID);
+    """
+    order_ids = list(order_ids)
+    return await execute_query(query, (order_ids, order_ids)) or []
+
 async def get_order_details(order_id: int):
     query = """
     SELECT 
@@ -148,7 +327,7 @@ async def get_order_details(order_id: int):
     JOIN Products p ON od.ProductID = p.ProductID
     WHERE od.OrderID = %s;
     """
-    return execute_query(query, (order_id,))
+    return await execute_query(query, (order_id,))
 
 async def create_order(order: OrderCreate):
     order_query = """
@@ -156,32 +335,77 @@ async def create_order(order: OrderCreate):
     VALUES (%s, %s)
     RETURNING OrderID;
     """
-    order_result = execute_query(
-        order_query, 
-        (order.order_date, order.supplier_id)
-    )
-    
-    if order_result:
+    # Header, customer link, detail lines and totals commit together
+    async with transaction():
+        order_result = await execute_query(
+            order_query, 
+            (order.order_date, order.supplier_id)
+        )
+        if not order_result:
+            return None
         order_id = order_result[0]['orderid']
         
         customer_order_query = """
         INSERT INTO CustomerOrders (CustomerID, OrderID)
         VALUES (%s, %s);
         """
-        execute_query(customer_order_query, (order.customer_id, order_id))
+        await execute_query(customer_order_query, (order.customer_id, order_id))
         
-        details_query = """
-        INSERT INTO OrderDetails (OrderID, ProductID, Quantity)
-        VALUES (%s, %s, %s);
-        """
-        for detail in order.details:
-            execute_query(
-                details_query,
+        await execute_values(
+            "INSERT INTO OrderDetails (OrderID, ProductID, Quantity) VALUES %s;",
+            [(order_id, detail.product_id, detail.quantity) for detail in order.details]
+        )
+        await refresh_order_totals([order_id])
+        await rollup_repo.refresh_for_order_dates([order.order_date])
+
+    dashboard_repo.invalidate_cache()
+    return await get_order_by_id(order_id)
+
+async def create_orders(orders: List[OrderCreate]):
+    """
+    Create many orders in one transaction with multi-row inserts: one
+    statement each for the headers, customer links and detail lines
+    (per VALUES page), instead of a round trip and commit per row.
+
+    Returns:
+        list: The created orders, in input order
+    """
+    if not orders:
+        return []
+    async with transaction():
+        # PostgreSQL does not promise RETURNING rows in VALUES order, so the
+        # ids are drawn from the sequence first and inserted explicitly
+        allocated = await execute_query(
+            "SELECT nextval(pg_get_serial_sequence('orders', 'orderid')) as order_id "
+            "FROM generate_series(1, %s);",
+            (len(orders),)
+        )
+        order_ids = [row['order_id'] for row in allocated]
+        await execute_values(
+            "INSERT INTO Orders (OrderID, OrderDate, SupplierID) VALUES %s;",
+            [
+                (order_id, order.order_date, order.supplier_id)
+                for order, order_id in zip(orders, order_ids)
+            ]
+        )
+
+        await execute_values(
+            "INSERT INTO CustomerOrders (CustomerID, OrderID) VALUES %s;",
+            [(order.customer_id, order_id) for order, order_id in zip(orders, order_ids)]
+        )
+        await execute_values(
+            "INSERT INTO OrderDetails (OrderID, ProductID, Quantity) VALUES %s;",
+            [
                 (order_id, detail.product_id, detail.quantity)
-            )
-        
-        return await get_order_by_id(order_id)
-    return None
+                for order, order_id in zip(orders, order_ids)
+                for detail in order.details
+            ]
+        )
+        await refresh_order_totals(order_ids)
+        await rollup_repo.refresh_for_order_dates(order.order_date for order in orders)
+
+    dashboard_repo.invalidate_cache()
+    return await get_orders_by_ids(order_ids)
 
 async def update_order(order_id: int, order: OrderUpdate):
     update_fields = []
@@ -198,15 +422,23 @@ async def update_order(order_id: int, order: OrderUpdate):
         return await get_order_by_id(order_id)
     
     query = f"""
-    UPDATE Orders 
+    UPDATE Orders o
     SET {", ".join(update_fields)}
-    WHERE OrderID = %s
-    RETURNING OrderID;
+    FROM (SELECT OrderID, OrderDate FROM Orders WHERE OrderID = %s) old
+    WHERE o.OrderID = old.OrderID
+    RETURNING o.OrderID, o.OrderDate as order_date, old.OrderDate as old_order_date;
     """
     params.append(order_id)
     
-    result = execute_query(query, tuple(params))
-    return get_order_by_id(order_id) if result else None
+    async with transaction():
+        result = await execute_query(query, tuple(params))
+        if not result:
+            return None
+        await rollup_repo.refresh_for_order_dates(
+            [result[0]['order_date'], result[0]['old_order_date']]
+        )
+    dashboard_repo.invalidate_cache()
+    return await get_order_by_id(order_id)
 
 async def delete_order(order_id: int):
     query = """
@@ -215,7 +447,12 @@ async def delete_order(order_id: int):
     AND NOT EXISTS (
         SELECT 1 FROM Shipments WHERE OrderID = %s
     )
-    RETURNING OrderID;
+    RETURNING OrderID, OrderDate as order_date;
     """
-    result = execute_query(query, (order_id, order_id))
+    async with transaction():
+        result = await execute_query(query, (order_id, order_id))
+        if result:
+            await rollup_repo.refresh_for_order_dates([result[0]['order_date']])
+    if result:
+        dashboard_repo.invalidate_cache()
     return bool(result)
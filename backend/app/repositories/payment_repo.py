@@ -1,5 +1,6 @@
 from fastapi import HTTPException
-from app.config.database import execute_query
+from app.config.async_database import execute_query, transaction
+from app.repositories import order_repo, dashboard_repo
 from app.schemas.payment import PaymentCreate
 from typing import List, Optional
 from datetime import date
@@ -28,7 +29,7 @@ async def get_payments(start_date: Optional[date], end_date: Optional[date]):
         params.append(end_date)
     
     query += " ORDER BY pd.PaymentDate DESC;"
-    return execute_query(query, tuple(params) if params else None)
+    return await execute_query(query, tuple(params) if params else None)
 
 async def get_payment_analysis():
     query = """
@@ -62,7 +63,7 @@ async def get_payment_analysis():
             ELSE date_trunc::date 
         END DESC;
     """
-    return execute_query(query)
+    return await execute_query(query)
 
 async def get_payment_by_id(payment_id: int):
     query = """
@@ -79,7 +80,7 @@ async def get_payment_by_id(payment_id: int):
     JOIN Users c ON co.CustomerID = c.ID 
     WHERE pd.PaymentID = %s;
     """
-    result = execute_query(query, (payment_id,))
+    result = await execute_query(query, (payment_id,))
     return result[0] if result else None
 
 async def create_payment(payment: PaymentCreate):
@@ -88,10 +89,15 @@ async def create_payment(payment: PaymentCreate):
     VALUES (%s, %s, %s)
     RETURNING PaymentID;
     """
-    result = execute_query(
-        query, 
-        (payment.order_id, payment.payment_date, float(payment.amount))
-    )
+    # The payment and the order's AmountPaid/Status commit together
+    async with transaction():
+        result = await execute_query(
+            query, 
+            (payment.order_id, payment.payment_date, float(payment.amount))
+        )
+        if result:
+            await order_repo.refresh_order_totals([payment.order_id])
     if result:
+        dashboard_repo.invalidate_cache()
         return await get_payment_by_id(result[0]['paymentid'])
     return None
\ No newline at end of file
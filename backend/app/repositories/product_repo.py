@@ -1,11 +1,62 @@
 from fastapi import HTTPException
-from app.config.database import execute_query
+from app.config.async_database import execute_prepared, execute_query, transaction
 from app.schemas.product import ProductCreate, ProductUpdate
+from app.repositories import rollup_repo, order_repo, dashboard_repo
+from app.utils.batch_loader import load_by_id
+from app.utils.pagination import keyset_clause
 from typing import List, Optional
+from decimal import Decimal
+import re
 from psycopg2.extras import RealDictCursor
 
+# Allowed sort keys: API name -> (SQL column, cursor value converter)
+SORT_KEYS = {
+    'product_id': ('p.ProductID', int),
+    'name': ('p.Name', str),
+    'price': ('p.Price', Decimal),
+}
+
+SEARCH_CONDITION = "(LOWER(p.Name) LIKE LOWER(%s) OR LOWER(p.Description) LIKE LOWER(%s))"
+
+# Indexed search: prefix match on the SearchVector full-text column (GIN)
+# or trigram word similarity on the lower-cased name (GIN gin_trgm_ops).
+# See app.utils.database_utils for the column and indexes.
+RANKED_SEARCH_CONDITION = """(
+    p.SearchVector @@ to_tsquery('simple', %s)
+    OR LOWER(%s) <%% LOWER(p.Name)
+)"""
+RANKED_SEARCH_RANK = """(
+    ts_rank_cd(p.SearchVector, to_tsquery('simple', %s))
+    + word_similarity(LOWER(%s), LOWER(p.Name))
+)"""
+SEARCH_DEFAULT_LIMIT = 20
+
+def _prefix_tsquery(search_term: str) -> str:
+    """
+    Turn free text such as "amoxicillin 500" into a prefix tsquery
+    ("amoxicillin:* & 500:*") so partially typed words match.
+    """
+    words = re.findall(r"\w+", search_term.lower())
+    return " & ".join(f"{word}:*" for word in words)
+
+def _ranked_search_params(search_term: str) -> list:
+    # An empty tsquery matches nothing, leaving the trigram condition
+    return [_prefix_tsquery(search_term), search_term]
+
+async def _get_products(
+    condition: Optional[str],
+    condition_params: list,
+    sort: str,
+    descending: bool,
+    limit: Optional[int],
+    cursor: Optional[dict]
+):
+    sort_column = SORT_KEYS[sort][0]
+    cursor_values = (cursor[sort], cursor['product_id']) if cursor else None
+    keyset, keyset_params, order_by = keyset_clause(
+        sort_column, 'p.ProductID', descending, cursor_values
+    )
 
-async def get_all_products():
     query = """
     SELECT 
         p.ProductID as product_id,
@@ -20,9 +71,44 @@ async def get_all_products():
         END as stock_status
     FROM Products p
     LEFT JOIN Inventory i ON p.ProductID = i.ProductID
-    ORDER BY p.ProductID;
+    WHERE 1=1
+    """
+    params = list(condition_params)
+    if condition:
+        query += f" AND {condition}"
+    if keyset:
+        query += f" AND {keyset}"
+        params.extend(keyset_params)
+    query += f" ORDER BY {order_by}"
+    if limit:
+        query += " LIMIT %s"
+        params.append(limit + 1)
+    return await execute_query(query, tuple(params) if params else None)
+
+async def get_all_products(
+    sort: str = 'product_id',
+    descending: bool = False,
+    limit: Optional[int] = None,
+    cursor: Optional[dict] = None
+):
+    """
+    Get products ordered by an allowed sort key. With `limit`, one extra row
+    is fetched so the caller can detect a following page.
     """
-    return  execute_query(query)
+    return await _get_products(None, [], sort, descending, limit, cursor)
+
+async def count_products(search_term: Optional[str] = None, search_mode: str = 'like'):
+    query = "SELECT COUNT(*) AS total FROM Products p"
+    params = None
+    if search_term and search_mode == 'ranked':
+        query += f" WHERE {RANKED_SEARCH_CONDITION}"
+        params = tuple(_ranked_search_params(search_term))
+    elif search_term:
+        query += f" WHERE {SEARCH_CONDITION}"
+        search_pattern = f"%{search_term}%"
+        params = (search_pattern, search_pattern)
+    result = await execute_query(query, params)
+    return result[0]['total'] if result else 0
 
 # async def get_product_by_id(product_id: int):
 #     query = """
@@ -45,6 +131,15 @@ async def get_all_products():
 #     return result[0] if result else None
 
 async def get_product_by_id(product_id: int):
+    """
+    Get one product. Concurrent lookups within a request are fetched
+    together by get_products_by_ids.
+    """
+    return await load_by_id(
+        'products', product_id, _get_product_by_id, get_products_by_ids, 'product_id'
+    )
+
+async def _get_product_by_id(product_id: int):
     query = """
     SELECT 
         p.ProductID as product_id,
@@ -62,7 +157,7 @@ async def get_product_by_id(product_id: int):
     WHERE p.ProductID = %s;
     """
     try:
-        result = execute_query(query, (product_id,))
+        result = await execute_prepared('product_by_id', query, (product_id,))
         print(f"Query result: {result}")  # Debugging log
         if result:  # Ensure only valid results are returned
             return result[0]
@@ -71,6 +166,32 @@ async def get_product_by_id(product_id: int):
         print(f"Error in get_product_by_id: {e}")
         raise HTTPException(status_code=500, detail="Internal server error")
 
+async def get_products_by_ids(product_ids: List[int]):
+    """
+    Get several products in one query, in the order of `product_ids`.
+    """
+    if not product_ids:
+        return []
+    query = """
+    SELECT 
+        p.ProductID as product_id,
+        p.Name as name,
+        p.Description as description,
+        p.Price as price,
+        COALESCE(i.Quantity, 0) as current_stock,
+        CASE 
+            WHEN COALESCE(i.Quantity, 0) = 0 THEN 'Out of Stock'
+            WHEN COALESCE(i.Quantity, 0) < 10 THEN 'Low Stock'
+            ELSE 'In Stock'
+        END as stock_status
+    FROM Products p
+    LEFT JOIN Inventory i ON p.ProductID = i.ProductID
+    WHERE p.ProductID = ANY(%s::int[])
+    ORDER BY array_position(%s::int[], p.ProductID);
+    """
+    product_ids = list(product_ids)
+    return await execute_query(query, (product_ids, product_ids)) or []
+
 
 async def create_product(product: ProductCreate):
     query = """
@@ -78,7 +199,7 @@ async def create_product(product: ProductCreate):
     VALUES (%s, %s, %s)
     RETURNING ProductID;
     """
-    result = execute_query(
+    result = await execute_query(
         query, 
         (product.name, product.description, float(product.price))
     )
@@ -111,8 +232,20 @@ async def update_product(product_id: int, product: ProductUpdate):
     """
     params.append(product_id)
     
-    result =  execute_query(query, tuple(params))
+    async with transaction():
+        result = await execute_query(query, tuple(params))
+        if result and product.price is not None:
+            # Order totals and rollup revenue are priced at the current product price
+            await order_repo.refresh_order_totals(
+                await order_repo.get_product_order_ids(product_id)
+            )
+            await rollup_repo.refresh_for_order_dates(
+                await rollup_repo.get_product_order_days(product_id)
+            )
     if result:
+        if product.price is not None or product.name is not None:
+            # Top products show names and are priced at the current price
+            dashboard_repo.invalidate_cache()
         return await get_product_by_id(product_id)
     return None
 
@@ -122,11 +255,37 @@ async def delete_product(product_id: int):
     WHERE ProductID = %s
     RETURNING ProductID;
     """
-    result =  execute_query(query, (product_id,))
+    async with transaction():
+        affected_orders = await order_repo.get_product_order_ids(product_id)
+        affected_days = await rollup_repo.get_product_order_days(product_id)
+        result = await execute_query(query, (product_id,))
+        if result:
+            await order_repo.refresh_order_totals(affected_orders)
+            await rollup_repo.refresh_for_order_dates(affected_days)
+    if result:
+        dashboard_repo.invalidate_cache()
     return bool(result)
 
-async def search_products(search_term: str):
-    query = """
+async def search_products(
+    search_term: str,
+    sort: str = 'product_id',
+    descending: bool = False,
+    limit: Optional[int] = None,
+    cursor: Optional[dict] = None
+):
+    search_pattern = f"%{search_term}%"
+    return await _get_products(
+        SEARCH_CONDITION, [search_pattern, search_pattern],
+        sort, descending, limit, cursor
+    )
+
+async def search_products_ranked(search_term: str, limit: int = SEARCH_DEFAULT_LIMIT):
+    """
+    Search products through the full-text and trigram indexes and return
+    the best `limit` matches, most relevant first.
+    """
+    params = _ranked_search_params(search_term)
+    query = f"""
     SELECT 
         p.ProductID as product_id,
         p.Name as name,
@@ -140,9 +299,8 @@ async def search_products(search_term: str):
         END as stock_status
     FROM Products p
     LEFT JOIN Inventory i ON p.ProductID = i.ProductID
-    WHERE LOWER(p.Name) LIKE LOWER(%s)
-    OR LOWER(p.Description) LIKE LOWER(%s)
-    ORDER BY p.ProductID;
+    WHERE {RANKED_SEARCH_CONDITION}
+    ORDER BY {RANKED_SEARCH_RANK} DESC, p.ProductID
+    LIMIT %s;
     """
-    search_pattern = f"%{search_term}%"
-    return  execute_query(query, (search_pattern, search_pattern))
\ No newline at end of file
+    return await execute_query(query, tuple(params + params + [limit]))
@@ -0,0 +1,281 @@
+# File: app/repositories/rollup_repo.py
+from app.config.async_database import execute_query, transaction
+from typing import Iterable, List
+from datetime import date
+
+# Aggregates one row per order day from the raw order tables. Used both to
+# refresh individual days and to rebuild or verify the whole rollup.
+DAILY_SALES_SELECT = """
+    SELECT
+        o.OrderDate as sale_date,
+        COUNT(DISTINCT o.OrderID) as orders,
+        COUNT(DISTINCT co.CustomerID) as customers,
+        SUM(od.Quantity) as units_sold,
+        SUM(od.Quantity * p.Price) as revenue
+    FROM Orders o
+    JOIN OrderDetails od USING(OrderID)
+    JOIN Products p USING(ProductID)
+    JOIN CustomerOrders co USING(OrderID)
+"""
+
+# Transaction-level advisory lock per rollup day; the key is the day number
+# under a lock class of its own
+LOCK_SALES_DAYS = """
+SELECT pg_advisory_xact_lock(hashtext('DailySalesRollup'), d - DATE '2000-01-01')
+FROM UNNEST(%s::date[]) AS d
+ORDER BY d;
+"""
+
+async def refresh_sales_days(days: Iterable[date]):
+    """
+    Recompute the daily sales rollup for the given order dates.
+    Days that no longer have any orders are removed from the rollup.
+
+    Call it inside the transaction that changed the orders. Each day is
+    locked until that transaction commits and recomputed afterwards, from a
+    snapshot that includes every earlier writer of the day, so concurrent
+    refreshes cannot overwrite a newer total with an older one.
+    """
+    days = sorted({day for day in days if day is not None})
+    if not days:
+        return
+    query = f"""
+    WITH fresh AS (
+        {DAILY_SALES_SELECT}
+        WHERE o.OrderDate = ANY(%s::date[])
+        GROUP BY o.OrderDate
+    ),
+    removed AS (
+        DELETE FROM DailySalesRollup r
+        WHERE r.SaleDate = ANY(%s::date[])
+        AND NOT EXISTS (SELECT 1 FROM fresh f WHERE f.sale_date = r.SaleDate)
+    )
+    INSERT INTO DailySalesRollup (SaleDate, Orders, Customers, UnitsSold, Revenue, UpdatedAt)
+    SELECT sale_date, orders, customers, units_sold, revenue, NOW()
+    FROM fresh
+    ON CONFLICT (SaleDate) DO UPDATE SET
+        Orders = EXCLUDED.Orders,
+        Customers = EXCLUDED.Customers,
+        UnitsSold = EXCLUDED.UnitsSold,
+        Revenue = EXCLUDED.Revenue,
+        UpdatedAt = EXCLUDED.UpdatedAt;
+    """
+    async with transaction():
+        # Locks are taken in date order, so writers of overlapping days
+        # queue up instead of deadlocking
+        await execute_query(LOCK_SALES_DAYS, (days,))
+        await execute_query(query, (days, days))
+
+# Aggregates one row per order month from the raw order tables; shared by
+# the dashboard monthly metrics and the trend analytics
+MONTHLY_METRICS_SELECT = """
+    SELECT
+        DATE_TRUNC('month', o.OrderDate)::date as month,
+        COUNT(DISTINCT o.OrderID) as orders,
+        COUNT(DISTINCT co.CustomerID) as customers,
+        SUM(od.Quantity) as units,
+        SUM(od.Quantity * p.Price) as revenue,
+        COUNT(DISTINCT p.ProductID) as unique_products
+    FROM Orders o
+    JOIN OrderDetails od USING(OrderID)
+    JOIN Products p USING(ProductID)
+    JOIN CustomerOrders co USING(OrderID)
+"""
+
+# Same as LOCK_SALES_DAYS, per month of the cube
+LOCK_METRICS_MONTHS = """
+SELECT pg_advisory_xact_lock(
+    hashtext('MonthlyMetricsCube'),
+    (EXTRACT(YEAR FROM m) * 12 + EXTRACT(MONTH FROM m))::int
+)
+FROM UNNEST(%s::date[]) AS m
+ORDER BY m;
+"""
+
+async def refresh_monthly_metrics(days: Iterable[date]):
+    """
+    Recompute the monthly metrics cube for the months containing the given
+    order dates. Months that no longer have any orders are removed.
+
+    Call it inside the transaction that changed the orders; like
+    refresh_sales_days, each month is locked until commit and recomputed
+    afterwards. Customers and UniqueProducts are distinct counts, so the
+    month is recomputed rather than adjusted by deltas.
+    """
+    months = sorted({day.replace(day=1) for day in days if day is not None})
+    if not months:
+        return
+    # Filter on an OrderDate range per month so the OrderDate index is used
+    query = f"""
+    WITH fresh AS (
+        {MONTHLY_METRICS_SELECT}
+        JOIN UNNEST(%s::date[]) AS m(month_start)
+          ON o.OrderDate >= m.month_start
+         AND o.OrderDate < m.month_start + INTERVAL '1 month'
+        GROUP BY DATE_TRUNC('month', o.OrderDate)
+    ),
+    removed AS (
+        DELETE FROM MonthlyMetricsCube c
+        WHERE c.Month = ANY(%s::date[])
+        AND NOT EXISTS (SELECT 1 FROM fresh f WHERE f.month = c.Month)
+    )
+    INSERT INTO MonthlyMetricsCube (Month, Orders, Customers, Units, Revenue, UniqueProducts, UpdatedAt)
+    SELECT month, orders, customers, units, revenue, unique_products, NOW()
+    FROM fresh
+    ON CONFLICT (Month) DO UPDATE SET
+        Orders = EXCLUDED.Orders,
+        Customers = EXCLUDED.Customers,
+        Units = EXCLUDED.Units,
+        Revenue = EXCLUDED.Revenue,
+        UniqueProducts = EXCLUDED.UniqueProducts,
+        UpdatedAt = EXCLUDED.UpdatedAt;
+    """
+    async with transaction():
+        await execute_query(LOCK_METRICS_MONTHS, (months,))
+        await execute_query(query, (months, months))
+
+async def refresh_for_order_dates(days: Iterable[date]):
+    """
+    Refresh every derived table affected by changes to orders on these dates.
+    Call it inside the transaction that changed the orders.
+    """
+    days = [day for day in days if day is not None]
+    async with transaction():
+        await refresh_sales_days(days)
+        await refresh_monthly_metrics(days)
+
+async def get_product_order_days(product_id: int) -> List[date]:
+    """
+    Get the order dates on which a product was sold, i.e. the rollup days
+    affected by a change to that product.
+    """
+    query = """
+    SELECT DISTINCT o.OrderDate as order_date
+    FROM Orders o
+    JOIN OrderDetails od USING(OrderID)
+    WHERE od.ProductID = %s;
+    """
+    result = await execute_query(query, (product_id,))
+    return [row['order_date'] for row in result or []]
+
+async def rebuild_sales_rollup():
+    """
+    Rebuild the whole daily sales rollup from the raw order tables.
+    """
+    query = f"""
+    WITH fresh AS (
+        {DAILY_SALES_SELECT}
+        GROUP BY o.OrderDate
+    ),
+    removed AS (
+        DELETE FROM DailySalesRollup r
+        WHERE NOT EXISTS (SELECT 1 FROM fresh f WHERE f.sale_date = r.SaleDate)
+    )
+    INSERT INTO DailySalesRollup (SaleDate, Orders, Customers, UnitsSold, Revenue, UpdatedAt)
+    SELECT sale_date, orders, customers, units_sold, revenue, NOW()
+    FROM fresh
+    ON CONFLICT (SaleDate) DO UPDATE SET
+        Orders = EXCLUDED.Orders,
+        Customers = EXCLUDED.Customers,
+        UnitsSold = EXCLUDED.UnitsSold,
+        Revenue = EXCLUDED.Revenue,
+        UpdatedAt = EXCLUDED.UpdatedAt
+    RETURNING SaleDate;
+    """
+    result = await execute_query(query)
+    return len(result or [])
+
+async def check_sales_rollup():
+    """
+    Compare the daily sales rollup with the raw order tables.
+
+    Returns:
+        list: Days whose stored and recomputed values differ
+    """
+    query = f"""
+    WITH fresh AS (
+        {DAILY_SALES_SELECT}
+        GROUP BY o.OrderDate
+    )
+    SELECT
+        COALESCE(f.sale_date, r.SaleDate) as sale_date,
+        r.Orders as stored_orders,
+        f.orders as actual_orders,
+        r.Customers as stored_customers,
+        f.customers as actual_customers,
+        r.UnitsSold as stored_units_sold,
+        f.units_sold as actual_units_sold,
+        r.Revenue as stored_revenue,
+        f.revenue as actual_revenue
+    FROM fresh f
+    FULL OUTER JOIN DailySalesRollup r ON r.SaleDate = f.sale_date
+    WHERE r.Orders IS DISTINCT FROM f.orders
+       OR r.Customers IS DISTINCT FROM f.customers
+       OR r.UnitsSold IS DISTINCT FROM f.units_sold
+       OR r.Revenue IS DISTINCT FROM f.revenue
+    ORDER BY sale_date;
+    """
+    return await execute_query(query) or []
+
+async def rebuild_monthly_metrics():
+    """
+    Rebuild the whole monthly metrics cube from the raw order tables.
+    """
+    query = f"""
+    WITH fresh AS (
+        {MONTHLY_METRICS_SELECT}
+        GROUP BY DATE_TRUNC('month', o.OrderDate)
+    ),
+    removed AS (
+        DELETE FROM MonthlyMetricsCube c
+        WHERE NOT EXISTS (SELECT 1 FROM fresh f WHERE f.month = c.Month)
+    )
+    INSERT INTO MonthlyMetricsCube (Month, Orders, Customers, Units, Revenue, UniqueProducts, UpdatedAt)
+    SELECT month, orders, customers, units, revenue, unique_products, NOW()
+    FROM fresh
+    ON CONFLICT (Month) DO UPDATE SET
+        Orders = EXCLUDED.Orders,
+        Customers = EXCLUDED.Customers,
+        Units = EXCLUDED.Units,
+        Revenue = EXCLUDED.Revenue,
+        UniqueProducts = EXCLUDED.UniqueProducts,
+        UpdatedAt = EXCLUDED.UpdatedAt
+    RETURNING Month;
+    """
+    result = await execute_query(query)
+    return len(result or [])
+
+async def check_monthly_metrics():
+    """
+    Compare the monthly metrics cube with the raw order tables.
+
+    Returns:
+        list: Months whose stored and recomputed values differ
+    """
+    query = f"""
+    WITH fresh AS (
+        {MONTHLY_METRICS_SELECT}
+        GROUP BY DATE_TRUNC('month', o.OrderDate)
+    )
+    SELECT
+        COALESCE(f.month, c.Month) as month,
+        c.Orders as stored_orders,
+        f.orders as actual_orders,
+        c.Customers as stored_customers,
+        f.customers as actual_customers,
+        c.Units as stored_units,
+        f.units as actual_units,
+        c.Revenue as stored_revenue,
+        f.revenue as actual_revenue,
+        c.UniqueProducts as stored_unique_products,
+        f.unique_products as actual_unique_products
+    FROM fresh f
+    FULL OUTER JOIN MonthlyMetricsCube c ON c.Month = f.month
+    WHERE c.Orders IS DISTINCT FROM f.orders
+       OR c.Customers IS DISTINCT FROM f.customers
+       OR c.Units IS DISTINCT FROM f.units
+       OR c.Revenue IS DISTINCT FROM f.revenue
+       OR c.UniqueProducts IS DISTINCT FROM f.unique_products
+    ORDER BY month;
+    """
+    return await execute_query(query) or []
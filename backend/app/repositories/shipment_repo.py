@@ -1,5 +1,6 @@
 from fastapi import HTTPException
-from app.config.database import execute_query
+from app.config.async_database import execute_query, execute_values, transaction
+from app.repositories import order_repo
 from app.schemas.shipment import ShipmentCreate, ShipmentUpdate
 from typing import List, Optional
 from datetime import date
@@ -30,7 +31,7 @@ LEFT JOIN Products p ON sd.ProductID = p.ProductID
 GROUP BY s.ShipmentID, s.OrderID, s.ShipmentDate, o.OrderDate
 ORDER BY s.ShipmentDate DESC;
 """
-    return execute_query(query)
+    return await execute_query(query)
 
 async def get_late_shipments():
     query="""
@@ -50,7 +51,7 @@ WHERE s.ShipmentDate IS NULL
    OR (EXTRACT(EPOCH FROM (s.ShipmentDate::timestamp - o.OrderDate::timestamp)) / 86400) > 7
 ORDER BY o.OrderDate;
     """
-    return execute_query(query)
+    return await execute_query(query)
 
 async def get_shipment_by_id(shipment_id: int):
     query = """
@@ -77,35 +78,33 @@ async def get_shipment_by_id(shipment_id: int):
     WHERE s.ShipmentID = %s
     GROUP BY s.ShipmentID, s.OrderID, s.ShipmentDate, o.OrderDate;
     """
-    result = execute_query(query, (shipment_id,))
+    result = await execute_query(query, (shipment_id,))
     return result[0] if result else None
 
 async def create_shipment(shipment: ShipmentCreate):
-    # Start transaction
     query = """
     INSERT INTO Shipments (OrderID, ShipmentDate)
     VALUES (%s, %s)
     RETURNING ShipmentID;
     """
-    result = execute_query(
-        query, 
-        (shipment.order_id, shipment.shipment_date)
-    )
-    
-    if result and shipment.details:
+    # Shipment, its details and the order status commit together
+    async with transaction():
+        result = await execute_query(
+            query, 
+            (shipment.order_id, shipment.shipment_date)
+        )
+        if not result:
+            return None
         shipment_id = result[0]['shipmentid']
-        # Insert shipment details
-        details_query = """
-        INSERT INTO ShipmentDetails (ShipmentID, ProductID, Quantity)
-        VALUES (%s, %s, %s);
-        """
-        for detail in shipment.details:
-            execute_query(
-                details_query,
-                (shipment_id, detail.product_id, detail.quantity)
+        
+        if shipment.details:
+            await execute_values(
+                "INSERT INTO ShipmentDetails (ShipmentID, ProductID, Quantity) VALUES %s;",
+                [(shipment_id, detail.product_id, detail.quantity) for detail in shipment.details]
             )
-        return await get_shipment_by_id(shipment_id)
-    return None
+        await order_repo.refresh_order_totals([shipment.order_id])
+    
+    return await get_shipment_by_id(shipment_id)
 
 async def update_shipment(shipment_id: int, shipment: ShipmentUpdate):
     update_fields = []
@@ -122,39 +121,37 @@ async def update_shipment(shipment_id: int, shipment: ShipmentUpdate):
     UPDATE Shipments 
     SET {", ".join(update_fields)}
     WHERE ShipmentID = %s
-    RETURNING ShipmentID;
+    RETURNING ShipmentID, OrderID as order_id;
     """
     params.append(shipment_id)
     
-    result = execute_query(query, tuple(params))
-    
-    if result and shipment.details:
-        # Update shipment details
-        # First delete existing details
-        execute_query(
-            "DELETE FROM ShipmentDetails WHERE ShipmentID = %s",
-            (shipment_id,)
-        )
-        # Then insert new details
-        details_query = """
-        INSERT INTO ShipmentDetails (ShipmentID, ProductID, Quantity)
-        VALUES (%s, %s, %s);
-        """
-        for detail in shipment.details:
-            execute_query(
-                details_query,
-                (shipment_id, detail.product_id, detail.quantity)
+    async with transaction():
+        result = await execute_query(query, tuple(params))
+        if not result:
+            return None
+        
+        if shipment.details:
+            # Replace the existing details
+            await execute_query(
+                "DELETE FROM ShipmentDetails WHERE ShipmentID = %s",
+                (shipment_id,)
+            )
+            await execute_values(
+                "INSERT INTO ShipmentDetails (ShipmentID, ProductID, Quantity) VALUES %s;",
+                [(shipment_id, detail.product_id, detail.quantity) for detail in shipment.details]
             )
+        await order_repo.refresh_order_totals([result[0]['order_id']])
     
-    if result:
-        return await get_shipment_by_id(shipment_id)
-    return None
+    return await get_shipment_by_id(shipment_id)
 
 async def delete_shipment(shipment_id: int):
     query = """
     DELETE FROM Shipments 
     WHERE ShipmentID = %s
-    RETURNING ShipmentID;
+    RETURNING ShipmentID, OrderID as order_id;
     """
-    result = execute_query(query, (shipment_id,))
+    async with transaction():
+        result = await execute_query(query, (shipment_id,))
+        if result:
+            await order_repo.refresh_order_totals([result[0]['order_id']])
     return bool(result)
\ No newline at end of file
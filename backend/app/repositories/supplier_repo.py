@@ -1,10 +1,77 @@
+import os
 from fastapi import HTTPException
-from app.config.database import execute_query
+from app.config.async_database import execute_query
 from app.schemas.supplier import SupplierCreate, SupplierUpdate
+from app.utils.batch_loader import load_by_id
+from app.utils.pagination import keyset_clause
+from app.utils.prefix_index import PrefixIndex
 from typing import List, Optional
 
-async def get_all_suppliers():
-    query = """
+# Allowed sort keys: API name -> (SQL column, cursor value converter)
+SORT_KEYS = {
+    'supplier_id': ('s.id', int),
+    'name': ('s.Name', str),
+}
+
+SEARCH_CONDITION = "LOWER(s.Name) LIKE LOWER(%s)"
+
+# Supplier id/name pairs for /suppliers/autocomplete, maintained the same
+# way as customer_repo.name_index
+name_index = PrefixIndex(max_age=float(os.getenv('AUTOCOMPLETE_MAX_AGE', '300')))
+
+async def _fetch_names():
+    result = await execute_query("SELECT id, Name as name FROM Users WHERE Role = 'supplier';")
+    return [(row['id'], row['name']) for row in result or []]
+
+async def load_name_index():
+    await name_index.reload(_fetch_names)
+
+async def autocomplete_suppliers(prefix: str, limit: int = 10):
+    """
+    Get up to `limit` suppliers with a name word starting with `prefix`,
+    served from the in-memory name index.
+    """
+    if name_index.needs_load():
+        await load_name_index()
+    return [
+        {'supplier_id': supplier_id, 'name': name}
+        for supplier_id, name in name_index.search(prefix, limit)
+    ]
+
+async def _get_suppliers(
+    condition: Optional[str],
+    condition_params: list,
+    sort: str,
+    descending: bool,
+    limit: Optional[int],
+    cursor: Optional[dict]
+):
+    sort_column = SORT_KEYS[sort][0]
+    cursor_values = (cursor[sort], cursor['supplier_id']) if cursor else None
+    keyset, keyset_params, order_by = keyset_clause(
+        sort_column, 's.id', descending, cursor_values
+    )
+
+    # Select the page of suppliers first so delivery stats are only
+    # aggregated for the rows that are returned
+    page_query = """
+    SELECT s.id, s.Name, s.ContactInfo
+    FROM Users s
+    WHERE s.Role = 'supplier'
+    """
+    params = list(condition_params)
+    if condition:
+        page_query += f" AND {condition}"
+    if keyset:
+        page_query += f" AND {keyset}"
+        params.extend(keyset_params)
+    page_query += f" ORDER BY {order_by}"
+    if limit:
+        page_query += " LIMIT %s"
+        params.append(limit + 1)
+
+    query = f"""
+    WITH page AS ({page_query})
     SELECT 
         s.id as supplier_id,
         s.Name as name,
@@ -13,16 +80,45 @@ async def get_all_suppliers():
         COALESCE(AVG(CASE WHEN sh.ShipmentDate IS NOT NULL 
                  THEN DATE_PART('day', sh.ShipmentDate::timestamp - o.OrderDate::timestamp)
                  ELSE 0 END), 0) as avg_delivery_days
-    FROM Users s
+    FROM page s
     LEFT JOIN Orders o ON s.id = o.SupplierID
     LEFT JOIN Shipments sh ON o.OrderID = sh.OrderID
-    WHERE s.Role = 'supplier'
     GROUP BY s.id, s.Name, s.ContactInfo
-    ORDER BY s.id;
+    ORDER BY {order_by};
     """
-    return execute_query(query)
+    return await execute_query(query, tuple(params) if params else None)
+
+async def get_all_suppliers(
+    sort: str = 'supplier_id',
+    descending: bool = False,
+    limit: Optional[int] = None,
+    cursor: Optional[dict] = None
+):
+    """
+    Get suppliers ordered by an allowed sort key. With `limit`, one extra row
+    is fetched so the caller can detect a following page.
+    """
+    return await _get_suppliers(None, [], sort, descending, limit, cursor)
+
+async def count_suppliers(search_term: Optional[str] = None):
+    query = "SELECT COUNT(*) AS total FROM Users s WHERE s.Role = 'supplier'"
+    params = None
+    if search_term:
+        query += f" AND {SEARCH_CONDITION}"
+        params = (f"%{search_term}%",)
+    result = await execute_query(query, params)
+    return result[0]['total'] if result else 0
 
 async def get_supplier_by_id(supplier_id: int):
+    """
+    Get one supplier. Concurrent lookups within a request are fetched
+    together by get_suppliers_by_ids.
+    """
+    return await load_by_id(
+        'suppliers', supplier_id, _get_supplier_by_id, get_suppliers_by_ids, 'supplier_id'
+    )
+
+async def _get_supplier_by_id(supplier_id: int):
     query = """
     SELECT 
         s.id as supplier_id,
@@ -38,9 +134,34 @@ async def get_supplier_by_id(supplier_id: int):
     WHERE s.id = %s AND s.Role = 'supplier'
     GROUP BY s.id, s.Name, s.ContactInfo;
     """
-    result = execute_query(query, (supplier_id,))
+    result = await execute_query(query, (supplier_id,))
     return result[0] if result else None
 
+async def get_suppliers_by_ids(supplier_ids: List[int]):
+    """
+    Get several suppliers in one query, in the order of `supplier_ids`.
+    """
+    if not supplier_ids:
+        return []
+    query = """
+    SELECT 
+        s.id as supplier_id,
+        s.Name as name,
+        s.ContactInfo as contact_info,
+        COUNT(DISTINCT o.OrderID) as total_orders,
+        COALESCE(AVG(CASE WHEN sh.ShipmentDate IS NOT NULL 
+                 THEN DATE_PART('day', sh.ShipmentDate::timestamp - o.OrderDate::timestamp)
+                 ELSE 0 END), 0) as avg_delivery_days    
+    FROM Users s
+    LEFT JOIN Orders o ON s.id = o.SupplierID
+    LEFT JOIN Shipments sh ON o.OrderID = sh.OrderID
+    WHERE s.id = ANY(%s::int[]) AND s.Role = 'supplier'
+    GROUP BY s.id, s.Name, s.ContactInfo
+    ORDER BY array_position(%s::int[], s.id);
+    """
+    supplier_ids = list(supplier_ids)
+    return await execute_query(query, (supplier_ids, supplier_ids)) or []
+
 async def get_supplier_performance():
     query="""
     WITH SupplierStats AS (
@@ -65,7 +186,7 @@ async def get_supplier_performance():
     WHERE avg_delivery_days < (SELECT AVG(avg_delivery_days) FROM SupplierStats)
     ORDER BY total_orders DESC;
     """
-    return execute_query(query)
+    return await execute_query(query)
 
 async def create_supplier(supplier: SupplierCreate):
     query = """
@@ -73,8 +194,9 @@ async def create_supplier(supplier: SupplierCreate):
     VALUES (%s, %s, 'supplier')
     RETURNING id;
     """
-    result = execute_query(query, (supplier.name, supplier.contact_info))
+    result = await execute_query(query, (supplier.name, supplier.contact_info))
     if result:
+        name_index.upsert(result[0]['id'], supplier.name)
         return await get_supplier_by_id(result[0]['id'])
     return None
 
@@ -99,8 +221,10 @@ async def update_supplier(supplier_id: int, supplier: SupplierUpdate):
     """
     params.append(supplier_id)
     
-    result = execute_query(query, tuple(params))
+    result = await execute_query(query, tuple(params))
     if result:
+        if supplier.name is not None:
+            name_index.upsert(supplier_id, supplier.name)
         return await get_supplier_by_id(supplier_id)
     return None
 
@@ -110,24 +234,19 @@ async def delete_supplier(supplier_id: int):
     WHERE id = %s AND Role = 'supplier'
     RETURNING id;
     """
-    result = execute_query(query, (supplier_id,))
+    result = await execute_query(query, (supplier_id,))
+    if result:
+        name_index.remove(supplier_id)
     return bool(result)
 
-async def search_suppliers(search_term: str):
-    query = """
-    SELECT 
-        s.id as supplier_id,
-        s.Name as name,
-        s.ContactInfo as contact_info,
-        COUNT(DISTINCT o.OrderID) as total_orders,
-        COALESCE(AVG(CASE WHEN sh.ShipmentDate IS NOT NULL 
-                THEN DATE_PART('day', sh.ShipmentDate::timestamp - o.OrderDate::timestamp)
-                ELSE 0 END), 0) as avg_delivery_days
-    FROM Users s
-    LEFT JOIN Orders o ON s.id = o.SupplierID
-    LEFT JOIN Shipments sh ON o.OrderID = sh.OrderID
-    WHERE LOWER(s.Name) LIKE LOWER(%s) AND s.Role = 'supplier'
-    GROUP BY s.id, s.Name, s.ContactInfo;
-    """
+async def search_suppliers(
+    search_term: str,
+    sort: str = 'supplier_id',
+    descending: bool = False,
+    limit: Optional[int] = None,
+    cursor: Optional[dict] = None
+):
     search_pattern = f"%{search_term}%"
-    return execute_query(query, (search_pattern,))
\ No newline at end of file
+    return await _get_suppliers(
+        SEARCH_CONDITION, [search_pattern], sort, descending, limit, cursor
+    )
\ No newline at end of file
@@ -0,0 +1,95 @@
+import asyncio
+import logging
+from app.config.async_database import execute_query
+from typing import Iterable
+
+logger = logging.getLogger(__name__)
+
+# Tables whose changes are counted by the bump_table_version() statement
+# trigger (see alembic/versions/0003 and 0006)
+VERSIONED_TABLES = (
+    'users',
+    'products',
+    'inventory',
+    'orders',
+    'customerorders',
+    'orderdetails',
+    'paymentdetails',
+    'shipments',
+    'shipmentdetails',
+)
+
+# Uncompacted TableChanges rows of a table before a read folds them into
+# TableVersions; keeps the COUNT(*) in get_table_versions small
+COMPACT_THRESHOLD = 1000
+
+_compaction = None
+
+async def get_table_versions(tables: Iterable[str]) -> dict:
+    """
+    Get the change counter of each table: its compacted base in
+    TableVersions plus the change rows written since. Tables that were
+    never written since the triggers were installed report version 0.
+
+    Every committed write adds exactly one change row, whatever the commit
+    order, so the version grows with each commit and never repeats.
+
+    Args:
+        tables (Iterable[str]): Lower-case table names
+
+    Returns:
+        dict: Table name mapped to its version
+    """
+    tables = sorted({table.lower() for table in tables})
+    query = """
+    SELECT
+        t.table_name,
+        COALESCE(v.Version, 0) as base,
+        (SELECT COUNT(*) FROM TableChanges c WHERE c.TableName = t.table_name) as pending
+    FROM unnest(%s::text[]) AS t(table_name)
+    LEFT JOIN TableVersions v ON v.TableName = t.table_name;
+    """
+    result = await execute_query(query, (tables,))
+    versions = {table: 0 for table in tables}
+    versions.update({row['table_name']: row['base'] + row['pending'] for row in result or []})
+    if any(row['pending'] > COMPACT_THRESHOLD for row in result or []):
+        _schedule_compaction()
+    return versions
+
+async def compact_table_versions() -> int:
+    """
+    Fold the committed TableChanges rows into the TableVersions base in one
+    transaction, so every version stays the same. Only this function
+    updates TableVersions, so writers never wait for it.
+
+    Returns:
+        int: Number of change rows folded
+    """
+    query = """
+    WITH moved AS (
+        DELETE FROM TableChanges RETURNING TableName
+    ), counts AS (
+        SELECT TableName, COUNT(*) as changes FROM moved GROUP BY TableName
+    ), folded AS (
+        INSERT INTO TableVersions (TableName, Version)
+        SELECT TableName, changes FROM counts
+        ON CONFLICT (TableName) DO UPDATE SET Version = TableVersions.Version + EXCLUDED.Version
+        RETURNING Version
+    )
+    SELECT COALESCE(SUM(changes), 0) as folded FROM counts;
+    """
+    result = await execute_query(query)
+    return int(result[0]['folded']) if result else 0
+
+def _schedule_compaction():
+    global _compaction
+    if _compaction is not None and not _compaction.done():
+        return
+    _compaction = asyncio.get_running_loop().create_task(_compact())
+
+async def _compact():
+    try:
+        folded = await compact_table_versions()
+        logger.info(f"Compacted {folded} table change rows")
+    except Exception as e:
+        logger.warning(f"Table version compaction failed: {e}")
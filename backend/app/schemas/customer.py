@@ -14,6 +14,10 @@ class CustomerUpdate(BaseModel):
     name: Optional[str] = Field(None, min_length=1, max_length=100)
     contact_info: Optional[str] = None
 
+class CustomerAutocomplete(BaseModel):
+    customer_id: int
+    name: str
+
 class CustomerResponse(CustomerBase):
     customer_id: int
     total_orders: int = 0
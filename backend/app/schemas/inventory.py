@@ -1,10 +1,15 @@
-from pydantic import BaseModel, Field
-from typing import Optional
+from pydantic import BaseModel, Field, model_validator
+from typing import List, Optional, Literal
 from decimal import Decimal
+from datetime import datetime
 
 class InventoryUpdate(BaseModel):
     quantity: int = Field(..., ge=0)
 
+class InventoryBatchItem(BaseModel):
+    product_id: int
+    quantity: int = Field(..., ge=0)
+
 class InventoryResponse(BaseModel):
     inventory_id: int
     product_id: int
@@ -16,6 +21,46 @@ class InventoryResponse(BaseModel):
     class Config:
         from_attributes = True
 
+class InventoryBatchError(BaseModel):
+    product_id: int
+    detail: str
+
+class InventoryBatchResponse(BaseModel):
+    updated: List[InventoryResponse]
+    errors: List[InventoryBatchError]
+
+class StockMovementCreate(BaseModel):
+    product_id: int
+    movement_type: Literal['receive', 'dispense', 'adjust']
+    delta: int
+    reason: Optional[str] = Field(None, max_length=200)
+
+    @model_validator(mode='after')
+    def validate_delta(self):
+        if self.movement_type == 'receive' and self.delta <= 0:
+            raise ValueError('A receive movement needs a positive delta')
+        if self.movement_type == 'dispense' and self.delta >= 0:
+            raise ValueError('A dispense movement needs a negative delta')
+        if self.delta == 0:
+            raise ValueError('Delta must not be zero')
+        return self
+
+class StockMovementResponse(BaseModel):
+    movement_id: int
+    product_id: int
+    movement_type: str
+    delta: int
+    reason: Optional[str]
+    quantity_after: int
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
+
+class StockMovementBatchResponse(BaseModel):
+    movements: List[StockMovementResponse]
+    errors: List[InventoryBatchError]
+
 class StockAlert(BaseModel):
     product_id: int
     name: str
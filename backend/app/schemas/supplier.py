@@ -13,6 +13,10 @@ class SupplierUpdate(BaseModel):
     name: Optional[str] = Field(None, min_length=1, max_length=100)
     contact_info: Optional[str] = None
 
+class SupplierAutocomplete(BaseModel):
+    supplier_id: int
+    name: str
+
 class SupplierResponse(SupplierBase):
     supplier_id: int
     total_orders: Optional[int] = 0
@@ -0,0 +1,97 @@
+import asyncio
+from typing import Awaitable, Callable, Dict, List, Optional
+from app.config.async_database import in_transaction
+from app.utils.request_context import current_loaders
+
+# Most ids per ANY(%s) query, and per `ids=` multi-get request
+MAX_BATCH_SIZE = 500
+
+
+class BatchLoader:
+    """
+    Coalesces concurrent lookups by id into one query, in the style of
+    DataLoader: ids requested while the event loop is busy with other tasks
+    are collected and fetched together on its next iteration.
+
+    Only in-flight lookups are shared. Rows are not cached once returned,
+    so a lookup after a write in the same request sees the new data.
+    """
+
+    def __init__(self, fetch_one: Callable[[int], Awaitable[Optional[dict]]],
+                 fetch_many: Callable[[List[int]], Awaitable[List[dict]]], key: str):
+        self.fetch_one = fetch_one
+        self.fetch_many = fetch_many
+        self.key = key
+        self._pending: Dict[int, asyncio.Future] = {}
+        self._tasks = set()    # keeps running batches referenced
+
+    async def load(self, row_id: int) -> Optional[dict]:
+        future = self._pending.get(row_id)
+        if future is None:
+            loop = asyncio.get_running_loop()
+            if not self._pending:
+                loop.call_soon(self._dispatch)
+            future = self._pending[row_id] = loop.create_future()
+        # Shielded, so one cancelled caller does not fail the others
+        return await asyncio.shield(future)
+
+    def _dispatch(self):
+        pending, self._pending = self._pending, {}
+        task = asyncio.ensure_future(self._fetch(pending))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _fetch_rows(self, ids: List[int]) -> List[dict]:
+        if len(ids) == 1:
+            # A lone lookup keeps its prepared single-row statement
+            row = await self.fetch_one(ids[0])
+            return [row] if row else []
+        rows = []
+        for start in range(0, len(ids), MAX_BATCH_SIZE):
+            rows.extend(await self.fetch_many(ids[start:start + MAX_BATCH_SIZE]))
+        return rows
+
+    async def _fetch(self, pending: Dict[int, asyncio.Future]):
+        try:
+            rows = await self._fetch_rows(list(pending))
+        except Exception as e:
+            for future in pending.values():
+                future.set_exception(e)
+            return
+        except BaseException:
+            # Cancelled on shutdown: release the callers
+            for future in pending.values():
+                future.cancel()
+            raise
+        by_id = {row[self.key]: row for row in rows}
+        for row_id, future in pending.items():
+            future.set_result(by_id.get(row_id))
+
+async def load_by_id(name: str, row_id: int,
+                     fetch_one: Callable[[int], Awaitable[Optional[dict]]],
+                     fetch_many: Callable[[List[int]], Awaitable[List[dict]]],
+                     key: str) -> Optional[dict]:
+    """
+    Look up one row through the current request's loader `name`, so that
+    concurrent lookups of the same kind become one `fetch_many` query.
+
+    Outside a request, and inside a transaction (whose statements must stay
+    on its connection), `fetch_one` is called directly.
+
+    Args:
+        name (str): Loader name, one per kind of row, e.g. 'products'
+        row_id (int): Id to look up
+        fetch_one: Coroutine function returning the row for one id, or None
+        fetch_many: Coroutine function returning the rows for a list of ids
+        key (str): Row field holding the id
+
+    Returns:
+        dict: The row, or None if not found
+    """
+    loaders = current_loaders()
+    if loaders is None or in_transaction():
+        return await fetch_one(row_id)
+    loader = loaders.get(name)
+    if loader is None:
+        loader = loaders[name] = BatchLoader(fetch_one, fetch_many, key)
+    return await loader.load(row_id)
@@ -0,0 +1,84 @@
+import time
+import threading
+
+
+class TTLCache:
+    """
+    Small in-process cache whose entries expire after `ttl` seconds.
+
+    Writers that change the underlying data call `invalidate()` so readers
+    never wait out the TTL for their own changes. A TTL of 0 disables caching.
+    """
+
+    _MISSING = object()
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entries = {}
+        self._hits = 0
+        self._misses = 0
+        self._invalidations = 0
+        self._generation = 0
+
+    def get(self, key):
+        """
+        Return the cached value for `key`, or `TTLCache._MISSING` if it is
+        absent or expired.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > time.monotonic():
+                self._hits += 1
+                return entry[1]
+            self._entries.pop(key, None)
+            self._misses += 1
+            return self._MISSING
+
+    def set(self, key, value, generation: int = None):
+        """
+        Store `value` under `key`. When `generation` is given and an
+        invalidation happened since it was read, the value is discarded
+        because it may have been loaded from data that changed meanwhile.
+        """
+        if self.ttl <= 0:
+            return
+        with self._lock:
+            if generation is not None and generation != self._generation:
+                return
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+
+    async def get_or_load(self, key, loader):
+        """
+        Return the cached value for `key`, awaiting `loader()` on a miss.
+        """
+        value = self.get(key)
+        if value is self._MISSING:
+            generation = self._generation
+            value = await loader()
+            self.set(key, value, generation)
+        return value
+
+    def invalidate(self, key=None):
+        """
+        Drop one entry, or every entry when `key` is None.
+        """
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
+            self._invalidations += 1
+            self._generation += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                'ttl_seconds': self.ttl,
+                'entries': len(self._entries),
+                'hits': self._hits,
+                'misses': self._misses,
+                'hit_ratio': round(self._hits / lookups, 3) if lookups else 0.0,
+                'invalidations': self._invalidations,
+            }
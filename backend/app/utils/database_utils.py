@@ -0,0 +1,78 @@
+"""
+Maintenance commands for tables derived from the raw order data.
+
+The tables themselves are created by the Alembic migrations; run
+`alembic upgrade head` from the backend directory first.
+
+Usage:
+    python -m app.utils.database_utils setup            # backfill all derived data
+    python -m app.utils.database_utils rebuild-orders   # recompute stored order totals
+    python -m app.utils.database_utils rebuild-sales    # rebuild the daily sales rollup
+    python -m app.utils.database_utils check-sales      # compare the rollup with raw tables
+    python -m app.utils.database_utils rebuild-monthly  # rebuild the monthly metrics cube
+    python -m app.utils.database_utils check-monthly    # compare the cube with raw tables
+"""
+import sys
+import asyncio
+import logging
+from app.config.database import close_pool
+from app.config.async_database import close_async_pool, shutdown_query_executor
+from app.repositories import rollup_repo, order_repo
+
+logger = logging.getLogger(__name__)
+
+async def rebuild_order_totals():
+    orders = await order_repo.rebuild_order_totals()
+    logger.info(f"Order totals recomputed ({orders} orders)")
+
+async def rebuild_sales_rollup():
+    days = await rollup_repo.rebuild_sales_rollup()
+    logger.info(f"Daily sales rollup rebuilt ({days} days)")
+
+async def check_sales_rollup() -> bool:
+    mismatches = await rollup_repo.check_sales_rollup()
+    for row in mismatches:
+        logger.warning(f"Daily sales rollup mismatch: {dict(row)}")
+    logger.info(f"Daily sales rollup check: {len(mismatches)} mismatched days")
+    return not mismatches
+
+async def rebuild_monthly_metrics():
+    months = await rollup_repo.rebuild_monthly_metrics()
+    logger.info(f"Monthly metrics cube rebuilt ({months} months)")
+
+async def check_monthly_metrics() -> bool:
+    mismatches = await rollup_repo.check_monthly_metrics()
+    for row in mismatches:
+        logger.warning(f"Monthly metrics cube mismatch: {dict(row)}")
+    logger.info(f"Monthly metrics cube check: {len(mismatches)} mismatched months")
+    return not mismatches
+
+async def setup():
+    await rebuild_order_totals()
+    await rebuild_sales_rollup()
+    await rebuild_monthly_metrics()
+
+COMMANDS = {
+    'setup': setup,
+    'rebuild-orders': rebuild_order_totals,
+    'rebuild-sales': rebuild_sales_rollup,
+    'check-sales': check_sales_rollup,
+    'rebuild-monthly': rebuild_monthly_metrics,
+    'check-monthly': check_monthly_metrics,
+}
+
+async def run(command: str):
+    try:
+        return await COMMANDS[command]()
+    finally:
+        await close_async_pool()
+        shutdown_query_executor()
+        close_pool()
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    if len(sys.argv) != 2 or sys.argv[1] not in COMMANDS:
+        print(__doc__)
+        sys.exit(2)
+    result = asyncio.run(run(sys.argv[1]))
+    sys.exit(1 if result is False else 0)
@@ -0,0 +1,41 @@
+import hashlib
+from typing import Iterable, Optional
+from fastapi import Request, Response
+from app.repositories import version_repo
+
+ETAG_HEADER = "ETag"
+
+def _matches(if_none_match: str, etag: str) -> bool:
+    # If-None-Match uses weak comparison, so W/ prefixes are ignored
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(
+        candidate.strip().removeprefix("W/") == opaque
+        for candidate in if_none_match.split(",")
+    )
+
+async def conditional_get(
+    request: Request,
+    response: Response,
+    tables: Iterable[str]
+) -> Optional[Response]:
+    """
+    Compute a weak ETag for a GET route from the versions of the tables it
+    reads and the request URL, and set it on `response`.
+
+    Returns:
+        Response: A 304 response if the client's copy is current, else None
+        and the route should build the body as usual
+    """
+    versions = await version_repo.get_table_versions(tables)
+    key = request.url.path + "?" + str(request.query_params) + "|" + ",".join(
+        f"{table}:{version}" for table, version in sorted(versions.items())
+    )
+    etag = f'W/"{hashlib.sha1(key.encode()).hexdigest()}"'
+
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and _matches(if_none_match, etag):
+        return Response(status_code=304, headers={ETAG_HEADER: etag})
+    response.headers[ETAG_HEADER] = etag
+    return None
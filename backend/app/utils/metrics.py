@@ -0,0 +1,198 @@
+import os
+import sys
+import time
+import threading
+from bisect import bisect_left
+from typing import Dict, Tuple
+
+# Set METRICS_ENABLED=false to turn off collection; /metrics then stays empty
+METRICS_ENABLED = os.getenv('METRICS_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+
+# Upper bounds in seconds, from sub-millisecond point lookups to slow reports
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+_REPOSITORY_PACKAGE = 'app.repositories.'
+# Frames to walk up from execute_query to the repository function; covers
+# the database helpers in between, e.g. execute_values -> transaction
+_MAX_CALLER_DEPTH = 8
+
+
+class Histogram:
+    """
+    Prometheus-style histogram with one series per label tuple. Bucket
+    counts are kept per bucket and made cumulative when rendered.
+    """
+
+    def __init__(self, name: str, help_text: str, label_names: Tuple[str, ...],
+                 buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = label_names
+        self.buckets = buckets
+        self._lock = threading.Lock()
+        self._series: Dict[tuple, list] = {}   # labels -> [bucket counts..., +Inf, sum]
+
+    def observe(self, labels: tuple, value: float):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [0] * (len(self.buckets) + 2)
+            series[index] += 1
+            series[-1] += value
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            snapshot = {labels: list(series) for labels, series in self._series.items()}
+        for labels, series in sorted(snapshot.items()):
+            label_text = _labels(self.label_names, labels)
+            cumulative = 0
+            for bound, count in zip(self.buckets + ('+Inf',), series):
+                cumulative += count
+                lines.append(f"{self.name}_bucket{{{label_text},le=\"{bound}\"}} {cumulative}")
+            lines.append(f"{self.name}_sum{{{label_text}}} {series[-1]:.6f}")
+            lines.append(f"{self.name}_count{{{label_text}}} {cumulative}")
+        return lines
+
+
+class Counter:
+    """
+    Prometheus-style counter with one value per label tuple.
+    """
+
+    def __init__(self, name: str, help_text: str, label_names: Tuple[str, ...]):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = label_names
+        self._lock = threading.Lock()
+        self._values: Dict[tuple, float] = {}
+
+    def inc(self, labels: tuple, amount: float = 1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            snapshot = dict(self._values)
+        for labels, value in sorted(snapshot.items()):
+            lines.append(f"{self.name}{{{_labels(self.label_names, labels)}}} {value:g}")
+        return lines
+
+
+def _escape(value) -> str:
+    return str(value).replace('\\', r'\\').replace('"', r'\"').replace('\n', r'\n')
+
+def _labels(names: tuple, values: tuple) -> str:
+    return ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values))
+
+
+db_query_duration = Histogram(
+    'db_query_duration_seconds',
+    'Database call latency by calling repository function.',
+    ('function', 'kind'),
+)
+db_query_rows = Counter(
+    'db_query_rows_total',
+    'Rows returned by database calls, by calling repository function.',
+    ('function',),
+)
+db_query_errors = Counter(
+    'db_query_errors_total',
+    'Failed database calls by calling repository function.',
+    ('function',),
+)
+http_request_duration = Histogram(
+    'http_request_duration_seconds',
+    'HTTP request latency by route template.',
+    ('method', 'route', 'status'),
+)
+
+REGISTRY = (db_query_duration, db_query_rows, db_query_errors, http_request_duration)
+
+# code object -> "module.function" label of the repository function
+_caller_labels = {}
+
+def caller_label() -> str:
+    """
+    Name the repository function a database helper was called from, e.g.
+    'order_repo.get_orders'. Must be called directly by the helper before
+    its first await, while the caller's frame is still on the stack.
+    Calls from outside app.repositories are labelled 'other'.
+    """
+    frame = sys._getframe(2)
+    for _ in range(_MAX_CALLER_DEPTH):
+        if frame is None:
+            break
+        code = frame.f_code
+        label = _caller_labels.get(code)
+        if label is None:
+            module = frame.f_globals.get('__name__', '')
+            if module.startswith(_REPOSITORY_PACKAGE):
+                label = f"{module[len(_REPOSITORY_PACKAGE):]}.{code.co_qualname}"
+            else:
+                # Database helpers and other non-repository frames
+                label = ''
+            _caller_labels[code] = label
+        if label:
+            return label
+        frame = frame.f_back
+    return 'other'
+
+def observe_query(function: str, kind: str, elapsed: float, result=None, failed: bool = False):
+    """
+    Record one database call made on behalf of `function`.
+    """
+    if not METRICS_ENABLED:
+        return
+    db_query_duration.observe((function, kind), elapsed)
+    if failed:
+        db_query_errors.inc((function,))
+    elif result:
+        db_query_rows.inc((function,), len(result))
+
+def render() -> str:
+    """
+    All metrics in the Prometheus text exposition format.
+    """
+    lines = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware recording the latency of every HTTP request under its
+    route template (e.g. /api/v1/orders/{order_id}), so ids in the path do
+    not create a series each. Unmatched paths share the 'unmatched' route.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if not METRICS_ENABLED or scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+        started = time.perf_counter()
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message['type'] == 'http.response.start':
+                status = message['status']
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            route = scope.get('route')
+            http_request_duration.observe(
+                (scope['method'], getattr(route, 'path', 'unmatched'), str(status)),
+                time.perf_counter() - started,
+            )
@@ -0,0 +1,88 @@
+import base64
+import json
+from datetime import date, datetime
+from decimal import Decimal
+from fastapi import HTTPException
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+TOTAL_COUNT_HEADER = "X-Total-Count"
+
+def _json_default(value):
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return str(value)
+    raise TypeError(f"Cannot encode {type(value).__name__} in a cursor")
+
+def encode_cursor(values: dict) -> str:
+    """
+    Encode the sort key of the last row of a page as an opaque cursor.
+    """
+    payload = json.dumps(values, default=_json_default, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: str, fields: dict) -> dict:
+    """
+    Decode a cursor produced by encode_cursor.
+
+    Args:
+        cursor (str): Opaque cursor from a previous page
+        fields (dict): Expected keys mapped to a converter, e.g. {'order_id': int}
+
+    Returns:
+        dict: Converted cursor values
+
+    Raises:
+        HTTPException: 400 if the cursor is malformed or does not match `fields`
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if set(values) != set(fields):
+            raise ValueError("unexpected cursor fields")
+        return {
+            key: None if values[key] is None else convert(values[key])
+            for key, convert in fields.items()
+        }
+    except (ValueError, TypeError, KeyError, ArithmeticError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+def keyset_clause(sort_column: str, id_column: str, descending: bool, cursor_values: tuple):
+    """
+    Build the ORDER BY and keyset predicate for a (sort column, unique id) ordering.
+
+    Args:
+        sort_column (str): SQL expression to sort by (from an allowed list)
+        id_column (str): Unique SQL column used as tie-breaker
+        descending (bool): Sort direction
+        cursor_values (tuple): (sort value, id) of the last row seen, or None
+
+    Returns:
+        tuple: (predicate SQL or None, predicate params, ORDER BY SQL)
+    """
+    direction = "DESC" if descending else "ASC"
+    op = "<" if descending else ">"
+    if sort_column == id_column:
+        order_by = f"{id_column} {direction}"
+        if cursor_values is None:
+            return None, [], order_by
+        return f"{id_column} {op} %s", [cursor_values[-1]], order_by
+
+    order_by = f"{sort_column} {direction}, {id_column} {direction}"
+    if cursor_values is None:
+        return None, [], order_by
+    return f"({sort_column}, {id_column}) {op} (%s, %s)", list(cursor_values), order_by
+
+def split_page(rows: list, limit: int, fields: tuple):
+    """
+    Trim a result fetched with limit + 1 rows and build the next cursor.
+
+    Returns:
+        tuple: (rows for this page, next cursor or None if this is the last page)
+    """
+    rows = rows or []
+    if limit is None or len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    last = rows[-1]
+    return rows, encode_cursor({field: last[field] for field in fields})
@@ -0,0 +1,149 @@
+import re
+import time
+import asyncio
+import threading
+from bisect import bisect_left, insort
+from typing import Awaitable, Callable, Iterable, List, Optional, Tuple
+
+
+def _normalize(text: str) -> str:
+    return " ".join(text.lower().split())
+
+
+class PrefixIndex:
+    """
+    In-memory autocomplete index of (id, name) pairs.
+
+    Every name is stored once per word, as the remainder of the name from
+    that word on, in a sorted array. A query is then a binary search for the
+    first key starting with it, so "smi" finds "John Smith" and "john sm"
+    finds it too. Lookups cost O(log n + k) and never touch the database.
+    """
+
+    def __init__(self, max_age: float = 0):
+        # Seconds after which the owner should reload the index from the
+        # database, e.g. to pick up writes made by other worker processes;
+        # 0 keeps it until the process exits
+        self.max_age = max_age
+        self._lock = threading.Lock()
+        self._keys: List[Tuple[str, int]] = []   # sorted (key, id)
+        self._names = {}                          # id -> name
+        self.loaded_at: Optional[float] = None
+        # Serializes reload(); writes made while one runs are journaled
+        # and applied again on top of its snapshot
+        self._reload_lock = asyncio.Lock()
+        self._journal: Optional[List[Tuple[int, Optional[str]]]] = None
+        self._loads = 0
+
+    @staticmethod
+    def _keys_for(item_id: int, name: str) -> List[Tuple[str, int]]:
+        normalized = _normalize(name)
+        starts = [match.start() for match in re.finditer(r"\S+", normalized)]
+        return [(normalized[start:], item_id) for start in starts]
+
+    def load(self, items: Iterable[Tuple[int, str]]):
+        """
+        Replace the whole index with `items`. Writes journaled since a
+        reload started are applied on top, as `items` may predate them.
+        """
+        names = {item_id: name for item_id, name in items if name}
+        keys = sorted(
+            key for item_id, name in names.items() for key in self._keys_for(item_id, name)
+        )
+        with self._lock:
+            self._names = names
+            self._keys = keys
+            for item_id, name in self._journal or []:
+                self._upsert_locked(item_id, name)
+            self._journal = None
+            self.loaded_at = time.monotonic()
+            self._loads += 1
+
+    async def reload(self, fetch: Callable[[], Awaitable[Iterable[Tuple[int, str]]]]):
+        """
+        Replace the index with the (id, name) pairs returned by `fetch()`.
+
+        Callers that arrive while a reload runs wait for it instead of
+        starting their own, and upserts or removals made while `fetch()`
+        runs are kept even if its snapshot was read before them.
+        """
+        loads = self._loads
+        async with self._reload_lock:
+            if self._loads != loads:
+                return
+            with self._lock:
+                self._journal = []
+            try:
+                items = await fetch()
+            except BaseException:
+                with self._lock:
+                    self._journal = None
+                raise
+            self.load(items)
+
+    def _remove_locked(self, item_id: int):
+        name = self._names.pop(item_id, None)
+        if name is None:
+            return
+        for key in self._keys_for(item_id, name):
+            position = bisect_left(self._keys, key)
+            if position < len(self._keys) and self._keys[position] == key:
+                del self._keys[position]
+
+    def _upsert_locked(self, item_id: int, name: Optional[str]):
+        self._remove_locked(item_id)
+        if name:
+            self._names[item_id] = name
+            for key in self._keys_for(item_id, name):
+                insort(self._keys, key)
+
+    def _write(self, item_id: int, name: Optional[str]):
+        with self._lock:
+            if self._journal is not None:
+                self._journal.append((item_id, name))
+            self._upsert_locked(item_id, name)
+
+    def upsert(self, item_id: int, name: str):
+        """
+        Add an entry or replace the name of an existing one.
+        """
+        self._write(item_id, name)
+
+    def remove(self, item_id: int):
+        self._write(item_id, None)
+
+    def search(self, prefix: str, limit: int = 10) -> List[Tuple[int, str]]:
+        """
+        Return up to `limit` entries with a word starting with `prefix`,
+        in alphabetical order of the matched text.
+
+        Returns:
+            list: (id, name) pairs
+        """
+        prefix = _normalize(prefix)
+        if not prefix:
+            return []
+        matches = []
+        seen = set()
+        with self._lock:
+            position = bisect_left(self._keys, (prefix, -1))
+            while position < len(self._keys) and len(matches) < limit:
+                key, item_id = self._keys[position]
+                if not key.startswith(prefix):
+                    break
+                if item_id not in seen:
+                    seen.add(item_id)
+                    matches.append((item_id, self._names[item_id]))
+                position += 1
+        return matches
+
+    def needs_load(self) -> bool:
+        """
+        True if the index was never loaded or is older than `max_age`.
+        """
+        if self.loaded_at is None:
+            return True
+        return self.max_age > 0 and time.monotonic() - self.loaded_at > self.max_age
+
+    def __len__(self) -> int:
+        return len(self._names)
@@ -0,0 +1,285 @@
+import os
+import sys
+import hmac
+import json
+import time
+import threading
+from collections import Counter
+from contextvars import ContextVar
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qs
+
+# Secret that enables profiling of a request when sent in the X-Profile
+# header or the `profile` query parameter; profiling is off while unset
+PROFILER_TOKEN = os.getenv('PROFILER_TOKEN', '')
+PROFILER_INTERVAL_MS = float(os.getenv('PROFILER_INTERVAL_MS', '1'))
+PROFILE_HEADER = "X-Profile"
+PROFILE_FORMAT_HEADER = "X-Profile-Format"
+PROFILE_SUMMARY_HEADER = "X-Profile-Summary"
+PROFILE_STATUS_HEADER = "X-Profile-Status"
+PROFILE_QUERY_PARAM = "profile"
+PROFILE_FORMAT_QUERY_PARAM = "profile_format"
+PROFILE_FORMATS = ('collapsed', 'speedscope')
+_MAX_STACK_DEPTH = 128
+
+# Innermost matching frame decides the category of a sample: (module
+# prefix, function name or None for any function, category)
+_CATEGORY_RULES = (
+    ('fastapi._compat', 'ModelField.validate', 'validation'),
+    ('fastapi._compat', 'ModelField.serialize', 'encoding'),
+    ('fastapi.encoders', None, 'encoding'),
+    ('starlette.responses', None, 'encoding'),
+    ('json', None, 'encoding'),
+    ('fastapi.dependencies.utils', None, 'validation'),
+    ('pydantic', None, 'validation'),
+    ('psycopg', None, 'db'),
+    ('psycopg2', None, 'db'),
+    ('psycopg_pool', None, 'db'),
+    ('app.config.database', None, 'db'),
+    ('app.config.async_database', None, 'db'),
+    ('selectors', None, 'idle'),
+)
+CATEGORIES = ('db', 'validation', 'encoding', 'idle', 'other')
+
+_active_profile: ContextVar[Optional["RequestProfile"]] = ContextVar('active_profile', default=None)
+# One profile at a time: samples are taken of the whole event loop thread
+_profile_lock = threading.Lock()
+
+
+class RequestProfile:
+    """
+    Samples the stack of the event loop thread every `interval` seconds
+    from a background thread while one request is being served.
+
+    Samples cover everything the loop runs in that time, so concurrent
+    requests show up too; profile on a quiet worker for clean results.
+    The sampler needs the GIL, so time spent in native code holding it
+    (pydantic-core, the JSON encoder) can land on the next sample.
+    """
+
+    def __init__(self, thread_id: int, interval: float):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks: Counter = Counter()      # (frame, ...) root first -> samples
+        self.weights: Dict[tuple, float] = {}  # same key -> sampled seconds
+        self.categories: Counter = Counter()  # category -> sampled seconds
+        self.db_calls = 0
+        self.db_wait = 0.0
+        self.started = None
+        self.elapsed = 0.0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="request-profiler", daemon=True)
+
+    def start(self):
+        self.started = time.perf_counter()
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+        self.elapsed = time.perf_counter() - self.started
+
+    def _run(self):
+        last = time.perf_counter()
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            now = time.perf_counter()
+            if frame is not None:
+                self._record(frame, now - last)
+            last = now
+
+    def _record(self, frame, weight: float):
+        stack = []
+        category = None
+        while frame is not None and len(stack) < _MAX_STACK_DEPTH:
+            code = frame.f_code
+            module = frame.f_globals.get('__name__', '?')
+            function = getattr(code, 'co_qualname', code.co_name)  # Python < 3.11
+            stack.append((module, function, code.co_filename, frame.f_lineno))
+            if category is None:
+                category = _categorize(module, function)
+            frame = frame.f_back
+        stack.reverse()
+        key = tuple(stack)
+        self.stacks[key] += 1
+        self.weights[key] = self.weights.get(key, 0.0) + weight
+        self.categories[category or 'other'] += weight
+
+    def observe_db(self, elapsed: float):
+        self.db_calls += 1
+        self.db_wait += elapsed
+
+    def summary(self) -> dict:
+        sampled = sum(self.categories.values())
+        split = {
+            f"{category}_ms": round(self.categories.get(category, 0.0) / sampled * self.elapsed * 1000, 3)
+            if sampled else 0.0
+            for category in CATEGORIES
+        }
+        return {
+            'wall_ms': round(self.elapsed * 1000, 3),
+            'samples': sum(self.stacks.values()),
+            'interval_ms': self.interval * 1000,
+            # Measured around every database call; the sample based db_ms
+            # only sees driver CPU time and awaits show up as idle
+            'db_wait_ms': round(self.db_wait * 1000, 3),
+            'db_calls': self.db_calls,
+            **split,
+        }
+
+    def collapsed(self) -> str:
+        """
+        Stacks in the collapsed format of flamegraph.pl and speedscope,
+        one `frame;frame;... count` line per distinct stack.
+        """
+        lines = []
+        for stack, count in self.stacks.most_common():
+            names = ";".join(f"{module}:{function}" for module, function, _, _ in stack)
+            lines.append(f"{names} {count}")
+        return "\n".join(lines) + "\n"
+
+    def speedscope(self, name: str) -> dict:
+        """
+        The samples as a speedscope sampled profile, weighted in milliseconds.
+        """
+        frames: List[dict] = []
+        frame_index: Dict[Tuple[str, str, str], int] = {}
+        samples = []
+        weights = []
+        for stack, weight in self.weights.items():
+            indexes = []
+            for module, function, filename, line in stack:
+                key = (module, function, filename)
+                if key not in frame_index:
+                    frame_index[key] = len(frames)
+                    frames.append({'name': f"{module}:{function}", 'file': filename, 'line': line})
+                indexes.append(frame_index[key])
+            samples.append(indexes)
+            weights.append(round(weight * 1000, 3))
+        return {
+            '$schema': "https://www.speedscope.app/file-format-schema.json",
+            'shared': {'frames': frames},
+            'profiles': [{
+                'type': 'sampled',
+                'name': name,
+                'unit': 'milliseconds',
+                'startValue': 0,
+                'endValue': round(self.elapsed * 1000, 3),
+                'samples': samples,
+                'weights': weights,
+            }],
+            'name': name,
+            'activeProfileIndex': 0,
+            'exporter': 'inventory-api profiler',
+            'summary': self.summary(),
+        }
+
+
+def _categorize(module: str, function: str) -> Optional[str]:
+    for prefix, rule_function, category in _CATEGORY_RULES:
+        if module.startswith(prefix) and (rule_function is None or function == rule_function):
+            return category
+    return None
+
+def token_matches(token: Optional[str]) -> bool:
+    """
+    Constant-time check of `token` against PROFILER_TOKEN. Always False while
+    PROFILER_TOKEN is unset, so everything it guards is off by default.
+    """
+    if not PROFILER_TOKEN or token is None:
+        return False
+    return hmac.compare_digest(token.encode(), PROFILER_TOKEN.encode())
+
+def observe_db(elapsed: float):
+    """
+    Add a database call to the profile of the current request, if any.
+    """
+    profile = _active_profile.get()
+    if profile is not None:
+        profile.observe_db(elapsed)
+
+def _requested(scope) -> Tuple[Optional[str], str]:
+    """
+    The profile token and output format sent with a request.
+    """
+    headers = {key.decode('latin-1').lower(): value.decode('latin-1') for key, value in scope['headers']}
+    query = parse_qs(scope.get('query_string', b'').decode('latin-1'))
+    token = headers.get(PROFILE_HEADER.lower()) or (query.get(PROFILE_QUERY_PARAM) or [None])[0]
+    output_format = (
+        headers.get(PROFILE_FORMAT_HEADER.lower())
+        or (query.get(PROFILE_FORMAT_QUERY_PARAM) or ['collapsed'])[0]
+    )
+    return token, output_format
+
+
+class ProfilerMiddleware:
+    """
+    ASGI middleware that profiles a single request on demand.
+
+    A request carrying PROFILER_TOKEN in the X-Profile header or the
+    `profile` query parameter runs normally, but its response body is
+    replaced by the profile: collapsed stacks (text) or, with
+    `X-Profile-Format: speedscope` / `profile_format=speedscope`, a
+    speedscope JSON file. The original status is kept, and the time split
+    between database, validation and encoding is returned in the
+    X-Profile-Summary header as JSON.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if not PROFILER_TOKEN or scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+        token, output_format = _requested(scope)
+        if not token_matches(token):
+            await self.app(scope, receive, send)
+            return
+        if output_format not in PROFILE_FORMATS or not _profile_lock.acquire(blocking=False):
+            status = 'invalid-format' if output_format not in PROFILE_FORMATS else 'busy'
+            await self.app(scope, receive, _with_header(send, PROFILE_STATUS_HEADER.lower().encode(), status.encode()))
+            return
+
+        start_message = None
+        profile = RequestProfile(threading.get_ident(), PROFILER_INTERVAL_MS / 1000)
+
+        async def capture(message):
+            # The original response is dropped, only its status is kept
+            nonlocal start_message
+            if message['type'] == 'http.response.start':
+                start_message = message
+
+        token_var = _active_profile.set(profile)
+        profile.start()
+        try:
+            await self.app(scope, receive, capture)
+        finally:
+            profile.stop()
+            _active_profile.reset(token_var)
+            _profile_lock.release()
+
+        name = f"{scope['method']} {scope['path']}"
+        if output_format == 'speedscope':
+            body = json.dumps(profile.speedscope(name)).encode()
+            content_type = b'application/json'
+        else:
+            body = profile.collapsed().encode()
+            content_type = b'text/plain; charset=utf-8'
+        await send({
+            'type': 'http.response.start',
+            'status': start_message['status'] if start_message else 500,
+            'headers': [
+                (b'content-type', content_type),
+                (b'content-length', str(len(body)).encode()),
+                (PROFILE_SUMMARY_HEADER.lower().encode(), json.dumps(profile.summary()).encode()),
+            ],
+        })
+        await send({'type': 'http.response.body', 'body': body})
+
+def _with_header(send, name: bytes, value: bytes):
+    async def wrapped(message):
+        if message['type'] == 'http.response.start':
+            message = {**message, 'headers': [*message.get('headers', []), (name, value)]}
+        await send(message)
+    return wrapped
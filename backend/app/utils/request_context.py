@@ -0,0 +1,51 @@
+from contextvars import ContextVar
+from typing import Optional
+
+# ASGI scope of the HTTP request the current task is serving
+_current_scope: ContextVar[Optional[dict]] = ContextVar('current_scope', default=None)
+# Batch loaders of that request by name, see app.utils.batch_loader
+_current_loaders: ContextVar[Optional[dict]] = ContextVar('current_loaders', default=None)
+
+
+class RequestContextMiddleware:
+    """
+    ASGI middleware making the current request visible to code that has no
+    access to it, e.g. the database helpers. Pure ASGI rather than
+    BaseHTTPMiddleware, so the endpoint runs in the same context.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+        token = _current_scope.set(scope)
+        loaders_token = _current_loaders.set({})
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _current_loaders.reset(loaders_token)
+            _current_scope.reset(token)
+
+def current_endpoint() -> Optional[dict]:
+    """
+    Method, route template and path of the request being served, or None
+    outside a request (startup, maintenance commands).
+    """
+    scope = _current_scope.get()
+    if scope is None:
+        return None
+    route = scope.get('route')
+    return {
+        'method': scope['method'],
+        'route': getattr(route, 'path', None),
+        'path': scope['path'],
+    }
+
+def current_loaders() -> Optional[dict]:
+    """
+    The batch loaders of the request being served, or None outside a request.
+    """
+    return _current_loaders.get()
@@ -0,0 +1,202 @@
+import os
+import re
+import json
+import time
+import asyncio
+import hashlib
+import logging
+import threading
+from collections import deque
+from datetime import date, datetime, timezone
+from decimal import Decimal
+from logging.handlers import RotatingFileHandler
+from typing import List, Optional
+from app.utils.request_context import current_endpoint
+
+logger = logging.getLogger(__name__)
+
+# Statements slower than this are logged; 0 disables the slow-query log
+SLOW_QUERY_THRESHOLD_MS = float(os.getenv('SLOW_QUERY_THRESHOLD_MS', '500'))
+SLOW_QUERY_LOG_FILE = os.getenv('SLOW_QUERY_LOG_FILE', 'logs/slow_queries.log')
+SLOW_QUERY_LOG_MAX_BYTES = int(os.getenv('SLOW_QUERY_LOG_MAX_BYTES', str(10 * 1024 * 1024)))
+SLOW_QUERY_LOG_BACKUPS = int(os.getenv('SLOW_QUERY_LOG_BACKUPS', '5'))
+# Entries kept in memory for /debug/slow-queries
+SLOW_QUERY_BUFFER_SIZE = int(os.getenv('SLOW_QUERY_BUFFER_SIZE', '200'))
+# Replace string parameters (names, contact details) by their type and length
+SLOW_QUERY_REDACT = os.getenv('SLOW_QUERY_REDACT', 'true').lower() in ('1', 'true', 'yes')
+# Re-run slow read queries under EXPLAIN (ANALYZE, BUFFERS) in a read-only
+# transaction. This executes the query a second time, so it is off by
+# default, runs one plan at a time and at most once per statement shape
+# every SLOW_QUERY_EXPLAIN_INTERVAL seconds.
+SLOW_QUERY_EXPLAIN = os.getenv('SLOW_QUERY_EXPLAIN', 'false').lower() in ('1', 'true', 'yes')
+SLOW_QUERY_EXPLAIN_INTERVAL = float(os.getenv('SLOW_QUERY_EXPLAIN_INTERVAL', '300'))
+SLOW_QUERY_EXPLAIN_TIMEOUT_MS = int(os.getenv('SLOW_QUERY_EXPLAIN_TIMEOUT_MS', '30000'))
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r"\b\d+(?:\.\d+)?\b")
+_WHITESPACE = re.compile(r"\s+")
+_VALUES_LIST = re.compile(r"(\([^()]*%s[^()]*\))(?:\s*,\s*\([^()]*%s[^()]*\))+")
+_READ_ONLY_STATEMENT = re.compile(r"^\s*(SELECT|WITH)\b", re.IGNORECASE)
+_WRITE_KEYWORD = re.compile(r"\b(INSERT|UPDATE|DELETE|MERGE)\b", re.IGNORECASE)
+
+_entries = deque(maxlen=SLOW_QUERY_BUFFER_SIZE)
+_entries_lock = threading.Lock()
+_file_logger = None
+_file_logger_lock = threading.Lock()
+_last_explained = {}           # fingerprint -> monotonic time of the last plan
+_explain_running = False
+_explain_tasks = set()         # keeps running plan captures referenced
+_next_id = 0
+
+
+def normalize_sql(query: str) -> str:
+    """
+    Reduce a statement to its shape: literals become ?, multi-row VALUES
+    lists collapse to one row and whitespace is squeezed, so repeated
+    executions of the same query share one fingerprint.
+    """
+    query = _STRING_LITERAL.sub('?', query)
+    query = _NUMBER.sub('?', query)
+    query = _VALUES_LIST.sub(r"\1 /* , ... */", query)
+    return _WHITESPACE.sub(' ', query).strip()
+
+def fingerprint(normalized: str) -> str:
+    return hashlib.sha1(normalized.encode()).hexdigest()[:12]
+
+def redact(value):
+    """
+    Make a parameter safe to log: strings are replaced by their length,
+    long lists are summarized. Numbers, dates and booleans are kept, they
+    are what usually explains a plan.
+    """
+    if value is None or isinstance(value, (bool, int, float)):
+        return value
+    if isinstance(value, Decimal):
+        return str(value)
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    if isinstance(value, str):
+        return f"<str:{len(value)}>" if SLOW_QUERY_REDACT else value
+    if isinstance(value, (list, tuple)):
+        items = [redact(item) for item in value[:10]]
+        if len(value) > 10:
+            items.append(f"<... {len(value) - 10} more>")
+        return items
+    return f"<{type(value).__name__}>"
+
+def _get_file_logger() -> logging.Logger:
+    global _file_logger
+    if _file_logger is None:
+        with _file_logger_lock:
+            if _file_logger is None:
+                file_logger = logging.getLogger('app.slow_queries.file')
+                file_logger.propagate = False
+                file_logger.setLevel(logging.INFO)
+                directory = os.path.dirname(SLOW_QUERY_LOG_FILE)
+                if directory:
+                    os.makedirs(directory, exist_ok=True)
+                handler = RotatingFileHandler(
+                    SLOW_QUERY_LOG_FILE,
+                    maxBytes=SLOW_QUERY_LOG_MAX_BYTES,
+                    backupCount=SLOW_QUERY_LOG_BACKUPS,
+                    encoding='utf-8',
+                )
+                handler.setFormatter(logging.Formatter('%(message)s'))
+                file_logger.addHandler(handler)
+                _file_logger = file_logger
+    return _file_logger
+
+def _write(record: dict):
+    try:
+        _get_file_logger().info(json.dumps(record, default=str))
+    except OSError as e:
+        logger.warning(f"Could not write the slow-query log: {e}")
+
+def observe(function: str, kind: str, query: str, params, elapsed: float):
+    """
+    Log a database call if it took longer than SLOW_QUERY_THRESHOLD_MS.
+    Called by the database helpers for every statement, so the fast path is
+    a single comparison.
+    """
+    if SLOW_QUERY_THRESHOLD_MS <= 0 or elapsed * 1000 < SLOW_QUERY_THRESHOLD_MS:
+        return
+    global _next_id
+    normalized = normalize_sql(query)
+    if kind in ('query', 'prepared'):
+        logged_params = redact(params) if params is not None else None
+    else:
+        # Batches are logged by size only
+        logged_params = f"<{kind}:{len(params)} rows>" if params is not None else None
+    with _entries_lock:
+        _next_id += 1
+        entry = {
+            'id': _next_id,
+            'timestamp': datetime.now(timezone.utc).isoformat(),
+            'duration_ms': round(elapsed * 1000, 3),
+            'function': function,
+            'kind': kind,
+            'endpoint': current_endpoint(),
+            'fingerprint': fingerprint(normalized),
+            'sql': normalized,
+            'params': logged_params,
+            'plan': None,
+        }
+        _entries.append(entry)
+    logger.warning(
+        f"Slow query ({entry['duration_ms']} ms) in {function}: {entry['fingerprint']}"
+    )
+    _write(entry)
+    if SLOW_QUERY_EXPLAIN and kind in ('query', 'prepared'):
+        _schedule_explain(entry, query, params)
+
+def _schedule_explain(entry: dict, query: str, params):
+    global _explain_running
+    if not _READ_ONLY_STATEMENT.match(query) or _WRITE_KEYWORD.search(query):
+        return
+    now = time.monotonic()
+    with _entries_lock:
+        last = _last_explained.get(entry['fingerprint'])
+        if _explain_running or (last is not None and now - last < SLOW_QUERY_EXPLAIN_INTERVAL):
+            return
+        _explain_running = True
+        _last_explained[entry['fingerprint']] = now
+    try:
+        task = asyncio.get_running_loop().create_task(_capture_plan(entry, query, params))
+        _explain_tasks.add(task)
+        task.add_done_callback(_explain_tasks.discard)
+    except RuntimeError:
+        # Not called from the event loop; plans are only captured for the app
+        with _entries_lock:
+            _explain_running = False
+
+async def _capture_plan(entry: dict, query: str, params):
+    global _explain_running
+    # Imported here, the database helpers import this module
+    from app.config.async_database import explain_analyze
+    try:
+        plan = await explain_analyze(query, params, SLOW_QUERY_EXPLAIN_TIMEOUT_MS)
+    except Exception as e:
+        plan = f"EXPLAIN failed: {type(e).__name__}: {e}"
+    finally:
+        with _entries_lock:
+            _explain_running = False
+    with _entries_lock:
+        entry['plan'] = plan
+    _write({'id': entry['id'], 'fingerprint': entry['fingerprint'], 'plan': plan})
+
+def get_entries(limit: Optional[int] = None, min_duration_ms: float = 0) -> List[dict]:
+    """
+    Slow queries recorded by this process, newest first.
+    """
+    with _entries_lock:
+        entries = [dict(entry) for entry in reversed(_entries) if entry['duration_ms'] >= min_duration_ms]
+    return entries[:limit] if limit else entries
+
+def get_settings() -> dict:
+    return {
+        'threshold_ms': SLOW_QUERY_THRESHOLD_MS,
+        'log_file': SLOW_QUERY_LOG_FILE,
+        'redact': SLOW_QUERY_REDACT,
+        'explain': SLOW_QUERY_EXPLAIN,
+        'buffer_size': SLOW_QUERY_BUFFER_SIZE,
+    }
@@ -0,0 +1,47 @@
+import os
+import json
+import subprocess
+from datetime import datetime
+from pathlib import Path
+from dotenv import load_dotenv
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+RESULTS_DIR = BACKEND_DIR / 'benchmarks' / 'results'
+
+def use_database(name: str) -> bool:
+    """
+    Point the app at the benchmark database. The app reads its connection
+    settings at import time, so this must run before anything imports app.
+
+    Returns:
+        bool: False if `name` is the application database from .env, which
+        the benchmarks would wipe
+    """
+    load_dotenv()
+    if name == os.getenv('DB_NAME'):
+        return False
+    os.environ['DB_NAME'] = name
+    return True
+
+def write_results(report: dict, output: str = None, prefix: str = '') -> Path:
+    """
+    Write a result report as JSON, by default to benchmarks/results/.
+    """
+    path = Path(output) if output else (
+        RESULTS_DIR / f"{prefix}{datetime.now().strftime('%Y%m%d-%H%M%S')}.json"
+    )
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(report, indent=2, default=str))
+    return path
+
+def git_commit():
+    """
+    Commit the results were measured at, if run from a git checkout.
+    """
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', 'HEAD'], cwd=BACKEND_DIR,
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
@@ -0,0 +1,587 @@
+"""
+One benchmark case per repository function.
+
+Cases receive a context of ids and dates sampled from the seeded dataset.
+Cases that write run inside a transaction that is rolled back afterwards,
+so every repetition sees the same data and the dataset can be reused.
+"""
+import inspect
+import pkgutil
+import importlib
+from dataclasses import dataclass
+from datetime import date, timedelta
+from typing import Awaitable, Callable, Dict, List, Optional
+from app import repositories
+from app.config.async_database import execute_query, transaction
+from app.repositories import (
+    analytics_repo, customer_repo, dashboard_repo, inventory_repo, order_repo,
+    payment_repo, product_repo, rollup_repo, shipment_repo, supplier_repo,
+    version_repo,
+)
+from app.repositories.user_repo import UserRepository
+from app.schemas.customer import CustomerCreate, CustomerUpdate
+from app.schemas.supplier import SupplierCreate, SupplierUpdate
+from app.schemas.product import ProductCreate, ProductUpdate
+from app.schemas.order import OrderCreate, OrderUpdate, OrderDetailBase
+from app.schemas.payment import PaymentCreate
+from app.schemas.shipment import ShipmentCreate, ShipmentUpdate, ShipmentDetailBase
+from app.schemas.inventory import StockMovementCreate
+
+PAGE_SIZE = 50
+
+@dataclass
+class Case:
+    name: str
+    func: Callable[[dict], Awaitable]
+    write: bool = False
+    # Rebuilds and full checks are slow at the larger scales
+    repeat: Optional[int] = None
+
+CASES: Dict[str, Case] = {}
+
+def case(name: str, write: bool = False, repeat: Optional[int] = None):
+    def register(func):
+        CASES[name] = Case(name, func, write, repeat)
+        return func
+    return register
+
+
+class _Rollback(Exception):
+    pass
+
+
+async def run_case(bench_case: Case, context: dict):
+    """
+    Run a case once and return the number of rows it produced, if any.
+    """
+    if not bench_case.write:
+        return _row_count(await bench_case.func(context))
+    try:
+        async with transaction():
+            result = await bench_case.func(context)
+            raise _Rollback()
+    except _Rollback:
+        pass
+    return _row_count(result)
+
+def _row_count(result) -> Optional[int]:
+    if isinstance(result, (list, tuple, dict)):
+        return len(result)
+    return None
+
+
+async def load_context() -> dict:
+    """
+    Pick the ids the cases work on: the most and least ordered product,
+    the most active customer, a recent order and so on.
+    """
+    async def one(query: str):
+        result = await execute_query(query)
+        return result[0] if result else {}
+
+    products = await one("""
+    SELECT
+        (SELECT ProductID FROM OrderDetails GROUP BY ProductID ORDER BY COUNT(*) DESC LIMIT 1) as hot_product_id,
+        (SELECT ProductID FROM OrderDetails GROUP BY ProductID ORDER BY COUNT(*) LIMIT 1) as cold_product_id,
+        (SELECT Name FROM Products ORDER BY ProductID LIMIT 1) as product_name;
+    """)
+    users = await one("""
+    SELECT
+        (SELECT CustomerID FROM CustomerOrders GROUP BY CustomerID ORDER BY COUNT(*) DESC LIMIT 1) as customer_id,
+        (SELECT SupplierID FROM Orders GROUP BY SupplierID ORDER BY COUNT(*) DESC LIMIT 1) as supplier_id,
+        (SELECT Name FROM Users WHERE Role = 'customer' ORDER BY id LIMIT 1) as customer_name,
+        (SELECT Name FROM Users WHERE Role = 'supplier' ORDER BY id LIMIT 1) as supplier_name,
+        (SELECT ContactInfo FROM Users WHERE Role = 'customer' ORDER BY id LIMIT 1) as customer_contact;
+    """)
+    orders = await one("""
+    SELECT
+        (SELECT MAX(OrderID) FROM Orders) as order_id,
+        (SELECT MAX(OrderDate) FROM Orders) as last_order_date,
+        (SELECT MAX(PaymentID) FROM PaymentDetails) as payment_id,
+        (SELECT MAX(ShipmentID) FROM Shipments) as shipment_id,
+        (SELECT MAX(OrderID) FROM Orders o
+         WHERE NOT EXISTS (SELECT 1 FROM Shipments s WHERE s.OrderID = o.OrderID)) as unshipped_order_id;
+    """)
+    context = {**products, **users, **orders}
+    recent = await execute_query(
+        "SELECT OrderID as order_id FROM Orders ORDER BY OrderID DESC LIMIT %s;", (PAGE_SIZE,)
+    )
+    context['recent_order_ids'] = [row['order_id'] for row in recent or []]
+    for name, query in (
+        ('product_ids', "SELECT ProductID as id FROM Products ORDER BY ProductID DESC LIMIT %s;"),
+        ('customer_ids', "SELECT id FROM Users WHERE Role = 'customer' ORDER BY id DESC LIMIT %s;"),
+        ('supplier_ids', "SELECT id FROM Users WHERE Role = 'supplier' ORDER BY id DESC LIMIT %s;"),
+    ):
+        rows = await execute_query(query, (PAGE_SIZE,))
+        context[name] = [row['id'] for row in rows or []]
+    last = context.get('last_order_date') or date.today()
+    context['month_start'] = last - timedelta(days=30)
+    context['month_end'] = last
+    # Three letters of a name hit many rows; a full name only a few
+    context['broad_term'] = (context.get('product_name') or 'Amo')[:3]
+    context['narrow_term'] = context.get('product_name') or 'Amoxicillin'
+    return context
+
+
+def _order(context: dict, lines: int = 3) -> OrderCreate:
+    return OrderCreate(
+        order_date=context['month_end'],
+        supplier_id=context['supplier_id'],
+        customer_id=context['customer_id'],
+        details=[
+            OrderDetailBase(product_id=context['hot_product_id'], quantity=lines),
+            OrderDetailBase(product_id=context['cold_product_id'], quantity=1),
+        ],
+    )
+
+
+# analytics_repo
+
+@case('analytics_repo.get_sales_analytics')
+async def _(ctx):
+    return await analytics_repo.get_sales_analytics(ctx['month_start'], ctx['month_end'])
+
+@case('analytics_repo.get_product_analytics')
+async def _(ctx):
+    return await analytics_repo.get_product_analytics()
+
+@case('analytics_repo.get_customer_analytics')
+async def _(ctx):
+    return await analytics_repo.get_customer_analytics()
+
+@case('analytics_repo.get_supplier_analytics')
+async def _(ctx):
+    return await analytics_repo.get_supplier_analytics()
+
+@case('analytics_repo.get_trend_analytics')
+async def _(ctx):
+    return await analytics_repo.get_trend_analytics()
+
+
+# customer_repo
+
+@case('customer_repo.load_name_index')
+async def _(ctx):
+    return await customer_repo.load_name_index()
+
+@case('customer_repo.autocomplete_customers')
+async def _(ctx):
+    return await customer_repo.autocomplete_customers(ctx['customer_name'][:3])
+
+@case('customer_repo.get_all_customers')
+async def _(ctx):
+    return await customer_repo.get_all_customers(sort='name', limit=PAGE_SIZE)
+
+@case('customer_repo.count_customers')
+async def _(ctx):
+    return await customer_repo.count_customers(ctx['customer_name'][:3])
+
+@case('customer_repo.get_customer_by_id')
+async def _(ctx):
+    return await customer_repo.get_customer_by_id(ctx['customer_id'])
+
+@case('customer_repo.get_customers_by_ids')
+async def _(ctx):
+    return await customer_repo.get_customers_by_ids(ctx['customer_ids'])
+
+@case('customer_repo.get_customer_orders')
+async def _(ctx):
+    return await customer_repo.get_customer_orders(ctx['customer_id'])
+
+@case('customer_repo.get_vip_customers')
+async def _(ctx):
+    return await customer_repo.get_vip_customers()
+
+@case('customer_repo.search_customers')
+async def _(ctx):
+    return await customer_repo.search_customers(ctx['customer_name'][:3], limit=PAGE_SIZE)
+
+@case('customer_repo.create_customer', write=True)
+async def _(ctx):
+    return await customer_repo.create_customer(
+        CustomerCreate(name="Benchmark Customer", contact_info="bench@example.com")
+    )
+
+@case('customer_repo.update_customer', write=True)
+async def _(ctx):
+    return await customer_repo.update_customer(
+        ctx['customer_id'], CustomerUpdate(contact_info="bench@example.com")
+    )
+
+@case('customer_repo.delete_customer', write=True)
+async def _(ctx):
+    # Customers with orders cannot be deleted, so a fresh one is created first
+    created = await customer_repo.create_customer(CustomerCreate(name="Benchmark Customer"))
+    return await customer_repo.delete_customer(created['customer_id'])
+
+
+# dashboard_repo; the cache is dropped first so the queries are measured
+
+@case('dashboard_repo.get_overview')
+async def _(ctx):
+    dashboard_repo.invalidate_cache()
+    return await dashboard_repo.get_overview()
+
+@case('dashboard_repo.get_monthly_metrics')
+async def _(ctx):
+    return await dashboard_repo.get_monthly_metrics()
+
+@case('dashboard_repo.get_top_products')
+async def _(ctx):
+    dashboard_repo.invalidate_cache()
+    return await dashboard_repo.get_top_products()
+
+@case('dashboard_repo.get_top_customers')
+async def _(ctx):
+    dashboard_repo.invalidate_cache()
+    return await dashboard_repo.get_top_customers()
+
+@case('dashboard_repo.invalidate_cache')
+async def _(ctx):
+    return dashboard_repo.invalidate_cache()
+
+@case('dashboard_repo.get_cache_stats')
+async def _(ctx):
+    return dashboard_repo.get_cache_stats()
+
+
+# inventory_repo
+
+@case('inventory_repo.get_all_inventory')
+async def _(ctx):
+    return await inventory_repo.get_all_inventory()
+
+@case('inventory_repo.get_low_stock_items')
+async def _(ctx):
+    return await inventory_repo.get_low_stock_items()
+
+@case('inventory_repo.get_stock_alerts')
+async def _(ctx):
+    return await inventory_repo.get_stock_alerts()
+
+@case('inventory_repo.get_inventory_by_product')
+async def _(ctx):
+    return await inventory_repo.get_inventory_by_product(ctx['hot_product_id'])
+
+@case('inventory_repo.get_movements')
+async def _(ctx):
+    return await inventory_repo.get_movements(ctx['hot_product_id'])
+
+@case('inventory_repo.update_inventory', write=True)
+async def _(ctx):
+    return await inventory_repo.update_inventory(ctx['hot_product_id'], 1000)
+
+@case('inventory_repo.update_inventory_batch', write=True)
+async def _(ctx):
+    return await inventory_repo.update_inventory_batch(
+        {product_id: 1000 for product_id in range(1, 101)}
+    )
+
+@case('inventory_repo.apply_movements', write=True)
+async def _(ctx):
+    return await inventory_repo.apply_movements([
+        StockMovementCreate(product_id=product_id, movement_type='receive', delta=10)
+        for product_id in range(1, 101)
+    ])
+
+
+# order_repo
+
+@case('order_repo.get_orders')
+async def _(ctx):
+    return await order_repo.get_orders(limit=PAGE_SIZE)
+
+@case('order_repo.stream_orders')
+async def _(ctx):
+    rows = 0
+    async for chunk in order_repo.stream_orders(ctx['month_start'], ctx['month_end']):
+        rows += len(chunk)
+    return [None] * rows
+
+@case('order_repo.refresh_order_totals', write=True)
+async def _(ctx):
+    return await order_repo.refresh_order_totals(ctx['recent_order_ids'])
+
+@case('order_repo.rebuild_order_totals', write=True, repeat=1)
+async def _(ctx):
+    return await order_repo.rebuild_order_totals()
+
+@case('order_repo.get_product_order_ids')
+async def _(ctx):
+    return await order_repo.get_product_order_ids(ctx['hot_product_id'])
+
+@case('order_repo.check_order_shipped')
+async def _(ctx):
+    return await order_repo.check_order_shipped(ctx['order_id'])
+
+@case('order_repo.get_order_summary')
+async def _(ctx):
+    return await order_repo.get_order_summary()
+
+@case('order_repo.get_order_status')
+async def _(ctx):
+    return await order_repo.get_order_status()
+
+@case('order_repo.get_order_by_id')
+async def _(ctx):
+    return await order_repo.get_order_by_id(ctx['order_id'])
+
+@case('order_repo.get_orders_by_ids')
+async def _(ctx):
+    return await order_repo.get_orders_by_ids(ctx['recent_order_ids'])
+
+@case('order_repo.get_order_details')
+async def _(ctx):
+    return await order_repo.get_order_details(ctx['order_id'])
+
+@case('order_repo.create_order', write=True)
+async def _(ctx):
+    return await order_repo.create_order(_order(ctx))
+
+@case('order_repo.create_orders', write=True)
+async def _(ctx):
+    return await order_repo.create_orders([_order(ctx, lines) for lines in range(1, 101)])
+
+@case('order_repo.update_order', write=True)
+async def _(ctx):
+    return await order_repo.update_order(
+        ctx['unshipped_order_id'],
+        OrderUpdate(order_date=ctx['month_start']),
+    )
+
+@case('order_repo.delete_order', write=True)
+async def _(ctx):
+    return await order_repo.delete_order(ctx['unshipped_order_id'])
+
+
+# payment_repo
+
+@case('payment_repo.get_payments')
+async def _(ctx):
+    return await payment_repo.get_payments(ctx['month_start'], ctx['month_end'])
+
+@case('payment_repo.get_payment_analysis')
+async def _(ctx):
+    return await payment_repo.get_payment_analysis()
+
+@case('payment_repo.get_payment_by_id')
+async def _(ctx):
+    return await payment_repo.get_payment_by_id(ctx['payment_id'])
+
+@case('payment_repo.create_payment', write=True)
+async def _(ctx):
+    return await payment_repo.create_payment(
+        PaymentCreate(order_id=ctx['order_id'], payment_date=ctx['month_end'], amount=10)
+    )
+
+
+# product_repo
+
+@case('product_repo.get_all_products')
+async def _(ctx):
+    return await product_repo.get_all_products(sort='name', limit=PAGE_SIZE)
+
+@case('product_repo.count_products')
+async def _(ctx):
+    return await product_repo.count_products(ctx['broad_term'])
+
+@case('product_repo.get_product_by_id')
+async def _(ctx):
+    return await product_repo.get_product_by_id(ctx['hot_product_id'])
+
+@case('product_repo.get_products_by_ids')
+async def _(ctx):
+    return await product_repo.get_products_by_ids(ctx['product_ids'])
+
+@case('product_repo.search_products')
+async def _(ctx):
+    return await product_repo.search_products(ctx['broad_term'], limit=PAGE_SIZE)
+
+@case('product_repo.search_products_ranked')
+async def _(ctx):
+    return await product_repo.search_products_ranked(ctx['narrow_term'])
+
+@case('product_repo.create_product', write=True)
+async def _(ctx):
+    return await product_repo.create_product(
+        ProductCreate(name="Benchmark Tablet 10mg", description="Benchmark", price=1)
+    )
+
+@case('product_repo.update_product', write=True)
+async def _(ctx):
+    # A price change refreshes every order and rollup day of the product
+    return await product_repo.update_product(ctx['hot_product_id'], ProductUpdate(price=99))
+
+@case('product_repo.delete_product', write=True)
+async def _(ctx):
+    return await product_repo.delete_product(ctx['cold_product_id'])
+
+
+# rollup_repo
+
+@case('rollup_repo.refresh_sales_days', write=True)
+async def _(ctx):
+    return await rollup_repo.refresh_sales_days([ctx['month_end']])
+
+@case('rollup_repo.refresh_monthly_metrics', write=True)
+async def _(ctx):
+    return await rollup_repo.refresh_monthly_metrics([ctx['month_end']])
+
+@case('rollup_repo.refresh_for_order_dates', write=True)
+async def _(ctx):
+    return await rollup_repo.refresh_for_order_dates([ctx['month_start'], ctx['month_end']])
+
+@case('rollup_repo.get_product_order_days')
+async def _(ctx):
+    return await rollup_repo.get_product_order_days(ctx['hot_product_id'])
+
+@case('rollup_repo.rebuild_sales_rollup', write=True, repeat=1)
+async def _(ctx):
+    return await rollup_repo.rebuild_sales_rollup()
+
+@case('rollup_repo.check_sales_rollup', repeat=1)
+async def _(ctx):
+    return await rollup_repo.check_sales_rollup()
+
+@case('rollup_repo.rebuild_monthly_metrics', write=True, repeat=1)
+async def _(ctx):
+    return await rollup_repo.rebuild_monthly_metrics()
+
+@case('rollup_repo.check_monthly_metrics', repeat=1)
+async def _(ctx):
+    return await rollup_repo.check_monthly_metrics()
+
+
+# shipment_repo
+
+@case('shipment_repo.get_all_shipments')
+async def _(ctx):
+    return await shipment_repo.get_all_shipments()
+
+@case('shipment_repo.get_late_shipments')
+async def _(ctx):
+    return await shipment_repo.get_late_shipments()
+
+@case('shipment_repo.get_shipment_by_id')
+async def _(ctx):
+    return await shipment_repo.get_shipment_by_id(ctx['shipment_id'])
+
+@case('shipment_repo.create_shipment', write=True)
+async def _(ctx):
+    return await shipment_repo.create_shipment(ShipmentCreate(
+        order_id=ctx['unshipped_order_id'],
+        shipment_date=ctx['month_end'],
+        details=[ShipmentDetailBase(product_id=ctx['hot_product_id'], quantity=1)],
+    ))
+
+@case('shipment_repo.update_shipment', write=True)
+async def _(ctx):
+    return await shipment_repo.update_shipment(
+        ctx['shipment_id'], ShipmentUpdate(shipment_date=ctx['month_end'])
+    )
+
+@case('shipment_repo.delete_shipment', write=True)
+async def _(ctx):
+    return await shipment_repo.delete_shipment(ctx['shipment_id'])
+
+
+# supplier_repo
+
+@case('supplier_repo.load_name_index')
+async def _(ctx):
+    return await supplier_repo.load_name_index()
+
+@case('supplier_repo.autocomplete_suppliers')
+async def _(ctx):
+    return await supplier_repo.autocomplete_suppliers(ctx['supplier_name'][:3])
+
+@case('supplier_repo.get_all_suppliers')
+async def _(ctx):
+    return await supplier_repo.get_all_suppliers(sort='name', limit=PAGE_SIZE)
+
+@case('supplier_repo.count_suppliers')
+async def _(ctx):
+    return await supplier_repo.count_suppliers(ctx['supplier_name'][:3])
+
+@case('supplier_repo.get_supplier_by_id')
+async def _(ctx):
+    return await supplier_repo.get_supplier_by_id(ctx['supplier_id'])
+
+@case('supplier_repo.get_suppliers_by_ids')
+async def _(ctx):
+    return await supplier_repo.get_suppliers_by_ids(ctx['supplier_ids'])
+
+@case('supplier_repo.get_supplier_performance')
+async def _(ctx):
+    return await supplier_repo.get_supplier_performance()
+
+@case('supplier_repo.search_suppliers')
+async def _(ctx):
+    return await supplier_repo.search_suppliers(ctx['supplier_name'][:3], limit=PAGE_SIZE)
+
+@case('supplier_repo.create_supplier', write=True)
+async def _(ctx):
+    return await supplier_repo.create_supplier(
+        SupplierCreate(name="Benchmark Pharma", contact_info="bench@supplier.example")
+    )
+
+@case('supplier_repo.update_supplier', write=True)
+async def _(ctx):
+    return await supplier_repo.update_supplier(
+        ctx['supplier_id'], SupplierUpdate(contact_info="bench@supplier.example")
+    )
+
+@case('supplier_repo.delete_supplier', write=True)
+async def _(ctx):
+    # Suppliers with orders cannot be deleted, so a fresh one is created first
+    created = await supplier_repo.create_supplier(SupplierCreate(name="Benchmark Pharma"))
+    return await supplier_repo.delete_supplier(created['supplier_id'])
+
+
+# user_repo is synchronous
+
+@case('user_repo.UserRepository.get_user_by_credentials')
+async def _(ctx):
+    return UserRepository().get_user_by_credentials(ctx['customer_name'], ctx['customer_contact'])
+
+
+# version_repo
+
+@case('version_repo.get_table_versions')
+async def _(ctx):
+    return await version_repo.get_table_versions(version_repo.VERSIONED_TABLES)
+
+@case('version_repo.compact_table_versions', write=True)
+async def _(ctx):
+    return await version_repo.compact_table_versions()
+
+
+def repository_functions() -> List[str]:
+    """
+    Names of the public functions of every `*_repo` module, including the
+    methods of repository classes, e.g. 'order_repo.get_orders'.
+    """
+    names = []
+    for module_info in pkgutil.iter_modules(repositories.__path__):
+        if not module_info.name.endswith('_repo'):
+            continue
+        module = importlib.import_module(f"{repositories.__name__}.{module_info.name}")
+        for attr, value in vars(module).items():
+            if attr.startswith('_') or getattr(value, '__module__', None) != module.__name__:
+                continue
+            if inspect.isfunction(value):
+                names.append(f"{module_info.name}.{attr}")
+            elif inspect.isclass(value):
+                names.extend(
+                    f"{module_info.name}.{attr}.{method}"
+                    for method, func in vars(value).items()
+                    if inspect.isfunction(func) and not method.startswith('_')
+                )
+    return sorted(names)
+
+def uncovered_functions() -> List[str]:
+    """
+    Repository functions without a benchmark case; reported with the results
+    so new functions do not silently go unmeasured.
+    """
+    return [name for name in repository_functions() if name not in CASES]
@@ -0,0 +1,300 @@
+"""
+Synthetic healthcare dataset for the benchmarks.
+
+Everything is derived from the number of orders and a seed, so a given scale
+always produces the same data. Popularity is skewed the way real order data
+is: a few products and customers account for most of the lines (Zipf), order
+volume grows over the covered period and most, but not all, orders are paid
+and shipped. Rows are streamed to Postgres with COPY, which keeps seeding the
+1M order scale in the range of minutes.
+"""
+import time
+import random
+import asyncio
+import logging
+from bisect import bisect_left
+from dataclasses import dataclass, asdict
+from datetime import date, timedelta
+from itertools import accumulate
+from typing import Iterable, Iterator, Sequence
+from alembic import command
+from alembic.config import Config
+from app.config.database import get_db_cursor
+from app.utils import database_utils
+from benchmarks import BACKEND_DIR
+
+logger = logging.getLogger(__name__)
+
+# Tables in dependency order; truncated together before every seed
+TABLES = (
+    'Users',
+    'Products',
+    'Inventory',
+    'StockMovements',
+    'Orders',
+    'CustomerOrders',
+    'OrderDetails',
+    'PaymentDetails',
+    'Shipments',
+    'ShipmentDetails',
+)
+
+FORMS = ('Tablet', 'Capsule', 'Syrup', 'Injection', 'Ointment', 'Drops', 'Inhaler', 'Patch')
+INGREDIENTS = (
+    'Amoxicillin', 'Paracetamol', 'Ibuprofen', 'Metformin', 'Omeprazole', 'Atorvastatin',
+    'Amlodipine', 'Salbutamol', 'Cetirizine', 'Insulin', 'Losartan', 'Azithromycin',
+    'Ciprofloxacin', 'Prednisolone', 'Diclofenac', 'Levothyroxine', 'Clopidogrel',
+    'Ranitidine', 'Fluconazole', 'Doxycycline', 'Gauze', 'Syringe', 'Catheter', 'Glove',
+)
+FIRST_NAMES = (
+    'Amina', 'Rahim', 'Karim', 'Nusrat', 'Farhan', 'Sadia', 'Tanvir', 'Jannat', 'Imran',
+    'Mehjabin', 'Arif', 'Sumaiya', 'Hasan', 'Tahmina', 'Rafiq', 'Lamia', 'Sabbir', 'Nadia',
+)
+LAST_NAMES = (
+    'Rahman', 'Hossain', 'Islam', 'Ahmed', 'Chowdhury', 'Khan', 'Akter', 'Uddin',
+    'Begum', 'Sarkar', 'Haque', 'Talukder', 'Mia', 'Siddique', 'Karim', 'Alam',
+)
+SUPPLIER_SUFFIXES = ('Pharma', 'Medical Supplies', 'Healthcare', 'Distributors', 'Labs')
+
+@dataclass
+class Scale:
+    """
+    Row counts of one dataset; build with `Scale.for_orders`.
+    """
+    orders: int
+    products: int
+    customers: int
+    suppliers: int
+    max_lines: int = 6
+    paid_ratio: float = 0.8
+    shipped_ratio: float = 0.85
+    days: int = 3 * 365
+    skew: float = 1.1
+    seed: int = 42
+
+    @classmethod
+    def for_orders(cls, orders: int, **overrides) -> "Scale":
+        values = dict(
+            orders=orders,
+            products=max(200, orders // 100),
+            customers=max(100, orders // 20),
+            suppliers=max(20, orders // 2000),
+        )
+        values.update(overrides)
+        return cls(**values)
+
+    def as_dict(self) -> dict:
+        return asdict(self)
+
+
+class _CopyStream:
+    """
+    Read-only file object over generated COPY text lines, so psycopg2's
+    copy_expert can stream rows without materializing the whole table.
+    """
+
+    def __init__(self, rows: Iterable[Sequence]):
+        self._lines = (self._format(row) for row in rows)
+        self._buffer = ''
+
+    @staticmethod
+    def _format(row: Sequence) -> str:
+        return '\t'.join(r'\N' if value is None else str(value) for value in row) + '\n'
+
+    def read(self, size: int = -1) -> str:
+        while size < 0 or len(self._buffer) < size:
+            line = next(self._lines, None)
+            if line is None:
+                break
+            self._buffer += line
+        if size < 0:
+            size = len(self._buffer)
+        chunk, self._buffer = self._buffer[:size], self._buffer[size:]
+        return chunk
+
+
+class _Zipf:
+    """
+    Draws values from `population` with probability proportional to
+    1 / rank**skew, the first element being the most popular.
+    """
+
+    def __init__(self, rng: random.Random, population: Sequence[int], skew: float):
+        self._rng = rng
+        self._population = list(population)
+        # Shuffle so popularity does not correlate with the id
+        rng.shuffle(self._population)
+        self._cumulative = list(accumulate(1 / rank ** skew for rank in range(1, len(population) + 1)))
+
+    def draw(self) -> int:
+        point = self._rng.random() * self._cumulative[-1]
+        return self._population[bisect_left(self._cumulative, point)]
+
+    def draw_distinct(self, count: int) -> list:
+        values = []
+        while len(values) < count:
+            value = self.draw()
+            if value not in values:
+                values.append(value)
+        return values
+
+
+def _copy(cur, table: str, columns: Sequence[str], rows: Iterable[Sequence]):
+    cur.copy_expert(
+        f"COPY {table} ({', '.join(columns)}) FROM STDIN",
+        _CopyStream(rows),
+        size=1 << 16,
+    )
+
+def _users(scale: Scale, rng: random.Random) -> Iterator[tuple]:
+    for supplier_id in range(1, scale.suppliers + 1):
+        name = f"{rng.choice(LAST_NAMES)} {rng.choice(SUPPLIER_SUFFIXES)} {supplier_id}"
+        yield supplier_id, name, f"orders{supplier_id}@supplier.example", 'supplier'
+    for offset in range(1, scale.customers + 1):
+        customer_id = scale.suppliers + offset
+        name = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)} {offset}"
+        yield customer_id, name, f"+8801{customer_id:09d}", 'customer'
+
+def _products(scale: Scale, rng: random.Random) -> Iterator[tuple]:
+    for product_id in range(1, scale.products + 1):
+        form = rng.choice(FORMS)
+        ingredient = rng.choice(INGREDIENTS)
+        strength = rng.choice((5, 10, 20, 50, 100, 250, 500))
+        name = f"{ingredient} {form} {strength}mg #{product_id}"
+        description = f"{ingredient} {form.lower()}, {strength}mg, pack of {rng.choice((10, 20, 30, 100))}"
+        price = round(rng.lognormvariate(2.5, 1.0) + 0.5, 2)
+        yield product_id, name, description, price
+
+def _order_dates(scale: Scale, rng: random.Random) -> Iterator[date]:
+    """
+    Order dates between `scale.days` ago and today with linearly growing
+    volume, i.e. recent days have about twice the orders of the first ones.
+    """
+    start = date.today() - timedelta(days=scale.days)
+    for _ in range(scale.orders):
+        # Inverse CDF of a density rising from 1 to 2 over the period
+        position = (-1 + (1 + 3 * rng.random()) ** 0.5)
+        yield start + timedelta(days=int(position * scale.days))
+
+def seed(scale: Scale):
+    """
+    Replace the contents of the application tables with a dataset of the
+    given scale. Derived tables are rebuilt by the caller afterwards.
+    """
+    rng = random.Random(scale.seed)
+    supplier_ids = range(1, scale.suppliers + 1)
+    customer_ids = range(scale.suppliers + 1, scale.suppliers + scale.customers + 1)
+    products = _Zipf(rng, range(1, scale.products + 1), scale.skew)
+    customers = _Zipf(rng, customer_ids, scale.skew)
+    suppliers = _Zipf(rng, supplier_ids, scale.skew)
+
+    with get_db_cursor() as cur:
+        cur.execute(f"TRUNCATE {', '.join(TABLES)} RESTART IDENTITY CASCADE;")
+
+        _copy(cur, 'Users', ('id', 'Name', 'ContactInfo', 'Role'), _users(scale, rng))
+        _copy(cur, 'Products', ('ProductID', 'Name', 'Description', 'Price'), _products(scale, rng))
+        stock = {product_id: rng.randint(0, 500) for product_id in range(1, scale.products + 1)}
+        _copy(cur, 'Inventory', ('ProductID', 'Quantity'), stock.items())
+        _copy(
+            cur, 'StockMovements',
+            ('ProductID', 'MovementType', 'Delta', 'Reason', 'QuantityAfter'),
+            (
+                (product_id, 'receive', quantity, 'Opening stock', quantity)
+                for product_id, quantity in stock.items() if quantity > 0
+            ),
+        )
+        logger.info(f"Seeded {scale.suppliers + scale.customers} users and {scale.products} products")
+
+        order_dates = list(_order_dates(scale, rng))
+        _copy(
+            cur, 'Orders', ('OrderID', 'OrderDate', 'SupplierID'),
+            ((order_id, order_date, suppliers.draw()) for order_id, order_date in enumerate(order_dates, 1)),
+        )
+        _copy(
+            cur, 'CustomerOrders', ('OrderID', 'CustomerID'),
+            ((order_id, customers.draw()) for order_id in range(1, scale.orders + 1)),
+        )
+
+        # Line counts skew towards small orders: 1 line is the most common
+        line_counts = [
+            min(scale.max_lines, 1 + int(rng.expovariate(0.7))) for _ in range(scale.orders)
+        ]
+        _copy(
+            cur, 'OrderDetails', ('OrderID', 'ProductID', 'Quantity'),
+            (
+                (order_id, product_id, max(1, int(rng.paretovariate(1.5))))
+                for order_id, count in enumerate(line_counts, 1)
+                for product_id in products.draw_distinct(count)
+            ),
+        )
+        logger.info(f"Seeded {scale.orders} orders with {sum(line_counts)} lines")
+
+        paid = [rng.random() < scale.paid_ratio for _ in range(scale.orders)]
+        _copy(
+            cur, 'PaymentDetails', ('OrderID', 'PaymentDate', 'Amount'),
+            (
+                (order_id, order_date + timedelta(days=rng.randint(0, 10)), round(rng.uniform(5, 500), 2))
+                for order_id, (order_date, is_paid) in enumerate(zip(order_dates, paid), 1)
+                if is_paid
+            ),
+        )
+        shipped = [
+            order_id for order_id, is_paid in enumerate(paid, 1)
+            if is_paid and rng.random() < scale.shipped_ratio
+        ]
+        _copy(
+            cur, 'Shipments', ('ShipmentID', 'OrderID', 'ShipmentDate'),
+            (
+                (shipment_id, order_id, order_dates[order_id - 1] + timedelta(days=int(rng.expovariate(0.25))))
+                for shipment_id, order_id in enumerate(shipped, 1)
+            ),
+        )
+        # Shipments carry their order's lines; the first product is enough
+        # for the shipment detail queries and keeps the table proportional
+        _copy(
+            cur, 'ShipmentDetails', ('ShipmentID', 'ProductID', 'Quantity'),
+            (
+                (shipment_id, products.draw(), 1 + int(rng.expovariate(0.5)))
+                for shipment_id in range(1, len(shipped) + 1)
+            ),
+        )
+        logger.info(f"Seeded {sum(paid)} payments and {len(shipped)} shipments")
+
+        for table, column in (
+            ('Users', 'id'), ('Products', 'ProductID'), ('Inventory', 'InventoryID'),
+            ('StockMovements', 'MovementID'), ('Orders', 'OrderID'),
+            ('OrderDetails', 'OrderDetailID'), ('PaymentDetails', 'PaymentID'),
+            ('Shipments', 'ShipmentID'),
+        ):
+            cur.execute(
+                f"SELECT setval(pg_get_serial_sequence('{table}', '{column.lower()}'), "
+                f"COALESCE((SELECT MAX({column}) FROM {table}), 0) + 1, false);"
+            )
+
+def analyze():
+    """
+    Refresh planner statistics after a bulk load.
+    """
+    with get_db_cursor() as cur:
+        cur.connection.autocommit = True
+        try:
+            cur.execute("VACUUM ANALYZE;")
+        finally:
+            cur.connection.autocommit = False
+
+async def prepare(scale: Scale) -> dict:
+    """
+    Migrate the benchmark database, seed it at `scale` and rebuild the
+    derived tables.
+
+    Returns:
+        dict: The scale parameters and the seeding time
+    """
+    started = time.perf_counter()
+    command.upgrade(Config(str(BACKEND_DIR / 'alembic.ini')), 'head')
+    await asyncio.to_thread(seed, scale)
+    await database_utils.setup()
+    await asyncio.to_thread(analyze)
+    elapsed = time.perf_counter() - started
+    logger.info(f"Seeded {scale.orders} orders in {elapsed:.1f}s")
+    return {**scale.as_dict(), 'seed_seconds': round(elapsed, 1)}
@@ -0,0 +1,316 @@
+"""
+In-process HTTP load test of the FastAPI app.
+
+Concurrent async clients drive `app.main:app` through httpx's ASGI
+transport, so requests go through routing, validation, the repositories and
+response encoding exactly as in production, minus the network. Each client
+picks its next request from a weighted workload profile. The report has
+throughput, per-route latency percentiles and histograms, and error rates.
+
+Usage (from the backend directory):
+    python -m benchmarks.load --database ims_bench --seed-orders 100000
+    python -m benchmarks.load --database ims_bench --concurrency 50 --duration 120
+    python -m benchmarks.load --database ims_bench --profile my_profile.json --requests 5000
+
+A profile is a JSON object like DEFAULT_PROFILE. String values of the form
+"{name}" are replaced with values sampled from the database (see
+`_load_context`); when the value is a list, each request picks one at random.
+"""
+import sys
+import json
+import math
+import time
+import random
+import asyncio
+import logging
+import argparse
+from bisect import bisect_left
+from datetime import datetime, timezone
+from pathlib import Path
+from string import Formatter
+from benchmarks import git_commit, use_database, write_results
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CONCURRENCY = 20
+DEFAULT_DURATION = 60
+# Upper bounds of the latency histogram buckets, in milliseconds
+HISTOGRAM_BUCKETS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000)
+
+# Roughly what the frontend sends: mostly dashboard loads and product
+# lookups, some order entry and the occasional analytics page
+DEFAULT_PROFILE = {
+    'name': 'mixed',
+    'operations': [
+        {'name': 'dashboard_overview', 'weight': 15, 'method': 'GET',
+         'path': '/api/v1/dashboard/overview'},
+        {'name': 'dashboard_top_products', 'weight': 5, 'method': 'GET',
+         'path': '/api/v1/dashboard/top-products'},
+        {'name': 'dashboard_monthly', 'weight': 5, 'method': 'GET',
+         'path': '/api/v1/dashboard/monthly'},
+        {'name': 'product_search', 'weight': 20, 'method': 'GET',
+         'path': '/api/v1/products/',
+         'params': {'search': '{search_term}', 'limit': 20}},
+        {'name': 'product_search_ranked', 'weight': 10, 'method': 'GET',
+         'path': '/api/v1/products/',
+         'params': {'search': '{search_term}', 'search_mode': 'ranked'}},
+        {'name': 'product_detail', 'weight': 10, 'method': 'GET',
+         'path': '/api/v1/products/{product_id}'},
+        {'name': 'customer_autocomplete', 'weight': 5, 'method': 'GET',
+         'path': '/api/v1/customers/autocomplete',
+         'params': {'q': '{name_prefix}'}},
+        {'name': 'order_list', 'weight': 10, 'method': 'GET',
+         'path': '/api/v1/orders/', 'params': {'limit': 50}},
+        {'name': 'order_create', 'weight': 8, 'method': 'POST',
+         'path': '/api/v1/orders/',
+         'json': {
+             'order_date': '{today}',
+             'supplier_id': '{supplier_id}',
+             'customer_id': '{customer_id}',
+             'details': [
+                 {'product_id': '{product_id}', 'quantity': 2},
+                 {'product_id': '{product_id}', 'quantity': 1},
+             ],
+         }},
+        {'name': 'analytics_sales', 'weight': 4, 'method': 'GET',
+         'path': '/api/v1/analytics/sales',
+         'params': {'start_date': '{month_start}', 'end_date': '{today}'}},
+        {'name': 'analytics_trends', 'weight': 3, 'method': 'GET',
+         'path': '/api/v1/analytics/trends'},
+    ],
+}
+
+
+class RouteStats:
+    """
+    Latencies and outcomes of the requests of one profile operation.
+    """
+
+    def __init__(self):
+        self.latencies = []
+        self.statuses = {}
+        self.exceptions = 0
+
+    def record(self, latency: float, status: int = None):
+        self.latencies.append(latency)
+        if status is None:
+            self.exceptions += 1
+        else:
+            self.statuses[status] = self.statuses.get(status, 0) + 1
+
+    @property
+    def errors(self) -> int:
+        return self.exceptions + sum(
+            count for status, count in self.statuses.items() if status >= 400
+        )
+
+    def summary(self) -> dict:
+        ordered = sorted(self.latencies)
+        count = len(ordered)
+
+        def percentile(fraction: float) -> float:
+            # Nearest-rank percentile
+            index = max(0, min(count - 1, math.ceil(fraction * count) - 1))
+            return round(ordered[index] * 1000, 3)
+
+        histogram = [0] * (len(HISTOGRAM_BUCKETS_MS) + 1)
+        for latency in ordered:
+            histogram[bisect_left(HISTOGRAM_BUCKETS_MS, latency * 1000)] += 1
+        return {
+            'requests': count,
+            'errors': self.errors,
+            'error_rate': round(self.errors / count, 4) if count else 0.0,
+            'statuses': {str(status): n for status, n in sorted(self.statuses.items())},
+            'exceptions': self.exceptions,
+            'p50_ms': percentile(0.50) if count else None,
+            'p95_ms': percentile(0.95) if count else None,
+            'p99_ms': percentile(0.99) if count else None,
+            'mean_ms': round(sum(ordered) / count * 1000, 3) if count else None,
+            'max_ms': round(ordered[-1] * 1000, 3) if count else None,
+            'histogram_ms': {
+                **{f"le_{bound}": n for bound, n in zip(HISTOGRAM_BUCKETS_MS, histogram)},
+                'le_inf': histogram[-1],
+            },
+        }
+
+
+def _resolve(value, context: dict, rng: random.Random):
+    """
+    Replace "{name}" placeholders in a profile value, recursively.
+    """
+    if isinstance(value, dict):
+        return {key: _resolve(item, context, rng) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_resolve(item, context, rng) for item in value]
+    if not isinstance(value, str) or '{' not in value:
+        return value
+
+    def pick(name):
+        sample = context[name]
+        return rng.choice(sample) if isinstance(sample, list) else sample
+
+    if value.startswith('{') and value.endswith('}') and value[1:-1] in context:
+        # A whole-value placeholder keeps the type, e.g. ints in JSON bodies
+        return pick(value[1:-1])
+    names = {name for _, name, _, _ in Formatter().parse(value) if name}
+    return value.format(**{name: pick(name) for name in names})
+
+async def _load_context() -> dict:
+    """
+    Values the profile placeholders can refer to, sampled from the data.
+    """
+    from app.config.async_database import execute_query
+    from benchmarks import cases, dataset
+
+    context = await cases.load_context()
+    products = await execute_query(
+        "SELECT ProductID as product_id FROM Products ORDER BY random() LIMIT 200;"
+    )
+    names = await execute_query(
+        "SELECT Name as name FROM Users WHERE Role = 'customer' ORDER BY random() LIMIT 200;"
+    )
+    context['product_id'] = [row['product_id'] for row in products or []]
+    context['name_prefix'] = sorted({row['name'][:2] for row in names or []})
+    context['search_term'] = [ingredient[:4] for ingredient in dataset.INGREDIENTS]
+    context['today'] = context['month_end']
+    # JSON bodies and query strings need plain values
+    return {
+        key: value.isoformat() if hasattr(value, 'isoformat') else value
+        for key, value in context.items()
+    }
+
+async def _client(client, operations, weights, context, stats, should_stop, seed, think_time):
+    rng = random.Random(seed)
+    while not should_stop():
+        operation = rng.choices(operations, weights)[0]
+        path = _resolve(operation['path'], context, rng)
+        started = time.perf_counter()
+        try:
+            response = await client.request(
+                operation.get('method', 'GET'),
+                path,
+                params=_resolve(operation.get('params'), context, rng),
+                json=_resolve(operation.get('json'), context, rng),
+            )
+            stats[operation['name']].record(time.perf_counter() - started, response.status_code)
+        except Exception as e:
+            stats[operation['name']].record(time.perf_counter() - started)
+            logger.debug(f"{operation['name']} raised {type(e).__name__}: {e}")
+        if think_time:
+            await asyncio.sleep(rng.expovariate(1 / think_time))
+
+async def run_load(profile: dict, concurrency: int, duration: float = None,
+                   total_requests: int = None, think_time: float = 0,
+                   seed: int = 42) -> dict:
+    """
+    Drive the app with `concurrency` clients until `duration` seconds have
+    passed or `total_requests` were sent, and return the report.
+    """
+    import httpx
+    from app.main import app, startup_event, shutdown_event
+
+    operations = profile['operations']
+    weights = [operation.get('weight', 1) for operation in operations]
+    stats = {operation['name']: RouteStats() for operation in operations}
+
+    await startup_event()
+    try:
+        context = await _load_context()
+        started = time.perf_counter()
+        sent = 0
+
+        def should_stop() -> bool:
+            nonlocal sent
+            if duration is not None and time.perf_counter() - started >= duration:
+                return True
+            if total_requests is not None:
+                if sent >= total_requests:
+                    return True
+                sent += 1
+            return False
+
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://loadtest") as client:
+            await asyncio.gather(*(
+                _client(client, operations, weights, context, stats, should_stop, seed + n, think_time)
+                for n in range(concurrency)
+            ))
+        elapsed = time.perf_counter() - started
+    finally:
+        await shutdown_event()
+
+    routes = {name: route.summary() for name, route in stats.items()}
+    total = sum(route['requests'] for route in routes.values())
+    errors = sum(route['errors'] for route in routes.values())
+    return {
+        'created_at': datetime.now(timezone.utc).isoformat(),
+        'git_commit': git_commit(),
+        'profile': profile.get('name'),
+        'concurrency': concurrency,
+        'think_time_s': think_time,
+        'elapsed_s': round(elapsed, 3),
+        'requests': total,
+        'throughput_rps': round(total / elapsed, 2) if elapsed else 0.0,
+        'errors': errors,
+        'error_rate': round(errors / total, 4) if total else 0.0,
+        'routes': routes,
+    }
+
+def _print_report(report: dict):
+    print(f"{report['requests']} requests in {report['elapsed_s']}s, "
+          f"{report['throughput_rps']} req/s, error rate {report['error_rate']:.2%}")
+    print(f"{'route':<26}{'reqs':>8}{'err%':>8}{'p50':>10}{'p95':>10}{'p99':>10}")
+    for name, route in sorted(report['routes'].items()):
+        if not route['requests']:
+            continue
+        print(f"{name:<26}{route['requests']:>8}{route['error_rate']:>8.2%}"
+              f"{route['p50_ms']:>10.1f}{route['p95_ms']:>10.1f}{route['p99_ms']:>10.1f}")
+
+def _parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks.load",
+        description="Load test the API in-process with a weighted workload profile.",
+    )
+    parser.add_argument('--database', required=True,
+                        help="Benchmark database name; order creates write to it")
+    parser.add_argument('--seed-orders', type=int, default=None,
+                        help="Seed the database with this many orders first")
+    parser.add_argument('--profile', default=None, help="Workload profile JSON file")
+    parser.add_argument('--concurrency', type=int, default=DEFAULT_CONCURRENCY,
+                        help="Number of concurrent clients")
+    parser.add_argument('--duration', type=float, default=None,
+                        help=f"Seconds to run (default {DEFAULT_DURATION} unless --requests is given)")
+    parser.add_argument('--requests', type=int, default=None, help="Total requests to send")
+    parser.add_argument('--think-time', type=float, default=0,
+                        help="Mean pause in seconds between a client's requests")
+    parser.add_argument('--seed', type=int, default=42, help="Random seed of clients and dataset")
+    parser.add_argument('--output', default=None,
+                        help="Result file, default benchmarks/results/load-<timestamp>.json")
+    args = parser.parse_args(argv)
+    if args.duration is None and args.requests is None:
+        args.duration = DEFAULT_DURATION
+    return args
+
+async def _main(args) -> dict:
+    if args.seed_orders:
+        from benchmarks import dataset
+        await dataset.prepare(dataset.Scale.for_orders(args.seed_orders, seed=args.seed))
+    profile = json.loads(Path(args.profile).read_text()) if args.profile else DEFAULT_PROFILE
+    return await run_load(
+        profile, args.concurrency, args.duration, args.requests, args.think_time, args.seed
+    )
+
+def main(argv=None) -> int:
+    logging.basicConfig(level=logging.INFO)
+    args = _parse_args(argv)
+    if not use_database(args.database):
+        logger.error("Refusing to load test the application database; use a dedicated one")
+        return 2
+    report = asyncio.run(_main(args))
+    _print_report(report)
+    output = write_results(report, args.output, prefix='load-')
+    logger.info(f"Results written to {output}")
+    return 1 if report['error_rate'] > 0 else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,182 @@
+"""
+Repository benchmarks.
+
+Seeds a dedicated database with the synthetic dataset at each scale, times
+every repository function and writes the results as JSON. The target
+database is wiped on every seed, so it must not be the application database.
+
+Usage (from the backend directory):
+    python -m benchmarks.run --database ims_bench
+    python -m benchmarks.run --database ims_bench --scales 10000 100000 1000000 \\
+        --repeat 10 --output benchmarks/results/nightly.json
+    python -m benchmarks.run --database ims_bench --scales 100000 --skip-seed \\
+        --only order_repo. product_repo.search
+
+Compare two result files with:
+    python -m benchmarks.run --compare old.json new.json
+"""
+import sys
+import json
+import time
+import asyncio
+import logging
+import argparse
+import platform
+import statistics
+from datetime import datetime, timezone
+from pathlib import Path
+from benchmarks import git_commit, use_database, write_results
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SCALES = (10_000, 100_000, 1_000_000)
+DEFAULT_REPEAT = 5
+DEFAULT_WARMUP = 1
+# Cases whose median grows by more than this factor are flagged by --compare
+REGRESSION_THRESHOLD = 1.25
+
+def _parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks.run",
+        description="Time every repository function against a synthetic dataset.",
+    )
+    parser.add_argument('--database', help="Benchmark database name; it is wiped on every seed")
+    parser.add_argument('--scales', type=int, nargs='+', default=list(DEFAULT_SCALES),
+                        help="Order counts to benchmark at")
+    parser.add_argument('--repeat', type=int, default=DEFAULT_REPEAT,
+                        help="Timed runs per case")
+    parser.add_argument('--warmup', type=int, default=DEFAULT_WARMUP,
+                        help="Untimed runs per case before timing")
+    parser.add_argument('--only', nargs='+', default=None,
+                        help="Only run cases whose name starts with one of these prefixes")
+    parser.add_argument('--skip-seed', action='store_true',
+                        help="Reuse the data already in the database (single scale only)")
+    parser.add_argument('--seed', type=int, default=42, help="Random seed of the dataset")
+    parser.add_argument('--output', default=None,
+                        help="Result file, default benchmarks/results/<timestamp>.json")
+    parser.add_argument('--compare', nargs=2, metavar=('BASELINE', 'CURRENT'),
+                        help="Compare two result files instead of running")
+    args = parser.parse_args(argv)
+    if not args.compare and not args.database:
+        parser.error("--database is required")
+    if args.skip_seed and len(args.scales) != 1:
+        parser.error("--skip-seed needs exactly one scale, the one already loaded")
+    return args
+
+def _summarize(timings: list) -> dict:
+    ordered = sorted(timings)
+    return {
+        'runs': len(ordered),
+        'min_ms': round(ordered[0] * 1000, 3),
+        'median_ms': round(statistics.median(ordered) * 1000, 3),
+        'mean_ms': round(statistics.fmean(ordered) * 1000, 3),
+        'p95_ms': round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))] * 1000, 3),
+        'max_ms': round(ordered[-1] * 1000, 3),
+        'stdev_ms': round(statistics.stdev(ordered) * 1000, 3) if len(ordered) > 1 else 0.0,
+    }
+
+async def _run_scale(scale_orders: int, args) -> dict:
+    from benchmarks import cases, dataset
+
+    scale = dataset.Scale.for_orders(scale_orders, seed=args.seed)
+    if args.skip_seed:
+        scale = scale.as_dict()
+    else:
+        scale = await dataset.prepare(scale)
+    context = await cases.load_context()
+    results = {}
+    for name, bench_case in cases.CASES.items():
+        if args.only and not name.startswith(tuple(args.only)):
+            continue
+        repeat = bench_case.repeat or args.repeat
+        warmup = 0 if bench_case.repeat else args.warmup
+        timings = []
+        rows = None
+        try:
+            for run in range(warmup + repeat):
+                started = time.perf_counter()
+                rows = await cases.run_case(bench_case, context)
+                if run >= warmup:
+                    timings.append(time.perf_counter() - started)
+        except Exception as e:
+            logger.error(f"{name} failed: {e}")
+            results[name] = {'error': f"{type(e).__name__}: {e}"}
+            continue
+        results[name] = {**_summarize(timings), 'rows': rows, 'write': bench_case.write}
+        logger.info(f"{name}: median {results[name]['median_ms']} ms")
+    return {'scale': scale, 'cases': results}
+
+async def _run(args) -> dict:
+    from app.config.database import close_pool
+    from app.config.async_database import (
+        DB_ASYNC_MODE, execute_query, close_async_pool, shutdown_query_executor
+    )
+    from benchmarks import cases
+
+    report = {
+        'created_at': datetime.now(timezone.utc).isoformat(),
+        'git_commit': git_commit(),
+        'python': platform.python_version(),
+        'db_async_mode': DB_ASYNC_MODE,
+        'repeat': args.repeat,
+        'warmup': args.warmup,
+        'uncovered_functions': cases.uncovered_functions(),
+        'scales': {},
+    }
+    try:
+        version = await execute_query("SHOW server_version;")
+        report['postgres'] = version[0]['server_version'] if version else None
+        for scale_orders in args.scales:
+            report['scales'][str(scale_orders)] = await _run_scale(scale_orders, args)
+    finally:
+        await close_async_pool()
+        shutdown_query_executor()
+        close_pool()
+    return report
+
+def compare(baseline: dict, current: dict, threshold: float = REGRESSION_THRESHOLD) -> list:
+    """
+    List the cases whose median got slower by more than `threshold` times
+    between two result files, per scale.
+    """
+    regressions = []
+    for scale, result in current['scales'].items():
+        old_cases = baseline['scales'].get(scale, {}).get('cases', {})
+        for name, new in result['cases'].items():
+            old = old_cases.get(name)
+            if not old or 'median_ms' not in old or 'median_ms' not in new or not old['median_ms']:
+                continue
+            ratio = new['median_ms'] / old['median_ms']
+            if ratio > threshold:
+                regressions.append({
+                    'scale': scale,
+                    'case': name,
+                    'baseline_ms': old['median_ms'],
+                    'current_ms': new['median_ms'],
+                    'ratio': round(ratio, 2),
+                })
+    return regressions
+
+def main(argv=None) -> int:
+    logging.basicConfig(level=logging.INFO)
+    args = _parse_args(argv)
+
+    if args.compare:
+        baseline, current = (json.loads(Path(path).read_text()) for path in args.compare)
+        regressions = compare(baseline, current)
+        print(json.dumps(regressions, indent=2))
+        return 1 if regressions else 0
+
+    if not use_database(args.database):
+        logger.error("Refusing to wipe the application database; use a dedicated one")
+        return 2
+    report = asyncio.run(_run(args))
+
+    output = write_results(report, args.output)
+    logger.info(f"Results written to {output}")
+    if report['uncovered_functions']:
+        logger.warning(f"No benchmark case for: {', '.join(report['uncovered_functions'])}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,186 @@
+import time
+import asyncio
+import weakref
+import threading
+
+import pytest
+
+from app.config import async_database
+from app.config import database as sync_database
+from app.config.async_database import PreparedStatement, _expand_values, _get_prepared_statement
+
+
+class FakeConnection:
+    closed = False
+
+    class info:
+        transaction_status = sync_database.TRANSACTION_STATUS_IDLE
+
+    def cursor(self):
+        return FakeCursor()
+
+    def commit(self):
+        pass
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+
+class FakeCursor:
+    description = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def execute(self, query, params=None):
+        pass
+
+    def close(self):
+        pass
+
+
+@pytest.fixture(autouse=True)
+def registry(monkeypatch):
+    monkeypatch.setattr(async_database, "_prepared_statements", {})
+    monkeypatch.setattr(async_database, "_prepared_on", weakref.WeakKeyDictionary())
+
+
+def test_expand_values_default_template():
+    query, params = _expand_values(
+        "INSERT INTO OrderDetails (OrderID, ProductID) VALUES %s RETURNING OrderDetailID",
+        [(1, 10), (1, 11)],
+    )
+    assert query == "INSERT INTO OrderDetails (OrderID, ProductID) VALUES (%s, %s), (%s, %s) RETURNING OrderDetailID"
+    assert params == [1, 10, 1, 11]
+
+
+def test_expand_values_custom_template():
+    query, params = _expand_values("INSERT INTO Orders (OrderDate) VALUES %s", [("2024-01-01",)], "(%s::date)")
+    assert query == "INSERT INTO Orders (OrderDate) VALUES (%s::date)"
+    assert params == ["2024-01-01"]
+
+
+@pytest.mark.parametrize("query", ["INSERT INTO Orders VALUES (1)", "INSERT INTO Orders VALUES %s, %s"])
+def test_expand_values_needs_one_placeholder(query):
+    with pytest.raises(ValueError):
+        _expand_values(query, [(1,)])
+
+
+def test_prepared_statement_placeholders():
+    statement = PreparedStatement(
+        'product_by_name',
+        "SELECT * FROM Products WHERE Name LIKE %s || '%%' AND CategoryID = %s;\n",
+    )
+    assert statement.prepare_sql == (
+        "PREPARE product_by_name AS SELECT * FROM Products WHERE Name LIKE $1 || '%' AND CategoryID = $2"
+    )
+    assert statement.execute_sql == "EXECUTE product_by_name (%s, %s)"
+
+
+def test_prepared_statement_without_parameters():
+    statement = PreparedStatement('product_count', "SELECT COUNT(*) FROM Products")
+    assert statement.prepare_sql == "PREPARE product_count AS SELECT COUNT(*) FROM Products"
+    assert statement.execute_sql == "EXECUTE product_count"
+
+
+@pytest.mark.parametrize("name", ["", "1st", "drop table", "Product-By-Id"])
+def test_prepared_statement_rejects_invalid_names(name):
+    with pytest.raises(ValueError):
+        PreparedStatement(name, "SELECT 1")
+
+
+def test_prepared_statement_name_clash():
+    statement = _get_prepared_statement('order_by_id', "SELECT * FROM Orders WHERE OrderID = %s")
+    assert _get_prepared_statement('order_by_id', "SELECT * FROM Orders WHERE OrderID = %s") is statement
+    with pytest.raises(ValueError):
+        _get_prepared_statement('order_by_id', "SELECT * FROM Orders WHERE SupplierID = %s")
+
+
+def test_prepared_statement_is_prepared_once_per_connection():
+    statement = _get_prepared_statement('order_by_id', "SELECT * FROM Orders WHERE OrderID = %s")
+    first, second = FakeConnection(), FakeConnection()
+
+    assert statement.needs_prepare(first)
+    statement.prepared(first)
+    assert not statement.needs_prepare(first)
+    assert statement.needs_prepare(second)
+    statement.prepared(second)
+    statement.forget(second)
+    assert statement.needs_prepare(second)
+
+    assert statement.stats() == {
+        'executions': 4,
+        'prepares': 3,
+        'hits': 1,
+        'hit_rate': 0.25,
+        'connections': 1,
+    }
+
+
+@pytest.fixture
+def threadpool(monkeypatch):
+    monkeypatch.setitem(async_database.POOL_CONFIG, 'max_size', 2)
+    monkeypatch.setattr(async_database, "DB_ASYNC_MODE", 'threadpool')
+    monkeypatch.setattr(async_database, "_query_executor", None)
+    monkeypatch.setattr(async_database, "_transaction_executor", None)
+    yield
+    async_database.shutdown_query_executor()
+
+
+def test_threadpool_transactions_beyond_pool_size(monkeypatch, threadpool):
+    monkeypatch.setattr(sync_database.psycopg2, "connect", lambda **kwargs: FakeConnection())
+    pool = sync_database.ConnectionPool({}, min_size=0, max_size=2, timeout=2, health_check=False)
+    monkeypatch.setattr(sync_database, "get_pool", lambda: pool)
+
+    async def write():
+        async with async_database.transaction():
+            await async_database.execute_query("UPDATE Orders SET Status = %s", ('Paid',))
+            await asyncio.sleep(0.01)
+            await async_database.execute_query("UPDATE Orders SET Status = %s", ('Shipped',))
+
+    async def workload():
+        # Transactions hold every connection while plain queries take every
+        # query worker waiting for one; the commits must still get through
+        transactions = [write() for _ in range(6)]
+        queries = [async_database.execute_query("SELECT 1") for _ in range(6)]
+        await asyncio.wait_for(asyncio.gather(*transactions, *queries), timeout=10)
+
+    asyncio.run(workload())
+    assert pool.stats()['timeouts'] == 0
+
+
+def test_threadpool_stream_cancelled_during_fetch(monkeypatch, threadpool):
+    closed_by = []
+
+    def stream_query(query, params, chunk_size):
+        try:
+            yield [{'order_id': 1}]
+            time.sleep(0.2)
+            yield [{'order_id': 2}]
+        finally:
+            closed_by.append(threading.current_thread().name)
+
+    monkeypatch.setattr(sync_database, "stream_query", stream_query)
+    received = []
+
+    async def export():
+        async for rows in async_database.stream_query("SELECT * FROM Orders"):
+            received.extend(rows)
+
+    async def disconnect_during_fetch():
+        task = asyncio.ensure_future(export())
+        await asyncio.sleep(0.05)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(disconnect_during_fetch())
+    assert received == [{'order_id': 1}]
+    assert len(closed_by) == 1
+    assert closed_by[0].startswith('db-transaction')
@@ -0,0 +1,140 @@
+import asyncio
+
+import pytest
+
+from app.utils import batch_loader
+from app.utils.batch_loader import BatchLoader, load_by_id
+from app.utils.request_context import _current_loaders
+
+ROWS = {row_id: {'product_id': row_id, 'name': f"product {row_id}"} for row_id in range(1, 6)}
+
+
+class FakeRepository:
+    def __init__(self, error=None):
+        self.error = error
+        self.one_calls = []
+        self.many_calls = []
+
+    async def fetch_one(self, row_id):
+        self.one_calls.append(row_id)
+        if self.error:
+            raise self.error
+        return ROWS.get(row_id)
+
+    async def fetch_many(self, ids):
+        self.many_calls.append(list(ids))
+        if self.error:
+            raise self.error
+        return [ROWS[row_id] for row_id in ids if row_id in ROWS]
+
+
+@pytest.fixture(autouse=True)
+def no_transaction(monkeypatch):
+    monkeypatch.setattr(batch_loader, "in_transaction", lambda: False)
+
+
+async def _in_request(coroutine_function):
+    token = _current_loaders.set({})
+    try:
+        return await coroutine_function()
+    finally:
+        _current_loaders.reset(token)
+
+
+def _load(repository, row_id):
+    return load_by_id('products', row_id, repository.fetch_one, repository.fetch_many, 'product_id')
+
+
+def test_concurrent_loads_are_one_query():
+    repository = FakeRepository()
+
+    async def handler():
+        return await asyncio.gather(*(_load(repository, row_id) for row_id in (3, 1, 3, 99)))
+
+    assert asyncio.run(_in_request(handler)) == [ROWS[3], ROWS[1], ROWS[3], None]
+    assert repository.many_calls == [[3, 1, 99]]
+    assert repository.one_calls == []
+
+
+def test_single_load_uses_fetch_one():
+    repository = FakeRepository()
+
+    async def handler():
+        return await _load(repository, 2)
+
+    assert asyncio.run(_in_request(handler)) == ROWS[2]
+    assert repository.one_calls == [2]
+    assert repository.many_calls == []
+
+
+def test_sequential_loads_are_not_cached():
+    repository = FakeRepository()
+
+    async def handler():
+        return [await _load(repository, 2), await _load(repository, 2)]
+
+    assert asyncio.run(_in_request(handler)) == [ROWS[2], ROWS[2]]
+    assert repository.one_calls == [2, 2]
+
+
+def test_requests_do_not_share_batches():
+    repository = FakeRepository()
+
+    async def handler(ids):
+        return await asyncio.gather(*(_load(repository, row_id) for row_id in ids))
+
+    async def two_requests():
+        return await asyncio.gather(
+            _in_request(lambda: handler((1, 2))),
+            _in_request(lambda: handler((2, 3))),
+        )
+
+    first, second = asyncio.run(two_requests())
+    assert first == [ROWS[1], ROWS[2]]
+    assert second == [ROWS[2], ROWS[3]]
+    assert sorted(repository.many_calls) == [[1, 2], [2, 3]]
+
+
+def test_outside_request_calls_fetch_one():
+    repository = FakeRepository()
+
+    async def handler():
+        return await asyncio.gather(_load(repository, 1), _load(repository, 2))
+
+    assert asyncio.run(handler()) == [ROWS[1], ROWS[2]]
+    assert repository.one_calls == [1, 2]
+    assert repository.many_calls == []
+
+
+def test_inside_transaction_calls_fetch_one(monkeypatch):
+    monkeypatch.setattr(batch_loader, "in_transaction", lambda: True)
+    repository = FakeRepository()
+
+    async def handler():
+        return await asyncio.gather(_load(repository, 1), _load(repository, 2))
+
+    assert asyncio.run(_in_request(handler)) == [ROWS[1], ROWS[2]]
+    assert repository.many_calls == []
+
+
+def test_error_reaches_every_caller():
+    repository = FakeRepository(error=RuntimeError("connection lost"))
+
+    async def handler():
+        return await asyncio.gather(_load(repository, 1), _load(repository, 2), return_exceptions=True)
+
+    results = asyncio.run(_in_request(handler))
+    assert [type(result) for result in results] == [RuntimeError, RuntimeError]
+    assert len(repository.many_calls) == 1
+
+
+def test_large_batches_are_chunked(monkeypatch):
+    monkeypatch.setattr(batch_loader, "MAX_BATCH_SIZE", 2)
+    repository = FakeRepository()
+    loader = BatchLoader(repository.fetch_one, repository.fetch_many, 'product_id')
+
+    async def handler():
+        return await asyncio.gather(*(loader.load(row_id) for row_id in range(1, 6)))
+
+    assert asyncio.run(handler()) == [ROWS[row_id] for row_id in range(1, 6)]
+    assert repository.many_calls == [[1, 2], [3, 4], [5]]
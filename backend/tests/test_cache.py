@@ -0,0 +1,87 @@
+import asyncio
+
+import pytest
+
+from app.utils import cache
+from app.utils.cache import TTLCache
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(cache.time, "monotonic", lambda: now[0])
+    return now
+
+
+def test_entry_expires_after_ttl(clock):
+    ttl_cache = TTLCache(ttl=30)
+    ttl_cache.set('key', 'value')
+    clock[0] += 29
+    assert ttl_cache.get('key') == 'value'
+    clock[0] += 1
+    assert ttl_cache.get('key') is TTLCache._MISSING
+    assert ttl_cache.stats()['entries'] == 0
+
+
+def test_zero_ttl_disables_caching(clock):
+    ttl_cache = TTLCache(ttl=0)
+    ttl_cache.set('key', 'value')
+    assert ttl_cache.get('key') is TTLCache._MISSING
+
+
+def test_invalidate_one_or_all(clock):
+    ttl_cache = TTLCache(ttl=30)
+    ttl_cache.set('a', 1)
+    ttl_cache.set('b', 2)
+    ttl_cache.invalidate('a')
+    assert ttl_cache.get('a') is TTLCache._MISSING
+    assert ttl_cache.get('b') == 2
+    ttl_cache.invalidate()
+    assert ttl_cache.get('b') is TTLCache._MISSING
+
+
+def test_set_from_stale_generation_is_discarded(clock):
+    ttl_cache = TTLCache(ttl=30)
+    generation = ttl_cache._generation
+    ttl_cache.invalidate()
+    ttl_cache.set('key', 'stale', generation)
+    assert ttl_cache.get('key') is TTLCache._MISSING
+    ttl_cache.set('key', 'fresh', ttl_cache._generation)
+    assert ttl_cache.get('key') == 'fresh'
+
+
+def test_get_or_load_does_not_cache_across_invalidation(clock):
+    ttl_cache = TTLCache(ttl=30)
+    calls = []
+
+    async def loader():
+        calls.append(1)
+        # A writer invalidates while the value is being loaded
+        ttl_cache.invalidate()
+        return len(calls)
+
+    assert asyncio.run(ttl_cache.get_or_load('key', loader)) == 1
+    assert asyncio.run(ttl_cache.get_or_load('key', loader)) == 2
+
+
+def test_get_or_load_caches(clock):
+    ttl_cache = TTLCache(ttl=30)
+    calls = []
+
+    async def loader():
+        calls.append(1)
+        return 'value'
+
+    async def load_twice():
+        return [await ttl_cache.get_or_load('key', loader) for _ in range(2)]
+
+    assert asyncio.run(load_twice()) == ['value', 'value']
+    assert len(calls) == 1
+    assert ttl_cache.stats() == {
+        'ttl_seconds': 30,
+        'entries': 1,
+        'hits': 1,
+        'misses': 1,
+        'hit_ratio': 0.5,
+        'invalidations': 0,
+    }
@@ -0,0 +1,50 @@
+from app.utils.metrics import Counter, Histogram, caller_label
+
+
+def test_histogram_renders_cumulative_buckets():
+    histogram = Histogram('db_query_duration_seconds', 'Latency.', ('function', 'kind'), buckets=(0.01, 0.1))
+    for value in (0.005, 0.05, 0.05, 3.0):
+        histogram.observe(('order_repo.get_orders', 'query'), value)
+
+    labels = 'function="order_repo.get_orders",kind="query"'
+    assert histogram.render() == [
+        "# HELP db_query_duration_seconds Latency.",
+        "# TYPE db_query_duration_seconds histogram",
+        f'db_query_duration_seconds_bucket{{{labels},le="0.01"}} 1',
+        f'db_query_duration_seconds_bucket{{{labels},le="0.1"}} 3',
+        f'db_query_duration_seconds_bucket{{{labels},le="+Inf"}} 4',
+        f"db_query_duration_seconds_sum{{{labels}}} 3.105000",
+        f"db_query_duration_seconds_count{{{labels}}} 4",
+    ]
+
+
+def test_histogram_bucket_bound_is_inclusive():
+    histogram = Histogram('latency', 'Latency.', ('route',), buckets=(0.1,))
+    histogram.observe(('/products',), 0.1)
+    assert 'latency_bucket{route="/products",le="0.1"} 1' in histogram.render()
+
+
+def test_counter_renders_series_sorted():
+    counter = Counter('db_query_rows_total', 'Rows.', ('function',))
+    counter.inc(('product_repo.get_products',), 20)
+    counter.inc(('customer_repo.get_customers',))
+    counter.inc(('customer_repo.get_customers',), 2)
+    assert counter.render() == [
+        "# HELP db_query_rows_total Rows.",
+        "# TYPE db_query_rows_total counter",
+        'db_query_rows_total{function="customer_repo.get_customers"} 3',
+        'db_query_rows_total{function="product_repo.get_products"} 20',
+    ]
+
+
+def test_label_values_are_escaped():
+    counter = Counter('errors_total', 'Errors.', ('route',))
+    counter.inc(('/a"b\\c\nd',))
+    assert counter.render()[-1] == 'errors_total{route="/a\\"b\\\\c\\nd"} 1'
+
+
+def test_caller_label_outside_repositories():
+    def helper():
+        return caller_label()
+
+    assert helper() == 'other'
@@ -0,0 +1,66 @@
+import base64
+import json
+from datetime import date
+from decimal import Decimal
+
+import pytest
+from fastapi import HTTPException
+
+from app.utils.pagination import decode_cursor, encode_cursor, keyset_clause, split_page
+
+ORDER_FIELDS = {'order_date': date.fromisoformat, 'order_id': int}
+
+
+def _raw_cursor(values) -> str:
+    return base64.urlsafe_b64encode(json.dumps(values).encode()).decode().rstrip("=")
+
+
+def test_cursor_round_trip():
+    cursor = encode_cursor({'order_date': date(2024, 2, 29), 'order_id': 42})
+    assert "=" not in cursor
+    assert decode_cursor(cursor, ORDER_FIELDS) == {'order_date': date(2024, 2, 29), 'order_id': 42}
+
+
+def test_cursor_round_trip_decimal_and_null():
+    cursor = encode_cursor({'price': Decimal("12.50"), 'product_id': None})
+    values = decode_cursor(cursor, {'price': Decimal, 'product_id': int})
+    assert values == {'price': Decimal("12.50"), 'product_id': None}
+
+
+@pytest.mark.parametrize("cursor", [
+    "not base64 at all!",
+    _raw_cursor([1, 2]),
+    _raw_cursor({'order_id': 42}),
+    _raw_cursor({'order_date': '2024-01-01', 'order_id': 42, 'extra': 1}),
+    _raw_cursor({'order_date': 'yesterday', 'order_id': 42}),
+    _raw_cursor({'order_date': '2024-01-01', 'order_id': 'DROP TABLE'}),
+])
+def test_tampered_cursor_is_rejected(cursor):
+    with pytest.raises(HTTPException) as error:
+        decode_cursor(cursor, ORDER_FIELDS)
+    assert error.value.status_code == 400
+
+
+def test_keyset_clause_on_id_only():
+    assert keyset_clause("p.ProductID", "p.ProductID", False, None) == (None, [], "p.ProductID ASC")
+    predicate, params, order_by = keyset_clause("p.ProductID", "p.ProductID", True, (None, 7))
+    assert predicate == "p.ProductID < %s"
+    assert params == [7]
+    assert order_by == "p.ProductID DESC"
+
+
+def test_keyset_clause_with_tie_breaker():
+    predicate, params, order_by = keyset_clause("p.Name", "p.ProductID", False, ("Aspirin", 7))
+    assert predicate == "(p.Name, p.ProductID) > (%s, %s)"
+    assert params == ["Aspirin", 7]
+    assert order_by == "p.Name ASC, p.ProductID ASC"
+
+
+def test_split_page():
+    rows = [{'name': name, 'product_id': n} for n, name in enumerate("abc", start=1)]
+    assert split_page(rows, None, ('name', 'product_id')) == (rows, None)
+    assert split_page(rows, 3, ('name', 'product_id')) == (rows, None)
+
+    page, cursor = split_page(rows, 2, ('name', 'product_id'))
+    assert page == rows[:2]
+    assert decode_cursor(cursor, {'name': str, 'product_id': int}) == {'name': 'b', 'product_id': 2}
@@ -0,0 +1,126 @@
+import asyncio
+
+import pytest
+
+from app.utils import prefix_index
+from app.utils.prefix_index import PrefixIndex
+
+
+def _index():
+    index = PrefixIndex()
+    index.load([(1, "John Smith"), (2, "Jane Doe"), (3, "Smith & Sons"), (4, None)])
+    return index
+
+
+def test_load_and_search_any_word():
+    index = _index()
+    assert len(index) == 3
+    assert index.search("smi") == [(1, "John Smith"), (3, "Smith & Sons")]
+    assert index.search("JOHN  sm") == [(1, "John Smith")]
+    assert index.search("doe") == [(2, "Jane Doe")]
+    assert index.search("x") == []
+    assert index.search("   ") == []
+
+
+def test_search_limit_and_one_match_per_entry():
+    index = PrefixIndex()
+    index.load([(1, "Sam Sampson"), (2, "Sara"), (3, "Sasha")])
+    assert [item_id for item_id, _ in index.search("sa")] == [1, 2, 3]
+    assert len(index.search("sa", limit=2)) == 2
+
+
+def test_insert():
+    index = _index()
+    index.upsert(5, "Johanna Berg")
+    assert index.search("joh") == [(5, "Johanna Berg"), (1, "John Smith")]
+    assert index.search("berg") == [(5, "Johanna Berg")]
+
+
+def test_rename_replaces_old_keys():
+    index = _index()
+    index.upsert(1, "Johnny Walker")
+    assert index.search("smith") == [(3, "Smith & Sons")]
+    assert index.search("walk") == [(1, "Johnny Walker")]
+    assert len(index) == 3
+
+
+def test_delete():
+    index = _index()
+    index.remove(1)
+    index.remove(99)
+    assert index.search("john") == []
+    assert index.search("smith") == [(3, "Smith & Sons")]
+    assert len(index) == 2
+
+
+def test_upsert_without_name_removes():
+    index = _index()
+    index.upsert(2, "")
+    assert index.search("jane") == []
+
+
+def test_needs_load(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(prefix_index.time, "monotonic", lambda: now[0])
+    index = PrefixIndex(max_age=60)
+    assert index.needs_load()
+    index.load([])
+    assert not index.needs_load()
+    now[0] += 61
+    assert index.needs_load()
+
+    kept = PrefixIndex(max_age=0)
+    kept.load([])
+    now[0] += 10 ** 6
+    assert not kept.needs_load()
+
+
+def test_reload_keeps_writes_made_during_fetch():
+    index = _index()
+
+    async def fetch():
+        # Snapshot read before the writes below reach the index
+        snapshot = [(1, "John Smith"), (2, "Jane Doe"), (3, "Smith & Sons")]
+        index.upsert(5, "Johanna Berg")
+        index.upsert(1, "Johnny Walker")
+        index.remove(2)
+        return snapshot
+
+    asyncio.run(index.reload(fetch))
+    assert index.search("joh") == [(5, "Johanna Berg"), (1, "Johnny Walker")]
+    assert index.search("jane") == []
+    assert index.search("smith") == [(3, "Smith & Sons")]
+
+    # The journal ends with the reload
+    index.load([(7, "Zed")])
+    assert index.search("joh") == []
+
+
+def test_concurrent_reloads_share_one_fetch():
+    index = PrefixIndex()
+    calls = []
+
+    async def fetch():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return [(1, "John Smith")]
+
+    async def reload_concurrently():
+        await asyncio.gather(*(index.reload(fetch) for _ in range(5)))
+
+    asyncio.run(reload_concurrently())
+    assert calls == [1]
+    assert index.search("john") == [(1, "John Smith")]
+
+
+def test_failed_reload_keeps_index():
+    index = _index()
+
+    async def fetch():
+        index.upsert(5, "Johanna Berg")
+        raise RuntimeError("connection lost")
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(index.reload(fetch))
+    assert index.search("joh") == [(5, "Johanna Berg"), (1, "John Smith")]
+    assert index._journal is None
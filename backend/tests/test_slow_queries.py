@@ -0,0 +1,84 @@
+from datetime import date, datetime
+from decimal import Decimal
+
+import pytest
+
+from app.utils import slow_queries
+from app.utils.slow_queries import fingerprint, normalize_sql, redact
+
+
+def test_normalize_replaces_literals_and_squeezes_whitespace():
+    query = """
+    SELECT * FROM Products
+    WHERE Name = 'O''Brien'   AND Price > 12.50
+    LIMIT 10;
+    """
+    assert normalize_sql(query) == "SELECT * FROM Products WHERE Name = ? AND Price > ? LIMIT ?;"
+
+
+def test_normalize_keeps_placeholders_and_identifiers():
+    query = "SELECT o.OrderID FROM Orders o WHERE o.SupplierID = %s AND v2.x = %s"
+    assert normalize_sql(query) == query
+
+
+def test_normalize_collapses_values_lists():
+    one = "INSERT INTO OrderDetails (OrderID, ProductID) VALUES (%s, %s)"
+    many = "INSERT INTO OrderDetails (OrderID, ProductID) VALUES (%s, %s), (%s, %s),\n (%s, %s)"
+    assert normalize_sql(many) == one + " /* , ... */"
+    assert normalize_sql(one) == one
+
+
+def test_fingerprint_is_shared_by_same_shape():
+    first = normalize_sql("SELECT * FROM Orders WHERE OrderID = 1")
+    second = normalize_sql("SELECT *  FROM Orders WHERE OrderID = 42")
+    assert fingerprint(first) == fingerprint(second)
+    assert fingerprint(first) != fingerprint(normalize_sql("SELECT * FROM Products WHERE ProductID = 1"))
+    assert len(fingerprint(first)) == 12
+
+
+def test_redact_strings_and_keeps_other_values():
+    params = ("jane@example.com", 42, 1.5, True, None, Decimal("9.99"), date(2024, 1, 2))
+    assert redact(params) == ["<str:16>", 42, 1.5, True, None, "9.99", "2024-01-02"]
+    assert redact(datetime(2024, 1, 2, 3, 4)) == "2024-01-02T03:04:00"
+    assert redact(b"raw") == "<bytes>"
+
+
+def test_redact_summarizes_long_lists():
+    assert redact(list(range(12))) == list(range(10)) + ["<... 2 more>"]
+    assert redact([["a", 1]]) == [["<str:1>", 1]]
+
+
+def test_redact_can_be_disabled(monkeypatch):
+    monkeypatch.setattr(slow_queries, "SLOW_QUERY_REDACT", False)
+    assert redact(["jane"]) == ["jane"]
+
+
+@pytest.fixture
+def recorded(monkeypatch):
+    written = []
+    monkeypatch.setattr(slow_queries, "SLOW_QUERY_THRESHOLD_MS", 100.0)
+    monkeypatch.setattr(slow_queries, "SLOW_QUERY_EXPLAIN", False)
+    monkeypatch.setattr(slow_queries, "_entries", slow_queries.deque(maxlen=10))
+    monkeypatch.setattr(slow_queries, "_write", written.append)
+    return written
+
+
+def test_observe_logs_only_slow_statements(recorded):
+    slow_queries.observe('product_repo.get_products', 'query', "SELECT 1", None, 0.099)
+    assert recorded == []
+
+    query = "SELECT * FROM Customers WHERE Email = %s AND CustomerID > 5"
+    slow_queries.observe('customer_repo.search', 'query', query, ("jane@example.com",), 0.25)
+    [entry] = slow_queries.get_entries()
+    assert recorded == [entry]
+    assert entry['duration_ms'] == 250.0
+    assert entry['function'] == 'customer_repo.search'
+    assert entry['sql'] == "SELECT * FROM Customers WHERE Email = %s AND CustomerID > ?"
+    assert entry['params'] == ["<str:16>"]
+    assert entry['endpoint'] is None
+
+
+def test_observe_logs_batches_by_size(recorded):
+    rows = [(1, "a"), (2, "b"), (3, "c")]
+    slow_queries.observe('order_repo.create_orders', 'batch', "INSERT INTO Orders VALUES (%s, %s)", rows, 1.0)
+    assert slow_queries.get_entries()[0]['params'] == "<batch:3 rows>"